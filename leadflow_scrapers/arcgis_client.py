@@ -0,0 +1,230 @@
+"""
+ArcGIS REST query client for FeatureServer / MapServer layers
+
+Many city permit portals (Houston, Atlanta) publish through ArcGIS rather
+than Socrata. A layer caps each response at its maxRecordCount, so a query
+is split into pages: the matching count is fetched first, then every
+resultOffset/resultRecordCount page is requested concurrently. Layers that
+don't support pagination are paged by object id instead.
+
+    client = ArcGISClient('https://.../FeatureServer/0', label='Houston')
+    for attributes in client.query(where=client.since('ISSUE_DATE', since),
+                                   out_fields=['PERMIT_NO', 'CONTRACTOR']):
+        ...
+    print(client.summary())
+
+Cities often publish a Hub dataset page, a service or a whole services
+directory rather than the layer itself; find_layer() follows those to the
+layer whose name matches a pattern ('permit').
+"""
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import http_client
+
+# Upper bound per page; the layer's own maxRecordCount wins when smaller
+PAGE_SIZE = 2000
+
+MAX_WORKERS = 4
+
+# Hard stop per query in case a filter is far broader than intended
+MAX_ROWS = 50_000
+
+LAYER_URL_RE = re.compile(r'/(FeatureServer|MapServer)/\d+/?$', re.I)
+SERVICE_URL_RE = re.compile(r'/(FeatureServer|MapServer)/?$', re.I)
+HUB_DATASET_RE = re.compile(r'^(https?://[^/]+)/datasets/([^/?#]+)', re.I)
+
+# Folder levels searched below a services directory
+MAX_FOLDER_DEPTH = 2
+
+_layers = {}
+_layers_lock = threading.Lock()
+
+
+class ArcGISError(Exception):
+    pass
+
+
+def _json(url: str, headers: dict = None, timeout: int = 30) -> dict:
+    response = http_client.get(url, params={'f': 'json'}, headers=headers or {}, timeout=timeout)
+    if response.status_code != 200:
+        raise ArcGISError(f"HTTP {response.status_code} from {url}")
+    data = response.json()
+    if 'error' in data:
+        raise ArcGISError(f"{url}: {data['error'].get('code')} {data['error'].get('message')}")
+    return data
+
+
+def _search_directory(url: str, pattern, headers, timeout, depth: int) -> str:
+    """First matching service in a services directory, then in its folders"""
+    directory = _json(url, headers, timeout)
+    root = url[:url.lower().index('/rest/services')] + '/rest/services'
+    for service in directory.get('services', []):
+        if service.get('type') in ('FeatureServer', 'MapServer') and pattern.search(service.get('name', '')):
+            found = _search_service(f"{root}/{service['name']}/{service['type']}", pattern, headers, timeout)
+            if found:
+                return found
+    if depth > 0:
+        # Folders named like the layer first
+        folders = sorted(directory.get('folders', []), key=lambda f: not pattern.search(f))
+        for folder in folders:
+            found = _search_directory(f"{root}/{folder}", pattern, headers, timeout, depth - 1)
+            if found:
+                return found
+    return None
+
+
+def _search_service(url: str, pattern, headers, timeout) -> str:
+    """Layer of a FeatureServer/MapServer whose name matches, else its only layer"""
+    layers = _json(url, headers, timeout).get('layers', [])
+    match = next((layer for layer in layers if pattern.search(layer.get('name', ''))), None)
+    if match is None and len(layers) == 1:
+        match = layers[0]
+    return f"{url.rstrip('/')}/{match['id']}" if match else None
+
+
+def find_layer(url: str, match: str = 'permit', headers: dict = None, timeout: int = 30) -> str:
+    """
+    Layer URL for a layer, a FeatureServer/MapServer service, a services
+    directory or an ArcGIS Hub dataset page. Layers and services are
+    matched by name against the match pattern. Resolved URLs are remembered
+    for the process.
+    """
+    if LAYER_URL_RE.search(url or ''):
+        return url
+    key = (url, match)
+    with _layers_lock:
+        if key in _layers:
+            return _layers[key]
+
+    pattern = re.compile(match, re.I)
+    hub = HUB_DATASET_RE.search(url or '')
+    if hub:
+        # The Hub API names the service behind a dataset page
+        dataset = _json(f"{hub.group(1)}/api/v3/datasets/{hub.group(2)}", headers, timeout)
+        target = (dataset.get('data', {}).get('attributes', {}) or {}).get('url')
+        if not target:
+            raise ArcGISError(f"Hub dataset {url} names no service")
+        layer = find_layer(target, match, headers, timeout)
+    elif SERVICE_URL_RE.search(url or ''):
+        layer = _search_service(url, pattern, headers, timeout)
+    elif '/rest/services' in (url or '').lower():
+        layer = _search_directory(url.rstrip('/'), pattern, headers, timeout, MAX_FOLDER_DEPTH)
+    else:
+        raise ArcGISError(f"{url} is not an ArcGIS layer, service, services directory or Hub dataset")
+
+    if not layer:
+        raise ArcGISError(f"No layer matching '{match}' under {url}")
+    with _layers_lock:
+        _layers[key] = layer
+    return layer
+
+
+class ArcGISClient:
+    """Paged, projected queries against one ArcGIS feature layer"""
+
+    def __init__(self, layer_url: str, label: str = None, headers: dict = None,
+                 max_workers: int = MAX_WORKERS, max_rows: int = MAX_ROWS, timeout: int = 30):
+        if not LAYER_URL_RE.search(layer_url or ''):
+            raise ArcGISError(f"{layer_url} is not a FeatureServer/MapServer layer URL")
+        self.layer_url = layer_url.rstrip('/')
+        self.label = label or layer_url
+        self.headers = headers or {}
+        self.max_workers = max_workers
+        self.max_rows = max_rows
+        self.timeout = timeout
+        self._metadata = None
+        self.stats = {'rows': 0, 'pages': 0, 'bytes': 0}
+        # Set by query() when more rows matched than max_rows
+        self.truncated = False
+        self._lock = threading.Lock()
+
+    def _get(self, path: str, params: dict) -> dict:
+        params = {**params, 'f': 'json'}
+        response = http_client.get(f"{self.layer_url}{path}", params=params,
+                                   headers=self.headers, timeout=self.timeout)
+        with self._lock:
+            self.stats['bytes'] += len(response.content)
+        if response.status_code != 200:
+            raise ArcGISError(f"ArcGIS {self.label}: HTTP {response.status_code}")
+        data = response.json()
+        # Errors come back as HTTP 200 with an error object
+        if 'error' in data:
+            error = data['error']
+            raise ArcGISError(f"ArcGIS {self.label}: {error.get('code')} {error.get('message')}")
+        return data
+
+    def metadata(self) -> dict:
+        if self._metadata is None:
+            self._metadata = self._get('', {})
+        return self._metadata
+
+    @property
+    def page_size(self) -> int:
+        return min(PAGE_SIZE, self.metadata().get('maxRecordCount') or PAGE_SIZE)
+
+    @property
+    def object_id_field(self) -> str:
+        meta = self.metadata()
+        if meta.get('objectIdField'):
+            return meta['objectIdField']
+        return next((f['name'] for f in meta.get('fields', []) if f.get('type') == 'esriFieldTypeOID'), 'OBJECTID')
+
+    def pick(self, *candidates) -> str:
+        """First candidate field the layer has (case-insensitive), by its real name"""
+        names = {f['name'].lower(): f['name'] for f in self.metadata().get('fields', [])}
+        return next((names[c.lower()] for c in candidates if c and c.lower() in names), None)
+
+    @staticmethod
+    def since(field: str, when) -> str:
+        """where clause for a date field on or after a datetime"""
+        return f"{field} >= TIMESTAMP '{when.strftime('%Y-%m-%d %H:%M:%S')}'"
+
+    def count(self, where: str) -> int:
+        return self._get('/query', {'where': where, 'returnCountOnly': 'true'}).get('count', 0)
+
+    def _page(self, params: dict) -> list:
+        data = self._get('/query', {**params, 'returnGeometry': 'false'})
+        features = data.get('features', [])
+        with self._lock:
+            self.stats['pages'] += 1
+            self.stats['rows'] += len(features)
+        return [feature.get('attributes', {}) for feature in features]
+
+    def _pages_by_offset(self, where, fields, total):
+        size = self.page_size
+        base = {'where': where, 'outFields': fields, 'orderByFields': self.object_id_field}
+        return [
+            {**base, 'resultOffset': offset, 'resultRecordCount': min(size, total - offset)}
+            for offset in range(0, total, size)
+        ]
+
+    def _pages_by_object_id(self, where, fields, total):
+        ids = self._get('/query', {'where': where, 'returnIdsOnly': 'true'}).get('objectIds') or []
+        ids = sorted(ids)[:total]
+        size = self.page_size
+        return [
+            {'objectIds': ','.join(str(i) for i in ids[start:start + size]), 'outFields': fields}
+            for start in range(0, len(ids), size)
+        ]
+
+    def query(self, where: str = '1=1', out_fields: list = None):
+        """Yield feature attributes for every match, pages fetched concurrently"""
+        fields = ','.join(dict.fromkeys(out_fields)) if out_fields else '*'
+        matched = self.count(where)
+        self.truncated = matched > self.max_rows
+        total = min(matched, self.max_rows)
+        if not total:
+            return
+
+        paging = self.metadata().get('advancedQueryCapabilities', {}).get('supportsPagination', True)
+        pages = (self._pages_by_offset if paging else self._pages_by_object_id)(where, fields, total)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for rows in pool.map(self._page, pages):
+                yield from rows
+
+    def summary(self) -> str:
+        s = self.stats
+        cut = f", truncated at {self.max_rows:,}" if self.truncated else ''
+        return f"{self.label}: {s['rows']} rows in {s['pages']} pages, {s['bytes'] / 1024:.0f} KB{cut}"
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Historical backfill over date windows
+
+The scrapers only read forward from a watermark (see watermarks.py), so a
+new state or source starts with about a week of signals. backfill splits a
+date range into windows per (source, state), or per city for permits, and
+runs each window as an explicit since/until search:
+
+- windows run in parallel, at most HOST_LIMITS requests' worth per host,
+  so two states on one portal don't double its load
+- leads go through daily_scraper.push_leads, the same enrichment, dedup and
+  insert path as the daily run, one window at a time
+- a window is checkpointed in .cache/backfill.sqlite once it was read
+  completely and written without insert errors; reruns skip it
+- windows still open (ending after today) run but aren't checkpointed
+
+Window edges are aligned to fixed multiples of the window length, so the
+same windows come out whatever day the backfill is started. Backfill
+windows leave the watermarks alone.
+
+    python backfill.py osha,ucc --states TX,AR --days 180
+    python backfill.py permits --since 2026-01-01 --window 30 --test
+
+The FMCSA census and OSHA bulk files are read in one pass; give them a
+longer --days instead (fmcsa_census.py, osha_bulk.py).
+"""
+import os
+import time
+import sqlite3
+import argparse
+import threading
+from functools import partial
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+
+CACHE_DIR = os.getenv(
+    'LEADFLOW_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+)
+
+WORKERS = int(os.getenv('LEADFLOW_BACKFILL_WORKERS', 4))
+
+# Windows running at once against one host. OSHA's list already fetches
+# two pages at a time per walk, and its walks share per-state stats.
+HOST_LIMITS = {
+    'www.osha.gov': 1,
+}
+
+DEFAULT_HOST_LIMIT = int(os.getenv('LEADFLOW_BACKFILL_HOST_LIMIT', 2))
+
+# Days per window; short enough that a window stays inside the source's
+# page budget (pagination.LIMITS) in a busy state
+WINDOW_DAYS = {
+    'osha': 7,
+    'permits': 14,
+    'licenses': 14,
+    'ucc': 7,
+}
+
+DAYS_BACK = 180
+
+# Host for sources read from local bulk files
+LOCAL = 'local'
+
+
+class Checkpoints:
+    """Completed windows per (source, key), in SQLite"""
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(CACHE_DIR, 'backfill.sqlite')
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS windows (source TEXT, key TEXT, start TEXT, end TEXT, '
+            'rows INTEGER, leads INTEGER, inserted INTEGER, finished_at REAL, PRIMARY KEY (source, key, start, end))'
+        )
+        self._db.commit()
+
+    def done(self, source: str, key: str) -> set:
+        """(start, end) date pairs already completed"""
+        with self._lock:
+            rows = self._db.execute('SELECT start, end FROM windows WHERE source = ? AND key = ?',
+                                    (source, key)).fetchall()
+        return {(date.fromisoformat(start), date.fromisoformat(end)) for start, end in rows}
+
+    def mark(self, source: str, key: str, start: date, end: date, rows: int, leads: int, inserted: int):
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO windows VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (source, key, start.isoformat(), end.isoformat(), rows, leads, inserted, time.time()),
+            )
+            self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+
+def windows(since: date, until: date, days: int) -> list:
+    """[start, end) windows of a fixed length covering since..until, newest first"""
+    start = since - timedelta(days=since.toordinal() % days)
+    spans = []
+    while start < until:
+        spans.append((start, start + timedelta(days=days)))
+        start += timedelta(days=days)
+    return spans[::-1]
+
+
+def _host(url: str) -> str:
+    return urlparse(url).netloc or url
+
+
+# Each source maps the requested states to partitions: (key, host, run),
+# where run(since=, until=, stats=) returns leads and fills stats with
+# rows read and whether the window was read completely
+
+def osha_window(state, since, until, stats):
+    """One OSHA window, with inspection details and scoring like the daily run"""
+    import osha_real
+    import osha_detail
+    leads = osha_real.get_osha_violations_by_state(state, since=since, until=until, stats=stats)
+    osha_detail.enrich_leads(leads)
+    return osha_real.score_leads(leads)
+
+
+def osha_partitions(states):
+    import osha_real
+    return [(state, 'www.osha.gov', partial(osha_window, state))
+            for state in states or osha_real.STATE_FIPS if state in osha_real.STATE_FIPS]
+
+
+def permits_partitions(states):
+    import permits_scraper
+    return [(city, _host(config['url']), partial(permits_scraper.scrape_city, city))
+            for city, config in permits_scraper.CITY_PORTALS.items()
+            if config.get('url') and (not states or config['state'] in states)]
+
+
+def licenses_partitions(states):
+    import license_scraper
+    return [(state, _host(board['form']['url']), partial(license_scraper.scrape_board, state))
+            for state, board in license_scraper.LICENSE_BOARDS.items()
+            if board.get('form') and (not states or state in states)]
+
+
+def ucc_partitions(states):
+    import ucc_scraper
+    partitions = []
+    for state, portal in ucc_scraper.UCC_PORTALS.items():
+        if states and state not in states:
+            continue
+        if ucc_scraper.bulk_files(state):
+            partitions.append((state, LOCAL, partial(ucc_scraper.scrape_ucc_filings, state)))
+        elif portal.get('form'):
+            partitions.append((state, _host(portal['form']['url']),
+                               partial(ucc_scraper.scrape_ucc_filings, state)))
+    return partitions
+
+
+SOURCES = {
+    'osha': osha_partitions,
+    'permits': permits_partitions,
+    'licenses': licenses_partitions,
+    'ucc': ucc_partitions,
+}
+
+
+def plan(sources, states, since: date, until: date, window_days: int = None, checkpoints=None, redo=False):
+    """Windows to run as (source, key, host, run, start, end), and how many were already done"""
+    tasks = []
+    skipped = 0
+    for source in sources:
+        days = window_days or WINDOW_DAYS.get(source, 7)
+        for key, host, run in SOURCES[source](states):
+            done = set() if redo or checkpoints is None else checkpoints.done(source, key)
+            # A local export is read end to end for every window, so it gets one
+            spans = [(since, until)] if host == LOCAL else windows(since, until, days)
+            for start, end in spans:
+                if (start, end) in done:
+                    skipped += 1
+                    continue
+                tasks.append((source, key, host, run, start, end))
+    # Newest windows first, interleaving hosts so workers don't all queue on one
+    tasks.sort(key=lambda task: task[5], reverse=True)
+    return tasks, skipped
+
+
+def backfill(sources, states=None, since: date = None, until: date = None, window_days: int = None,
+             workers: int = WORKERS, test_mode: bool = False, redo: bool = False) -> list:
+    """Run every window not yet checkpointed; one result dict per window run"""
+    import daily_scraper
+
+    until = until or date.today() + timedelta(days=1)
+    since = since or until - timedelta(days=DAYS_BACK)
+    checkpoints = Checkpoints()
+    tasks, skipped = plan(sources, states, since, until, window_days, checkpoints, redo)
+    print(f"[Backfill] {since} to {until}: {len(tasks)} windows to run, {skipped} already checkpointed")
+    if not tasks:
+        return []
+
+    existing_ids = daily_scraper.get_existing_leads()
+    host_slots = {}
+    for _, _, host, _, _, _ in tasks:
+        host_slots.setdefault(host, threading.Semaphore(HOST_LIMITS.get(host, DEFAULT_HOST_LIMIT)))
+    # push_leads dedups against the shared source ids, so windows write one
+    # at a time
+    write_lock = threading.Lock()
+
+    def run_window(task):
+        source, key, host, run, start, end = task
+        stats = {}
+        began = time.perf_counter()
+        with host_slots[host]:
+            # Portals take inclusive dates, so the window ends the second before end
+            leads = run(since=datetime.combine(start, datetime.min.time()),
+                        until=datetime.combine(end, datetime.min.time()) - timedelta(seconds=1),
+                        stats=stats)
+        with write_lock:
+            # Name dedup stays inside the window: a company with signals in
+            # several windows gets a lead for each
+            inserted, skipped = daily_scraper.push_leads(leads, existing_ids, test_mode, names=set())
+        errors = 0 if test_mode else len(leads) - inserted - skipped
+        complete = bool(stats.get('complete')) and not errors
+        if complete and not test_mode and end <= date.today():
+            checkpoints.mark(source, key, start, end, stats.get('rows', 0), len(leads), inserted)
+            status = 'done'
+        else:
+            status = 'open' if complete else 'incomplete'
+        return {'source': source, 'key': key, 'start': start, 'end': end, 'rows': stats.get('rows', 0),
+                'leads': len(leads), 'inserted': inserted, 'errors': errors, 'status': status,
+                'seconds': time.perf_counter() - began}
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(run_window, task) for task in tasks]
+        for future in as_completed(futures):
+            try:
+                r = future.result()
+            except Exception as e:
+                print(f"[Backfill] Window failed: {e}")
+                continue
+            results.append(r)
+            print(f"[Backfill] {r['source']}/{r['key']} {r['start']}..{r['end'] - timedelta(days=1)}: "
+                  f"{r['rows']:,} rows, {r['leads']} leads, {r['inserted']} inserted "
+                  f"({r['status']}, {r['seconds']:.1f}s)")
+
+    checkpoints.close()
+    incomplete = sum(1 for r in results if r['status'] == 'incomplete')
+    print(f"[Backfill] {len(results)} windows: {sum(r['rows'] for r in results):,} rows, "
+          f"{sum(r['leads'] for r in results):,} leads, {sum(r['inserted'] for r in results):,} inserted, "
+          f"{incomplete + len(tasks) - len(results)} to retry")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Backfill sources over historical date windows')
+    parser.add_argument('sources', help=f"Comma-separated sources: {', '.join(SOURCES)}")
+    parser.add_argument('--states', type=str, help='Comma-separated states (default: every state the source has)')
+    parser.add_argument('--days', type=int, default=DAYS_BACK, help='Days back from today when --since is not given')
+    parser.add_argument('--since', type=date.fromisoformat, help='First day, YYYY-MM-DD')
+    parser.add_argument('--until', type=date.fromisoformat, help='Day after the last, YYYY-MM-DD (default: tomorrow)')
+    parser.add_argument('--window', type=int, help='Days per window (default: per source)')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='Windows running at once')
+    parser.add_argument('--test', action='store_true', help="Don't insert or checkpoint anything")
+    parser.add_argument('--redo', action='store_true', help='Run checkpointed windows again')
+    args = parser.parse_args()
+
+    sources = [s.strip().lower() for s in args.sources.split(',')]
+    unknown = [s for s in sources if s not in SOURCES]
+    if unknown:
+        parser.error(f"unknown source(s): {', '.join(unknown)}")
+    until = args.until or date.today() + timedelta(days=1)
+    backfill(
+        sources,
+        [s.strip().upper() for s in args.states.split(',')] if args.states else None,
+        since=args.since or until - timedelta(days=args.days),
+        until=until,
+        window_days=args.window,
+        workers=args.workers,
+        test_mode=args.test,
+        redo=args.redo,
+    )
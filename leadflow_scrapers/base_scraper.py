@@ -8,6 +8,13 @@ from datetime import datetime, timedelta
 from abc import ABC, abstractmethod
 from supabase import create_client
 from dotenv import load_dotenv
+from session_store import PortalSession
+import gazetteer
+import contact_normalizer
+import zip_lookup
+import name_normalizer
+import pagination
+import watermarks
 
 load_dotenv()
 
@@ -24,6 +31,9 @@ class BaseScraper(ABC):
         )
         self.leads_inserted = 0
         self.leads_skipped = 0
+        self.leads_failed = 0
+        # Canonical (name, state, signal_type) keys saved during this run
+        self.seen_names = set()
     
     @abstractmethod
     def scrape(self) -> list:
@@ -35,17 +45,23 @@ class BaseScraper(ABC):
         """Return the source identifier (e.g., 'tx_sos', 'fmcsa')"""
         pass
     
-    def generate_source_id(self, *args) -> str:
+    @staticmethod
+    def generate_source_id(*args) -> str:
         """Generate unique source ID from arguments"""
         combined = '_'.join(str(a) for a in args)
         return hashlib.md5(combined.encode()).hexdigest()[:16]
     
+    def get_portal_session(self, bootstrap_url: str, headers: dict = None) -> PortalSession:
+        """Session for stateful search portals, warm-started from disk when possible"""
+        return PortalSession(self.get_source_name(), bootstrap_url, headers=headers)
+    
     def lead_exists(self, source_id: str) -> bool:
         """Check if lead with this source_id already exists"""
         result = self.supabase.table('leads').select('id').eq('source_id', source_id).execute()
         return len(result.data) > 0
     
-    def calculate_score(self, lead: dict) -> int:
+    @staticmethod
+    def calculate_score(lead: dict) -> int:
         """Calculate lead score based on various factors"""
         score = 50  # Base score
         
@@ -86,7 +102,8 @@ class BaseScraper(ABC):
         
         return min(score, 100)  # Cap at 100
     
-    def determine_priority(self, score: int) -> str:
+    @staticmethod
+    def determine_priority(score: int) -> str:
         """Determine priority based on score"""
         if score >= 80:
             return 'HIGH'
@@ -94,37 +111,49 @@ class BaseScraper(ABC):
             return 'MEDIUM'
         return 'LOW'
     
-    def determine_lead_type(self, signal_type: str) -> str:
+    @staticmethod
+    def determine_lead_type(signal_type: str) -> str:
         """Determine lead type based on signal"""
         uninsured_signals = ['new_formation', 'new_dot', 'first_permit', 'foreign_registration']
         if signal_type in uninsured_signals:
             return 'likely_uninsured'
         return 'coverage_gap'
     
-    def save_lead(self, lead: dict) -> bool:
+    @classmethod
+    def score_lead(cls, lead: dict, source: str) -> dict:
+        """
+        Set score, priority, lead type, stage, owner and source as save_lead
+        does, for leads written by other paths (daily_scraper.push_leads)
+        """
+        lead['score'] = cls.calculate_score(lead)
+        lead['priority'] = cls.determine_priority(lead['score'])
+        lead['lead_type'] = cls.determine_lead_type(lead.get('signal_type', ''))
+        lead['stage'] = 'new'
+        lead['owner'] = 'Unassigned'
+        lead['source'] = source
+        return lead
+    
+    def save_lead(self, lead: dict, name_key: tuple = None) -> bool:
         """Save lead to Supabase. Returns True if inserted, False if skipped."""
         source_id = lead.get('source_id')
         
-        if self.lead_exists(source_id):
+        if name_key in self.seen_names or self.lead_exists(source_id):
             self.leads_skipped += 1
             self.logger.debug(f"Skipping duplicate: {lead.get('company_name')}")
             return False
         
-        # Calculate score and priority
-        lead['score'] = self.calculate_score(lead)
-        lead['priority'] = self.determine_priority(lead['score'])
-        lead['lead_type'] = self.determine_lead_type(lead.get('signal_type', ''))
-        lead['stage'] = 'new'
-        lead['owner'] = 'Unassigned'
-        lead['source'] = self.get_source_name()
+        self.score_lead(lead, self.get_source_name())
         
         try:
             self.supabase.table('leads').insert(lead).execute()
             self.leads_inserted += 1
+            if name_key:
+                self.seen_names.add(name_key)
             self.logger.info(f"Inserted: {lead.get('company_name')} ({lead.get('city')}, {lead.get('state')})")
             return True
         except Exception as e:
             self.logger.error(f"Error inserting lead: {e}")
+            self.leads_failed += 1
             return False
     
     def run(self):
@@ -134,9 +163,28 @@ class BaseScraper(ABC):
         try:
             leads = self.scrape()
             self.logger.info(f"Scraped {len(leads)} leads")
+            for line in pagination.report(self.get_source_name()):
+                self.logger.info(f"Pagination: {line}")
+            for line in watermarks.report():
+                self.logger.info(f"Watermark: {line}")
+            
+            contact_normalizer.normalize_leads(leads)
+            matched = zip_lookup.enrich_leads(leads)
+            if matched:
+                self.logger.info(f"Enriched {matched} leads from ZIP table")
+            filled = gazetteer.fill_missing_cities(leads)
+            if filled:
+                self.logger.info(f"Filled city for {filled} leads from address")
+            
+            for lead, name_key in zip(leads, name_normalizer.lead_keys(leads)):
+                self.save_lead(lead, name_key)
             
-            for lead in leads:
-                self.save_lead(lead)
+            # Watermarks only move once everything they cover is written
+            if self.leads_failed:
+                watermarks.discard()
+                self.logger.warning(f"{self.leads_failed} inserts failed; watermarks not advanced")
+            else:
+                watermarks.commit()
             
             self.logger.info(f"Complete: {self.leads_inserted} inserted, {self.leads_skipped} skipped")
             return {
@@ -147,6 +195,7 @@ class BaseScraper(ABC):
             }
         except Exception as e:
             self.logger.error(f"Scraper failed: {e}")
+            watermarks.discard()
             return {
                 'source': self.get_source_name(),
                 'error': str(e)
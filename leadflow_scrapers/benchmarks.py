@@ -0,0 +1,949 @@
+#!/usr/bin/env python3
+"""
+LeadFlow Benchmarks
+Local, offline benchmarks for the fetch and parse layers
+
+Usage:
+    python benchmarks.py http2 --requests 500 --concurrency 32
+    python benchmarks.py parse-bytes --repeat 20
+    python benchmarks.py parse-bytes --pages recorded/   # safer_*.html, osha_*.html
+    python benchmarks.py parse --pages recorded/         # + safersearch_, txsos_, arsos_, opencorp_
+    python benchmarks.py snapshot --pages recorded/      # safer_*.html
+    python benchmarks.py classify --names 1000000
+    python benchmarks.py ucc --pages recorded/           # ucc_*.html
+
+Pages recorded from the live sites can be dropped into a directory and passed
+with --pages; otherwise synthetic pages with the same structure are used.
+"""
+
+import os
+import copy
+import sys
+import time
+import argparse
+import socket
+import asyncio
+import tempfile
+import threading
+import glob
+import random
+import subprocess
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def report(title, rows):
+    """Print a simple aligned results table"""
+    print("=" * 60)
+    print(title)
+    print("=" * 60)
+    if not rows:
+        return
+    headers = list(rows[0].keys())
+    widths = [max(len(str(h)), *(len(str(r[h])) for r in rows)) for h in headers]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(row[h]).ljust(w) for h, w in zip(headers, widths)))
+
+
+# ============================================
+# SAMPLE PAGES
+# ============================================
+
+CITIES = ['HOUSTON', 'DALLAS', 'SAN ANTONIO', 'LITTLE ROCK', 'ATLANTA', 'NASHVILLE', 'TULSA', 'BATON ROUGE']
+WORDS = ['ACME', 'LONE STAR', 'PEÑA', 'RED RIVER', 'BIG D', 'OZARK', 'PEACH', 'DELTA', 'GULF COAST', 'SUMMIT']
+TRADES = ['TRUCKING', 'CONSTRUCTION', 'ROOFING', 'LOGISTICS', 'ELECTRIC', 'PLUMBING', 'WELDING', 'CAFE']
+SUFFIXES = ['LLC', 'INC', 'L.L.C.', 'CORP', 'CO.', ', INC.']
+
+
+def company_name(rng):
+    return f"{rng.choice(WORDS)} {rng.choice(TRADES)} {rng.choice(SUFFIXES)}"
+
+
+def sample_safer_snapshot(rng, dot_number):
+    """SAFER company snapshot: labeled cells inside deeply nested layout tables"""
+    name = company_name(rng)
+    city = rng.choice(CITIES)
+    fields = [
+        ('Entity Type:', 'CARRIER'),
+        ('Operating Status:', 'AUTHORIZED FOR Property'),
+        ('Legal Name:', name),
+        ('DBA Name:', ''),
+        ('Physical Address:', f"{rng.randint(100, 9999)} MAIN ST <br>{city}, TX &nbsp; {rng.randint(75000, 79999)}"),
+        ('Phone:', f"({rng.randint(200, 999)}) {rng.randint(200, 999)}-{rng.randint(1000, 9999)}"),
+        ('Mailing Address:', f"PO BOX {rng.randint(1, 999)} <br>{city}, TX &nbsp; {rng.randint(75000, 79999)}"),
+        ('USDOT Number:', str(dot_number)),
+        ('State Carrier ID Number:', ''),
+        ('MC/MX/FF Number(s):', f'<a href="/mc">MC-{rng.randint(100000, 999999)}</a>'),
+        ('DUNS Number:', '--'),
+        ('Power Units:', str(rng.randint(1, 40))),
+        ('Drivers:', str(rng.randint(1, 60))),
+        ('MCS-150 Form Date:', '01/15/2025'),
+    ]
+    rows = ''.join(
+        f'<tr><th class="querylabelbkg"><a class="querylabel">{label}</a></th>'
+        f'<td class="queryfield" valign="top">{value}</td></tr>'
+        for label, value in fields
+    )
+    inspections = ''.join(
+        f'<tr><th>{kind}</th><td>{rng.randint(0, 20)}</td><td>{rng.randint(0, 5)}</td>'
+        f'<td>{rng.random() * 30:.1f}%</td><td>{rng.random() * 30:.1f}%</td></tr>'
+        for kind in ('Inspections', 'Out of Service', 'Out of Service %', 'Nat\'l Average %')
+    )
+    nav = ''.join(f'<td><a href="/nav{i}.aspx">Menu {i}</a></td>' for i in range(30))
+    body = (
+        '<table width="100%"><tr><td><table><tr>' + nav + '</tr></table></td></tr>'
+        '<tr><td><table border="0" cellpadding="4"><tr><td><center><table width="70%">'
+        '<tr><td><table border="1" cellpadding="4" cellspacing="0" width="100%" summary="For formatting purpose">'
+        + rows + '</table></td></tr>'
+        '<tr><td><table border="1" summary="Inspections">' + inspections + '</table></td></tr>'
+        '<tr><td><table summary="Crashes"><tr><th>Type</th><th>Fatal</th><th>Injury</th></tr>'
+        + ''.join(f'<tr><td>Crashes</td><td>{rng.randint(0, 2)}</td><td>{rng.randint(0, 5)}</td></tr>' for _ in range(8))
+        + '</table></td></tr></table></center></td></tr></table></td></tr></table>'
+    )
+    html = (
+        '<html><head><title>SAFER Web - Company Snapshot</title></head><body bgcolor="#FFFFFF">'
+        + body + '<p>' + ('SAFER Web disclaimer text. ' * 80) + '</p></body></html>'
+    )
+    return html.encode('windows-1252')
+
+
+def sample_safer_search(rng, carriers=200):
+    """SAFER keywordx.asp results: one link per carrier"""
+    rows = ''.join(
+        f'<tr><th scope="rpw"><b><a href="query.asp?searchtype=ANY&query_type=queryCarrierSnapshot'
+        f'&query_param=USDOT&query_string={3000000 + i}">{company_name(rng)}</a></b></th>'
+        f'<td>{rng.choice(CITIES)}, TX</td></tr>'
+        for i in range(carriers)
+    )
+    nav = ''.join(f'<a href="/nav{i}.aspx">Menu {i}</a> ' for i in range(60))
+    return (
+        '<html><head><title>SAFER Web - Search Results</title></head><body>'
+        f'<div>{nav}</div><table border="1">{rows}</table></body></html>'
+    ).encode('windows-1252')
+
+
+def sample_osha_results(rng, inspections=200):
+    """OSHA IMIS establishment search results table"""
+    rows = ''.join(
+        f'<tr><td><a href="establishment.inspection_detail?id={1700000 + i}&InspNr={1700000 + i}">'
+        f'{company_name(rng)}</a></td><td>{rng.choice(CITIES)}</td>'
+        f'<td>{rng.choice(["1521", "1623", "4213", "3441", "5812", "8011", "7349"])}</td>'
+        f'<td>{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/2025</td>'
+        f'<td>${rng.randint(0, 40000):,}</td></tr>'
+        for i in range(inspections)
+    )
+    header = '<tr><th>Establishment</th><th>City</th><th>SIC</th><th>Open Date</th><th>Penalty</th></tr>'
+    chrome = '<div class="nav">' + ''.join(f'<a href="/topics/{i}">Topic {i}</a>' for i in range(150)) + '</div>'
+    return (
+        '<html><head><meta charset="utf-8"><title>Establishment Search</title></head><body>'
+        f'{chrome}<form><table><tr><td>Search form</td></tr></table></form>'
+        f'<table class="table">{header}{rows}</table>'
+        f'<footer>{"OSHA footer text. " * 100}</footer></body></html>'
+    ).encode('utf-8')
+
+
+def sample_tx_results(rng, rows=150):
+    """TX SOS search results"""
+    body = ''.join(
+        f'<tr class="resultsRow"><td>{company_name(rng)}</td><td>{802000000 + i}</td>'
+        f'<td>01/{rng.randint(1, 28):02d}/2025</td><td>{rng.randint(100, 9999)} ELM ST, '
+        f'{rng.choice(CITIES)}, TX {rng.randint(75000, 79999)}</td></tr>'
+        for i in range(rows)
+    )
+    chrome = ''.join(f'<li><a href="/coa/help{i}.html">Help topic {i}</a></li>' for i in range(120))
+    return (
+        '<html><head><meta charset="utf-8"><title>Taxable Entity Search</title></head><body>'
+        f'<ul>{chrome}</ul><table id="results"><tr><th>Name</th><th>File #</th><th>Date</th>'
+        f'<th>Address</th></tr>{body}</table><div>{"Comptroller footer. " * 100}</div></body></html>'
+    ).encode('utf-8')
+
+
+def sample_ar_results(rng, rows=150):
+    """AR SOS search_all.php results with alternating row classes"""
+    body = ''.join(
+        f'<tr class="{"odd" if i % 2 else "even"}"><td><a href="corps/search_corps.php?DETAIL={i}">'
+        f'{company_name(rng)}</a></td><td>{810000000 + i}</td>'
+        f'<td>{rng.choice(["Good Standing", "Revoked"])}</td></tr>'
+        for i in range(rows)
+    )
+    chrome = ''.join(f'<li><a href="/business-commercial-services/{i}">Service {i}</a></li>' for i in range(120))
+    return (
+        '<html><head><meta charset="utf-8"></head><body>'
+        f'<nav><ul>{chrome}</ul></nav><table>{body}</table><div>{"SOS footer. " * 100}</div></body></html>'
+    ).encode('utf-8')
+
+
+def sample_opencorporates(rng, companies=100):
+    """OpenCorporates jurisdiction company listing"""
+    body = ''.join(
+        f'<li class="search-result company"><a class="jurisdiction_filter us" href="/companies/us_tx"></a>'
+        f'<a class="company_search_result" href="/companies/us_tx/{800000000 + i}">{company_name(rng)}</a>'
+        f' (Texas (US), {rng.randint(1, 28)} Jan 2025- )<span class="status label">active</span></li>'
+        for i in range(companies)
+    )
+    chrome = ''.join(f'<li><a href="/info/{i}">Info {i}</a></li>' for i in range(150))
+    return (
+        '<html><head><meta charset="utf-8"></head><body>'
+        f'<header><ul>{chrome}</ul></header><ul class="companies">{body}</ul>'
+        f'<footer>{"OpenCorporates footer. " * 120}</footer></body></html>'
+    ).encode('utf-8')
+
+
+COLLATERAL = ['2024 Freightliner Cascadia truck VIN 1FUJHHDR', 'One (1) Caterpillar 320 excavator S/N CAT0320',
+              'All inventory, accounts and general intangibles', 'Toyota 8FGCU25 forklift',
+              'All assets of the debtor now owned or hereafter acquired', 'Great Dane 53ft reefer trailer']
+
+
+def sample_ucc_results(rng, rows=200):
+    """UCC search results: file number, date, debtors, secured party, collateral"""
+    body = ''.join(
+        f'<tr><td>26-{rng.randint(1000000, 9999999)}</td><td>10/{rng.randint(1, 28):02d}/2026</td>'
+        f'<td>{company_name(rng)}; {rng.choice(WORDS)}, JOHN</td><td>{rng.choice(WORDS)} BANK N.A.</td>'
+        f'<td>{rng.choice(COLLATERAL)}</td></tr>'
+        for _ in range(rows)
+    )
+    chrome = ''.join(f'<li><a href="/ucc/help{i}.html">Help {i}</a></li>' for i in range(100))
+    return (
+        '<html><head><meta charset="utf-8"><title>UCC Search</title></head><body>'
+        f'<ul>{chrome}</ul><table><tr><th>File Number</th><th>Filed</th><th>Debtor</th><th>Secured Party</th>'
+        f'<th>Collateral</th></tr>{body}</table><div>{"SOS footer. " * 100}</div></body></html>'
+    ).encode('utf-8')
+
+
+def load_pages(directory, prefix, fallback):
+    """Recorded pages from --pages if present, synthetic ones otherwise"""
+    if directory:
+        paths = sorted(glob.glob(os.path.join(directory, f"{prefix}_*.html")))
+        if paths:
+            pages = []
+            for path in paths:
+                with open(path, 'rb') as f:
+                    pages.append(f.read())
+            return pages, 'recorded'
+    return fallback(), 'synthetic'
+
+
+def fake_response(content, url, content_type=None):
+    import requests
+    response = requests.Response()
+    response._content = content
+    response.status_code = 200
+    response.url = url
+    if content_type:
+        response.headers['Content-Type'] = content_type
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    return response
+
+
+def measure(fn, pages, repeat):
+    """Mean CPU ms and peak traced memory KiB per page"""
+    cpu = 0.0
+    for _ in range(repeat):
+        for page in pages:
+            start = time.process_time()
+            fn(page)
+            cpu += time.process_time() - start
+
+    peak = 0
+    for page in pages:
+        tracemalloc.start()
+        fn(page)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return cpu * 1000 / (repeat * len(pages)), peak / 1024
+
+
+# ============================================
+# BYTE-LEVEL PARSING
+# ============================================
+
+def bench_parse_bytes(args):
+    from bs4 import BeautifulSoup
+    import parsing
+
+    rng = random.Random(42)
+    sources = [
+        ('SAFER snapshot', 'https://safer.fmcsa.dot.gov/query.asp',
+         load_pages(args.pages, 'safer', lambda: [sample_safer_snapshot(rng, 3000000 + i) for i in range(10)])),
+        ('OSHA results', 'https://www.osha.gov/ords/imis/establishment.search',
+         load_pages(args.pages, 'osha', lambda: [sample_osha_results(rng) for _ in range(5)])),
+    ]
+
+    rows = []
+    for name, url, (pages, origin) in sources:
+        # No Content-Type at all: requests falls back to charset detection
+        def via_text(page):
+            return BeautifulSoup(fake_response(page, url).text, 'html.parser')
+
+        def via_bytes(page):
+            return parsing.make_soup(fake_response(page, url))
+
+        for label, fn in (('response.text', via_text), ('make_soup(bytes)', via_bytes)):
+            cpu_ms, peak_kib = measure(fn, pages, args.repeat)
+            rows.append({
+                'source': f"{name} ({origin})",
+                'path': label,
+                'pages': len(pages),
+                'avg KiB': f"{sum(map(len, pages)) / len(pages) / 1024:.0f}",
+                'cpu ms/page': f"{cpu_ms:.2f}",
+                'peak KiB/page': f"{peak_kib:.0f}",
+            })
+
+    report("Parse ingestion: pages served without a charset header", rows)
+
+
+# ============================================
+# LXML + SUBTREE PARSING
+# ============================================
+
+def bench_parse(args):
+    from bs4 import BeautifulSoup
+    import parsing
+    import fmcsa_real
+    import osha_real
+    import osha_scraper
+    from tx_sos_scraper import TexasSOSScraper
+    from ar_sos_scraper import ArkansasSOSScraper
+    import opencorporates_scraper
+
+    rng = random.Random(42)
+    osha_pages = load_pages(args.pages, 'osha', lambda: [sample_osha_results(rng) for _ in range(5)])
+
+    def osha_rows(soup):
+        table = soup.find('table', {'class': 'table'}) or soup.find('table')
+        return len(table.find_all('tr')[1:]) if table else 0
+
+    cases = [
+        ('osha_real', 'https://www.osha.gov/pls/imis/establishment.inspection_list',
+         osha_pages, osha_real.INSPECTION_TABLE.strainer, osha_rows),
+        ('OSHAScraper', 'https://www.osha.gov/ords/imis/establishment.search',
+         osha_pages, osha_scraper.RESULTS_TABLE.strainer, osha_rows),
+        ('fmcsa_real search', 'https://safer.fmcsa.dot.gov/keywordx.asp',
+         load_pages(args.pages, 'safersearch', lambda: [sample_safer_search(rng) for _ in range(5)]),
+         fmcsa_real.CARRIER_LINK_STRAINER,
+         lambda soup: len(soup.find_all('a', href=fmcsa_real.CARRIER_LINK_RE))),
+        ('TexasSOSScraper', 'https://mycpa.cpa.state.tx.us/coa/coaSearch.do',
+         load_pages(args.pages, 'txsos', lambda: [sample_tx_results(rng) for _ in range(5)]),
+         TexasSOSScraper.RESULTS_TABLE.strainer,
+         lambda soup: len(soup.find_all('tr', class_='resultsRow'))),
+        ('ArkansasSOSScraper', 'https://www.sos.arkansas.gov/corps/search_all.php',
+         load_pages(args.pages, 'arsos', lambda: [sample_ar_results(rng) for _ in range(5)]),
+         ArkansasSOSScraper.RESULTS_TABLE.strainer,
+         lambda soup: len(soup.find_all('tr', class_='odd') + soup.find_all('tr', class_='even'))),
+        ('opencorporates', 'https://opencorporates.com/companies/us_tx',
+         load_pages(args.pages, 'opencorp', lambda: [sample_opencorporates(rng) for _ in range(5)]),
+         opencorporates_scraper.COMPANY_STRAINER,
+         lambda soup: len(soup.find_all('a', class_='company_search_result'))),
+    ]
+
+    rows = []
+    for name, url, (pages, origin), strainer, extract in cases:
+        def baseline(page):
+            return extract(BeautifulSoup(fake_response(page, url).text, 'html.parser'))
+
+        def fast(page):
+            return extract(parsing.make_soup(fake_response(page, url), parse_only=strainer))
+
+        found = [(baseline(p), fast(p)) for p in pages]
+        base_ms, _ = measure(baseline, pages, args.repeat)
+        fast_ms, _ = measure(fast, pages, args.repeat)
+        rows.append({
+            'scraper': name,
+            'pages': f"{len(pages)} {origin}",
+            'items': f"{sum(b for b, _ in found)}/{sum(f for _, f in found)}",
+            'html.parser ms': f"{base_ms:.2f}",
+            f'{parsing.DEFAULT_PARSER}+strainer ms': f"{fast_ms:.2f}",
+            'speedup': f"{base_ms / fast_ms:.1f}x",
+        })
+
+    report("Parse per page: full html.parser tree vs targeted subtree (items: baseline/fast)", rows)
+
+
+# ============================================
+# DECLARATIVE TABLE EXTRACTION
+# ============================================
+
+def legacy_table_rows(soup, row_finder, min_cells, columns):
+    """The hand-written loop: find rows, index cells, get_text(strip=True) each"""
+    records = []
+    for row in row_finder(soup):
+        cols = row.find_all('td')
+        if len(cols) >= min_cells:
+            records.append([cols[i].get_text(strip=True) for i in columns])
+    return records
+
+
+def bench_tables(args):
+    import parsing
+    import osha_scraper
+    from tx_sos_scraper import TexasSOSScraper
+    from ar_sos_scraper import ArkansasSOSScraper
+
+    rng = random.Random(42)
+
+    def osha_rows(soup):
+        table = soup.find('table', {'class': 'table'}) or soup.find('table')
+        return table.find_all('tr')[1:] if table else []
+
+    cases = [
+        ('OSHAScraper', 'https://www.osha.gov/ords/imis/establishment.search',
+         load_pages(args.pages, 'osha', lambda: [sample_osha_results(rng) for _ in range(5)]),
+         osha_scraper.RESULTS_TABLE, osha_rows, 5, [0, 1, 2, 4]),
+        ('TexasSOSScraper', 'https://mycpa.cpa.state.tx.us/coa/coaSearch.do',
+         load_pages(args.pages, 'txsos', lambda: [sample_tx_results(rng) for _ in range(5)]),
+         TexasSOSScraper.RESULTS_TABLE, lambda soup: soup.find_all('tr', class_='resultsRow'), 4, [0, 1, 2, 3]),
+        ('ArkansasSOSScraper', 'https://www.sos.arkansas.gov/corps/search_all.php',
+         load_pages(args.pages, 'arsos', lambda: [sample_ar_results(rng) for _ in range(5)]),
+         ArkansasSOSScraper.RESULTS_TABLE,
+         lambda soup: soup.find_all('tr', class_='odd') + soup.find_all('tr', class_='even'), 3, [0, 1, 2]),
+    ]
+
+    rows = []
+    for name, url, (pages, origin), spec, row_finder, min_cells, columns in cases:
+        # Same rows on both sides: the legacy loops here don't apply the per-keyword cap
+        spec = copy.copy(spec)
+        spec.limit = None
+
+        def legacy(page):
+            soup = parsing.make_soup(fake_response(page, url), parse_only=spec.strainer)
+            return len(legacy_table_rows(soup, row_finder, min_cells, columns))
+
+        def compiled(page):
+            return len(spec.extract(fake_response(page, url)))
+
+        legacy_ms, _ = measure(legacy, pages, args.repeat)
+        spec_ms, _ = measure(compiled, pages, args.repeat)
+        rows.append({
+            'scraper': name,
+            'pages': f"{len(pages)} {origin}",
+            'rows': f"{sum(legacy(p) for p in pages)}/{sum(compiled(p) for p in pages)}",
+            'per-cell soup ms': f"{legacy_ms:.2f}",
+            'TableSpec ms': f"{spec_ms:.2f}",
+            'speedup': f"{legacy_ms / spec_ms:.1f}x",
+        })
+
+    report("Table extraction per page (rows: legacy/spec)", rows)
+
+
+# ============================================
+# SAFER SNAPSHOT EXTRACTION
+# ============================================
+
+def legacy_carrier_details(page):
+    """get_carrier_details() parsing as it was before safer_snapshot"""
+    import re
+    from bs4 import BeautifulSoup
+
+    details = {}
+    soup = BeautifulSoup(page, 'html.parser')
+    for table in soup.find_all('table'):
+        text = table.get_text()
+        phone_match = re.search(r'Phone:\s*\(?(\d{3})\)?[-.\s]?(\d{3})[-.\s]?(\d{4})', text)
+        if phone_match:
+            details['phone'] = f"({phone_match.group(1)}) {phone_match.group(2)}-{phone_match.group(3)}"
+        addr_match = re.search(r'Physical Address:\s*([^,]+),\s*([A-Z]{2})\s*(\d{5})', text)
+        if addr_match:
+            details['city'] = addr_match.group(1).strip()
+            details['zip'] = addr_match.group(3)
+        drivers_match = re.search(r'Drivers:\s*(\d+)', text)
+        if drivers_match:
+            details['drivers'] = int(drivers_match.group(1))
+        mc_match = re.search(r'MC/MX/FF Number\(s\):\s*MC-(\d+)', text)
+        if mc_match:
+            details['mc_number'] = f"MC-{mc_match.group(1)}"
+    return details
+
+
+def bench_snapshot(args):
+    from safer_snapshot import extract_snapshot
+
+    rng = random.Random(42)
+    pages, origin = load_pages(args.pages, 'safer',
+                               lambda: [sample_safer_snapshot(rng, 3000000 + i) for i in range(20)])
+    texts = [page.decode('windows-1252', errors='replace') for page in pages]
+
+    agree = 0
+    for text in texts:
+        old = legacy_carrier_details(text)
+        new = extract_snapshot(text)
+        if (old.get('phone'), old.get('zip'), old.get('drivers'), old.get('mc_number')) == \
+                (new.phone or None, new.zip or None, new.drivers or None, new.mc_number or None):
+            agree += 1
+
+    legacy_ms, _ = measure(legacy_carrier_details, texts, args.repeat)
+    fast_ms, _ = measure(extract_snapshot, texts, args.repeat)
+    report(f"SAFER snapshot extraction: {len(texts)} {origin} pages, "
+           f"{agree}/{len(texts)} agree on phone/zip/drivers/MC", [
+               {'extractor': 'table loop + get_text()', 'ms/page': f"{legacy_ms:.3f}", 'speedup': '1.0x'},
+               {'extractor': 'extract_snapshot()', 'ms/page': f"{fast_ms:.3f}",
+                'speedup': f"{legacy_ms / fast_ms:.1f}x"},
+           ])
+
+
+# ============================================
+# INDUSTRY CLASSIFICATION
+# ============================================
+
+# The TX SOS table and loop the scrapers used before industry_classifier
+LEGACY_INDUSTRY_KEYWORDS = {
+    'Construction': ['construction', 'builder', 'roofing', 'concrete', 'framing', 'drywall', 'excavation', 'grading', 'paving'],
+    'Trucking': ['trucking', 'freight', 'transport', 'hauling', 'logistics', 'carrier', 'moving'],
+    'Oilfield': ['oilfield', 'drilling', 'petroleum', 'energy', 'wellhead', 'pipeline', 'frac'],
+    'Electrical': ['electric', 'electrical', 'wiring', 'power'],
+    'Plumbing': ['plumbing', 'plumber', 'hvac', 'heating', 'cooling', 'air conditioning'],
+    'Restaurant': ['restaurant', 'cafe', 'grill', 'kitchen', 'food', 'catering', 'bar', 'tavern'],
+    'Medical': ['medical', 'health', 'clinic', 'dental', 'therapy', 'chiropractic', 'physician'],
+    'Landscaping': ['landscaping', 'lawn', 'garden', 'tree service', 'irrigation'],
+    'Manufacturing': ['manufacturing', 'fabrication', 'machine', 'welding', 'metal'],
+    'Cleaning': ['cleaning', 'janitorial', 'maid', 'sanitation'],
+    'Auto Services': ['auto', 'automotive', 'mechanic', 'body shop', 'tire', 'collision'],
+    'Staffing': ['staffing', 'employment', 'recruiting', 'temp', 'personnel'],
+    'Warehouse': ['warehouse', 'storage', 'distribution', 'fulfillment'],
+    'Retail': ['retail', 'store', 'shop', 'boutique', 'sales'],
+    'Wholesale': ['wholesale', 'distributor', 'supply'],
+    'Real Estate': ['real estate', 'realty', 'property', 'investment'],
+    'Technology': ['technology', 'software', 'tech', 'digital', 'it services', 'computer'],
+    'Consulting': ['consulting', 'consultant', 'advisory', 'management'],
+}
+
+
+def legacy_classify(company_name):
+    name_lower = company_name.lower()
+    for industry, keywords in LEGACY_INDUSTRY_KEYWORDS.items():
+        for keyword in keywords:
+            if keyword in name_lower:
+                return industry
+    return 'Other'
+
+
+def synthetic_names(count, unique, seed=42):
+    """count names drawn from a pool of unique ones, like a month of daily leads"""
+    rng = random.Random(seed)
+    extra = ['HOLDINGS', 'GROUP', 'SERVICES', 'ENTERPRISES', 'PARTNERS', 'SOLUTIONS', 'OF TEXAS', '& SONS']
+    pool = [
+        f"{rng.choice(WORDS)} {rng.randint(1, 999)} {rng.choice(TRADES + extra)} "
+        f"{rng.choice(extra)} {rng.choice(SUFFIXES)}"
+        for _ in range(unique)
+    ]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def bench_classify(args):
+    from industry_classifier import KeywordClassifier, TAXONOMY
+
+    names = synthetic_names(args.names, args.unique)
+    rows = []
+
+    def timed(label, fn, stats=''):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        rows.append({
+            'classifier': label,
+            'names': len(names),
+            'seconds': f"{elapsed:.2f}",
+            'names/s': f"{len(names) / elapsed:,.0f}",
+            'cache': stats() if stats else '-',
+        })
+        return result
+
+    timed('nested substring loops', lambda: [legacy_classify(n) for n in names])
+
+    start = time.perf_counter()
+    classifier = KeywordClassifier(TAXONOMY)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    timed('automaton, uncached', lambda: [classifier._classify(n) for n in names])
+    timed('automaton, classify_batch', lambda: classifier.classify_batch(names),
+          lambda: f"{classifier.cache_stats()['hit_rate']:.1%} hits")
+
+    report(f"Industry classification: {len(names):,} names ({args.unique:,} distinct), "
+           f"automaton compiled in {compile_ms:.1f}ms with {len(classifier.goto)} states", rows)
+
+
+# ============================================
+# Company name normalization
+# ============================================
+
+SUFFIX_VARIANTS = ['LLC', 'L.L.C.', ', LLC', 'Inc.', ', INC', 'Inc', 'CO', 'Co., Inc.', 'Corp.', '']
+
+
+def name_variants(names, spellings=3, seed=7):
+    """Each distinct name gets a few spellings (case, suffix, spacing), like it would across sources"""
+    rng = random.Random(seed)
+    spelled = {}
+    variants = []
+    for name in names:
+        if name not in spelled:
+            base = name.rsplit(' ', 1)[0]
+            spelled[name] = [
+                f"{rng.choice([base, base.title(), base.replace(' ', '  ')])} {rng.choice(SUFFIX_VARIANTS)}".replace(' ,', ',')
+                for _ in range(spellings)
+            ]
+        variants.append(rng.choice(spelled[name]))
+    return variants
+
+
+def bench_normalize(args):
+    from name_normalizer import NameNormalizer
+
+    names = name_variants(synthetic_names(args.names, args.unique))
+    normalizer = NameNormalizer()
+    rows = []
+
+    for label in ('cold cache', 'warm cache'):
+        start = time.perf_counter()
+        keys = normalizer.keys(names)
+        elapsed = time.perf_counter() - start
+        stats = normalizer.stats()
+        rows.append({
+            'pass': label,
+            'names': len(names),
+            'seconds': f"{elapsed:.2f}",
+            'names/s': f"{len(names) / elapsed:,.0f}",
+            'hit rate': f"{stats['hit_rate']:.1%}",
+        })
+
+    raw = len(set(n.upper() for n in names))
+    report(f"Name normalization: {len(names):,} names, {raw:,} distinct uppercased "
+           f"-> {len(set(keys)):,} canonical keys", rows)
+
+
+# ============================================
+# Phone and address normalization
+# ============================================
+
+PHONE_FORMATS = [
+    '({a}) {e}-{l}', '{a}-{e}-{l}', '{a}.{e}.{l}', '{a}{e}{l}', '1{a}{e}{l}',
+    '+1 {a} {e} {l}', '({a}) {e}-{l} x{x}', '{a}-{e}-{l} ext. {x}', '{e}-{l}', '',
+]
+ADDRESS_FORMATS = [
+    '{n} {street}, {city}, {state} {zip}', '{n} {street} | {city}, {state} {zip}-{plus4}',
+    '{n} {street}, {city} {state} {zip}', 'PO BOX {n}, {city}, {state} {zip}', '{city} {state} {zip}', '',
+]
+
+
+def synthetic_contacts(count, seed=42):
+    rng = random.Random(seed)
+    streets = ['MAIN ST', 'ELM ST', 'OAK AVE', 'INDUSTRIAL BLVD', 'HWY 290', 'FM 1960 RD']
+    phones, addresses = [], []
+    for _ in range(count):
+        phones.append(rng.choice(PHONE_FORMATS).format(
+            a=rng.randint(200, 999), e=rng.randint(200, 999), l=f"{rng.randint(0, 9999):04d}", x=rng.randint(1, 999)))
+        addresses.append(rng.choice(ADDRESS_FORMATS).format(
+            n=rng.randint(1, 99999), street=rng.choice(streets), city=rng.choice(CITIES),
+            state=rng.choice(['TX', 'AR', 'GA', 'OK', 'LA']), zip=f"{rng.randint(1000, 99999):05d}",
+            plus4=f"{rng.randint(0, 9999):04d}"))
+    return phones, addresses
+
+
+def bench_contacts(args):
+    import contact_normalizer as cn
+
+    phones, addresses = synthetic_contacts(args.records)
+    rows = []
+    outputs = {}
+
+    cases = [('per-record re', cn._phones_python, cn._addresses_python)]
+    if cn.HAVE_ARROW:
+        cases.append(('pyarrow kernels', cn._phones_arrow, cn._addresses_arrow))
+
+    for label, phone_fn, address_fn in cases:
+        start = time.perf_counter()
+        out_phones = phone_fn(phones)
+        phone_s = time.perf_counter() - start
+        start = time.perf_counter()
+        out_addresses = address_fn(addresses)
+        address_s = time.perf_counter() - start
+        outputs[label] = (out_phones, out_addresses)
+        rows.append({
+            'normalizer': label,
+            'records': len(phones),
+            'phones/s': f"{len(phones) / phone_s:,.0f}",
+            'addresses/s': f"{len(addresses) / address_s:,.0f}",
+            'total s': f"{phone_s + address_s:.2f}",
+        })
+
+    base_phones, base_addresses = outputs['per-record re']
+    valid = sum(1 for p in base_phones if p)
+    parsed = sum(1 for z in base_addresses['zip'] if z)
+    agree = all(out == (base_phones, base_addresses) for out in outputs.values())
+    report(f"Contact normalization: {valid:,} E.164 phones, {parsed:,} addresses with a ZIP; "
+           f"outputs {'identical' if agree else 'DIFFER'}"
+           + ('' if cn.HAVE_ARROW else ' (pyarrow not installed)'), rows)
+
+
+# ============================================
+# Process-pool parsing
+# ============================================
+
+def bench_parse_pool(args):
+    from parse_pool import ParsePool, Page
+    from osha_scraper import parse_results
+
+    rng = random.Random(42)
+    pages, kind = load_pages(args.pages, 'osha', lambda: [sample_osha_results(rng) for _ in range(8)])
+    pages = [Page(content, 'https://www.osha.gov/ords/imis/establishment.search')
+             for content in (pages * (args.count // len(pages) + 1))[:args.count]]
+    rows = []
+
+    for workers in sorted({0, args.workers}):
+        pool = ParsePool(workers)
+        pool.submit(parse_results, pages[0], 'TX').result()  # start workers before timing
+        pool.reset_stats()
+
+        start = time.perf_counter()
+        leads = sum(len(r) for r in pool.map(parse_results, pages, 'TX'))
+        elapsed = time.perf_counter() - start
+        stats = pool.stats()
+        pool.shutdown()
+
+        rows.append({
+            'workers': workers or 'inline',
+            'pages': len(pages),
+            'leads': leads,
+            'seconds': f"{elapsed:.2f}",
+            'pages/s': f"{len(pages) / elapsed:,.0f}",
+            'avg parse ms': f"{stats['avg_parse_ms']:.1f}",
+            'CPU util': f"{stats['cpu_utilization']:.0%}",
+        })
+
+    report(f"OSHA results parsing, {kind} pages, {os.cpu_count()} CPUs", rows)
+
+
+# ============================================
+# UCC filing extraction
+# ============================================
+
+def bench_ucc(args):
+    from parse_pool import ParsePool, Page
+    import ucc_scraper
+
+    rng = random.Random(42)
+    pages, kind = load_pages(args.pages, 'ucc', lambda: [sample_ucc_results(rng) for _ in range(8)])
+    pages = [Page(content, 'https://direct.sos.state.tx.us/UCC/UCC-FS.asp')
+             for content in (pages * (args.count // len(pages) + 1))[:args.count]]
+
+    def per_row():
+        # Same lead building, one filing at a time as a scraper loop would
+        leads = 0
+        for page in pages:
+            for row in ucc_scraper.parse_ucc_page(page):
+                leads += len(ucc_scraper.filing_leads('TX', [row]))
+        return leads
+
+    def batched(pool):
+        leads = 0
+        for i in range(0, len(pages), ucc_scraper.BATCH_PAGES):
+            rows = [r for page_rows in pool.map(ucc_scraper.parse_ucc_page, pages[i:i + ucc_scraper.BATCH_PAGES])
+                    for r in page_rows]
+            leads += len(ucc_scraper.filing_leads('TX', rows))
+        return leads
+
+    filings = sum(len(ucc_scraper.parse_ucc_page(page)) for page in pages)
+    rows = []
+    for label, run in [('per row, inline', per_row)] + [
+            (f"batched, {'inline' if not w else f'{w} workers'}", w) for w in sorted({0, args.workers})]:
+        pool = None
+        if not callable(run):
+            pool = ParsePool(run)
+            pool.submit(ucc_scraper.parse_ucc_page, pages[0]).result()  # start workers before timing
+            fn = lambda: batched(pool)
+        else:
+            fn = run
+        start = time.perf_counter()
+        leads = fn()
+        elapsed = time.perf_counter() - start
+        if pool:
+            pool.shutdown()
+        rows.append({
+            'mode': label,
+            'pages': len(pages),
+            'filings': filings,
+            'leads': leads,
+            'seconds': f"{elapsed:.2f}",
+            'filings/s': f"{filings / elapsed:,.0f}",
+        })
+
+    report(f"UCC filing extraction and classification, {kind} pages, {os.cpu_count()} CPUs", rows)
+
+
+# ============================================
+# HTTP/2 vs pooled HTTP/1.1
+# ============================================
+
+def _self_signed_cert(directory):
+    cert = os.path.join(directory, 'cert.pem')
+    key = os.path.join(directory, 'key.pem')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+         '-subj', '/CN=localhost', '-keyout', key, '-out', cert],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
+
+def _start_local_server(latency, body_size):
+    """Serve a SAFER-sized page over TLS with both h2 and http/1.1 via ALPN"""
+    from hypercorn.config import Config
+    from hypercorn.asyncio import serve
+
+    body = b'<html><body><table>' + b'x' * body_size + b'</table></body></html>'
+    clients = set()
+
+    async def app(scope, receive, send):
+        if scope['type'] != 'http':
+            return
+        clients.add(scope.get('client'))
+        await asyncio.sleep(latency)
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [(b'content-type', b'text/html; charset=utf-8')]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    # Reserve an ephemeral port for the server to bind
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+
+    config = Config()
+    config.bind = [f'127.0.0.1:{port}']
+    config.certfile, config.keyfile = _self_signed_cert(tempfile.mkdtemp())
+    config.alpn_protocols = ['h2', 'http/1.1']
+    config.loglevel = 'ERROR'
+
+    loop = asyncio.new_event_loop()
+    shutdown = asyncio.Event()
+    thread = threading.Thread(
+        target=lambda: loop.run_until_complete(serve(app, config, shutdown_trigger=shutdown.wait)),
+        daemon=True,
+    )
+    thread.start()
+    time.sleep(0.5)
+
+    def stop():
+        loop.call_soon_threadsafe(shutdown.set)
+        thread.join(timeout=5)
+
+    return f"https://127.0.0.1:{port}/", clients, stop
+
+
+def bench_http2(args):
+    try:
+        import hypercorn  # noqa: F401
+    except ImportError:
+        print("hypercorn is required for the local HTTP/2 server: pip install hypercorn")
+        return
+
+    import urllib3
+    import http_client
+
+    urllib3.disable_warnings()
+    rows = []
+
+    for label, use_http2 in (('http/1.1 pooled', False), ('http/2', True)):
+        url, clients, stop = _start_local_server(args.latency_ms / 1000, args.body_size)
+        session = http_client.new_session(http2=use_http2, verify=False)
+
+        def fetch(i):
+            return session.get(f"{url}query.asp?query_string={i}", verify=False, timeout=30).status_code
+
+        # Warm up so connection setup is measured separately from the burst
+        fetch(0)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            statuses = list(pool.map(fetch, range(args.requests)))
+        elapsed = time.perf_counter() - start
+
+        adapter = session.get_adapter(url)
+        protocol = 'HTTP/1.1'
+        if isinstance(adapter, http_client.HTTP2Adapter):
+            protocol = 'HTTP/2' if adapter.stats['http2'] else 'HTTP/1.1 (fallback)'
+
+        rows.append({
+            'transport': label,
+            'negotiated': protocol,
+            'requests': len(statuses),
+            'ok': sum(1 for s in statuses if s == 200),
+            'connections': len(clients),
+            'seconds': f"{elapsed:.2f}",
+            'req/s': f"{len(statuses) / elapsed:.0f}",
+        })
+        session.close()
+        stop()
+
+    report(f"HTTP transport: {args.requests} requests, concurrency {args.concurrency}, "
+           f"{args.latency_ms}ms server latency", rows)
+
+
+# ============================================
+# MAIN
+# ============================================
+
+def main():
+    parser = argparse.ArgumentParser(description='LeadFlow Benchmarks')
+    sub = parser.add_subparsers(dest='bench', required=True)
+
+    p = sub.add_parser('http2', help='HTTP/2 multiplexing vs pooled HTTP/1.1 on a local server')
+    p.add_argument('--requests', type=int, default=500)
+    p.add_argument('--concurrency', type=int, default=32)
+    p.add_argument('--latency-ms', type=int, default=20)
+    p.add_argument('--body-size', type=int, default=4000)
+    p.set_defaults(func=bench_http2)
+
+    p = sub.add_parser('parse-bytes', help='response.text vs raw-bytes parsing, CPU and peak memory')
+    p.add_argument('--pages', type=str, help='Directory of recorded safer_*.html / osha_*.html pages')
+    p.add_argument('--repeat', type=int, default=10)
+    p.set_defaults(func=bench_parse_bytes)
+
+    p = sub.add_parser('parse', help='html.parser full tree vs lxml with a strainer, per scraper')
+    p.add_argument('--pages', type=str, help='Directory of recorded pages')
+    p.add_argument('--repeat', type=int, default=10)
+    p.set_defaults(func=bench_parse)
+
+    p = sub.add_parser('tables', help='Hand-written per-cell loops vs compiled TableSpec extraction')
+    p.add_argument('--pages', type=str, help='Directory of recorded osha_/txsos_/arsos_*.html pages')
+    p.add_argument('--repeat', type=int, default=20)
+    p.set_defaults(func=bench_tables)
+
+    p = sub.add_parser('snapshot', help='SAFER snapshot extraction: legacy table loop vs single pass')
+    p.add_argument('--pages', type=str, help='Directory of recorded safer_*.html pages')
+    p.add_argument('--repeat', type=int, default=20)
+    p.set_defaults(func=bench_snapshot)
+
+    p = sub.add_parser('classify', help='Industry classification throughput on synthetic company names')
+    p.add_argument('--names', type=int, default=1_000_000)
+    p.add_argument('--unique', type=int, default=200_000)
+    p.set_defaults(func=bench_classify)
+
+    p = sub.add_parser('parse-pool', help='OSHA page parsing inline vs in a process pool')
+    p.add_argument('--pages', type=str, help='Directory of recorded osha_*.html pages')
+    p.add_argument('--count', type=int, default=200)
+    p.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    p.set_defaults(func=bench_parse_pool)
+
+    p = sub.add_parser('ucc', help='UCC filings: per-row extraction vs batched parse and classification')
+    p.add_argument('--pages', type=str, help='Directory of recorded ucc_*.html pages')
+    p.add_argument('--count', type=int, default=200)
+    p.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    p.set_defaults(func=bench_ucc)
+
+    p = sub.add_parser('contacts', help='Phone E.164 and address splitting: per-record loop vs whole columns')
+    p.add_argument('--records', type=int, default=1_000_000)
+    p.set_defaults(func=bench_contacts)
+
+    p = sub.add_parser('normalize', help='Company name canonical keys: throughput and cache hit rate')
+    p.add_argument('--names', type=int, default=1_000_000)
+    p.add_argument('--unique', type=int, default=50_000)
+    p.set_defaults(func=bench_normalize)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+Batch phone and address normalization
+
+Every source formats contact data its own way: SAFER gives "(512) 555-0142",
+Socrata's contractor_phone might be "512.555.0142 x12", FMCSA's telephone is
+bare digits, and addresses arrive as one free-text line. Leads are
+normalized here before writes so the same business looks the same no
+matter where it came from:
+
+- phone: E.164 ("+15125550142"), or '' when it isn't a valid US number
+- address: split into street / city / state / zip
+
+With pyarrow installed, each pattern runs as one compute kernel over the
+whole column (RE2 in C++, no per-record Python). Without it the same
+precompiled patterns are applied record by record.
+"""
+import re
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    HAVE_ARROW = True
+except ImportError:
+    HAVE_ARROW = False
+
+# Patterns are written to be valid for both Python re and RE2
+
+# Trailing extension: "x12", "ext. 12", "extension 12", "#12"
+EXTENSION_PATTERN = r'(?i)\s*(?:x|ext\.?|extension|#)\s*\d{1,6}\s*$'
+NON_DIGIT_PATTERN = r'\D+'
+# NANP: area code and exchange can't start with 0 or 1
+NANP_PATTERN = r'^1?(?P<national>[2-9]\d{2}[2-9]\d{6})$'
+
+# "123 MAIN ST, DALLAS, TX 75001" / "123 Main St | Dallas, TX 75001-1234"
+ADDRESS_PATTERN = (
+    r'^\s*(?P<street>[^,|]*?\d[^,|]*?)\s*[,|]\s*'
+    r'(?P<city>[A-Za-z][A-Za-z .\'-]*?)\s*,?\s+'
+    r'(?P<state>[A-Za-z]{2})\.?\s+'
+    r'(?P<zip>\d{5})(?:-?\d{4})?\s*$'
+)
+# Fallback when the street/city split is unclear: still take state and ZIP
+STATE_ZIP_PATTERN = r'(?:^|[^A-Za-z])(?P<state>[A-Za-z]{2})\.?\s+(?P<zip>\d{5})(?:-?\d{4})?\s*$'
+
+EXTENSION_RE = re.compile(EXTENSION_PATTERN)
+NON_DIGIT_RE = re.compile(NON_DIGIT_PATTERN)
+NANP_RE = re.compile(NANP_PATTERN)
+ADDRESS_RE = re.compile(ADDRESS_PATTERN)
+STATE_ZIP_RE = re.compile(STATE_ZIP_PATTERN)
+SPACE_RE = re.compile(r'\s+')
+
+ADDRESS_FIELDS = ('street', 'city', 'state', 'zip')
+
+
+def _as_strings(values) -> list:
+    return [v if isinstance(v, str) else ('' if v is None else str(v)) for v in values]
+
+
+def _phones_arrow(phones):
+    column = pa.array(phones, type=pa.string())
+    digits = pc.replace_substring_regex(column, EXTENSION_PATTERN, '')
+    digits = pc.replace_substring_regex(digits, NON_DIGIT_PATTERN, '')
+    national = pc.struct_field(pc.extract_regex(digits, NANP_PATTERN), [0])
+    e164 = pc.binary_join_element_wise('+1', national, '')
+    return pc.fill_null(e164, '').to_pylist()
+
+
+def _phones_python(phones):
+    result = []
+    for phone in phones:
+        match = NANP_RE.match(NON_DIGIT_RE.sub('', EXTENSION_RE.sub('', phone)))
+        result.append('+1' + match.group(1) if match else '')
+    return result
+
+
+def normalize_phones(phones) -> list:
+    """E.164 for each phone; '' where it isn't a US number"""
+    phones = _as_strings(phones)
+    return _phones_arrow(phones) if HAVE_ARROW else _phones_python(phones)
+
+
+def _addresses_arrow(addresses):
+    column = pa.array(addresses, type=pa.string())
+    full = pc.extract_regex(column, ADDRESS_PATTERN)
+    tail = pc.extract_regex(column, STATE_ZIP_PATTERN)
+
+    def field(parts, name):
+        # extract_regex is null for the whole struct where the pattern missed
+        return pc.struct_field(parts, [parts.type.get_field_index(name)])
+
+    street = pc.fill_null(field(full, 'street'), '')
+    city = pc.fill_null(field(full, 'city'), '')
+    state = pc.fill_null(pc.coalesce(field(full, 'state'), field(tail, 'state')), '')
+    zip_code = pc.fill_null(pc.coalesce(field(full, 'zip'), field(tail, 'zip')), '')
+
+    return {
+        'street': pc.replace_substring_regex(pc.utf8_upper(street), r'\s+', ' ').to_pylist(),
+        'city': pc.utf8_title(city).to_pylist(),
+        'state': pc.utf8_upper(state).to_pylist(),
+        'zip': zip_code.to_pylist(),
+    }
+
+
+def _addresses_python(addresses):
+    columns = {name: [] for name in ADDRESS_FIELDS}
+    for address in addresses:
+        match = ADDRESS_RE.match(address)
+        if match:
+            street, city, state, zip_code = match.group('street', 'city', 'state', 'zip')
+        else:
+            street = city = ''
+            tail = STATE_ZIP_RE.search(address)
+            state, zip_code = tail.group('state', 'zip') if tail else ('', '')
+        columns['street'].append(SPACE_RE.sub(' ', street.upper()))
+        columns['city'].append(city.title())
+        columns['state'].append(state.upper())
+        columns['zip'].append(zip_code)
+    return columns
+
+
+def split_addresses(addresses) -> dict:
+    """{'street': [...], 'city': [...], 'state': [...], 'zip': [...]} for one-line addresses"""
+    addresses = _as_strings(addresses)
+    return _addresses_arrow(addresses) if HAVE_ARROW else _addresses_python(addresses)
+
+
+def _address_of(lead: dict) -> str:
+    raw = lead.get('raw_data')
+    raw = raw if isinstance(raw, dict) else {}
+    return lead.get('address') or raw.get('address') or raw.get('physical_address') or ''
+
+
+def normalize_leads(leads: list) -> list:
+    """
+    Normalization stage run before writes. Phones become E.164 (numbers
+    that don't parse are left as they were). Address parts fill city /
+    state / zip where the scraper left them empty, and the parsed street
+    goes to raw_data['street']. Values a scraper already set are kept.
+    """
+    if not leads:
+        return leads
+
+    phones = normalize_phones([lead.get('phone', '') for lead in leads])
+    parts = split_addresses([_address_of(lead) for lead in leads])
+
+    for lead, phone, street, city, state, zip_code in zip(
+        leads, phones, parts['street'], parts['city'], parts['state'], parts['zip']
+    ):
+        if phone:
+            lead['phone'] = phone
+        if not zip_code:
+            continue
+        if state and lead.get('state') and lead['state'] != state:
+            # Address is in another state than the one searched; leave it alone
+            continue
+        if city and (not lead.get('city') or lead['city'] == 'Unknown'):
+            lead['city'] = city
+        if not lead.get('state'):
+            lead['state'] = state
+        if not lead.get('zip'):
+            lead['zip'] = zip_code
+        if street and isinstance(lead.get('raw_data'), dict):
+            lead['raw_data'].setdefault('street', street)
+
+    return leads
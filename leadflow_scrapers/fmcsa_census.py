@@ -0,0 +1,220 @@
+"""
+FMCSA carrier census bulk ingest
+
+SAFER search is capped at one keyword page and a few dozen snapshots per
+state per run. FMCSA publishes the whole carrier census as a download
+(Company Census File on data.transportation.gov, CSV or zipped CSV). This
+reads that file in chunks with pandas, keeping only the columns leads
+need, filters each chunk by state and MCS-150 date window with column
+operations, and builds the same leads FMCSAScraper does (same source_id,
+so API and census results dedupe against each other).
+
+    python fmcsa_census.py FMCSA_CENSUS1_2026Oct.zip --states TX,AR --days 90
+
+The file path can also be set with LEADFLOW_FMCSA_CENSUS.
+"""
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timedelta
+import pandas as pd
+from fmcsa_scraper import FMCSAScraper
+import name_normalizer
+
+CENSUS_PATH = os.getenv(
+    'LEADFLOW_FMCSA_CENSUS',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'fmcsa_census.csv'),
+)
+
+CHUNK_ROWS = 200_000
+
+# Accepted header names for each field, checked in order (case-insensitive).
+# Census releases differ: the legacy flat file uses NBR_POWER_UNIT /
+# DRIVER_TOTAL, the Socrata export power_units / total_drivers.
+COLUMN_ALIASES = {
+    'dot_number': ['dot_number', 'dot'],
+    'legal_name': ['legal_name'],
+    'dba_name': ['dba_name'],
+    'city': ['phy_city'],
+    'state': ['phy_state'],
+    'zip': ['phy_zip'],
+    'phone': ['telephone', 'phone'],
+    'mcs150_date': ['mcs150_date', 'mcs150_form_date'],
+    'power_units': ['nbr_power_unit', 'power_units', 'total_power_units'],
+    'drivers': ['driver_total', 'total_drivers', 'drivers'],
+    'mc_number': ['mc_number', 'docket1'],
+    'mc_prefix': ['docket1prefix', 'docket1_prefix'],
+    'carrier_operation': ['carrier_operation'],
+    'cargo_carried': ['cargo_carried'],
+}
+
+REQUIRED = ('dot_number', 'legal_name', 'state', 'mcs150_date')
+
+DAYS_BACK = 90
+
+
+def resolve_columns(header) -> dict:
+    """field -> actual header name, for the fields this file has"""
+    lowered = {h.strip().lower(): h for h in header}
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        name = next((lowered[a] for a in aliases if a in lowered), None)
+        if name:
+            columns[field] = name
+    missing = [f for f in REQUIRED if f not in columns]
+    if missing:
+        raise ValueError(f"Census file has no {', '.join(missing)} column")
+    return columns
+
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """MCS-150 dates: 20240115 (optionally with a time), 2024-01-15, 15-JAN-24, 01/15/2024"""
+    values = values.str.strip()
+    compact = values.str.extract(r'^(\d{8})', expand=False)
+    dates = pd.to_datetime(compact, format='%Y%m%d', errors='coerce')
+    rest = dates.isna() & values.notna() & (values != '')
+    if rest.any():
+        dates[rest] = pd.to_datetime(values[rest], format='mixed', errors='coerce')
+    return dates
+
+
+def _read_header(path):
+    return pd.read_csv(path, nrows=0, encoding='latin-1').columns
+
+
+def iter_chunks(path: str, states, since: datetime, chunk_rows: int = CHUNK_ROWS):
+    """
+    Yield (rows_read, DataFrame of matching carriers) per chunk. Columns
+    are renamed to the COLUMN_ALIASES field names.
+    """
+    columns = resolve_columns(_read_header(path))
+    rename = {name: field for field, name in columns.items()}
+    states = {s.upper() for s in states} if states else None
+
+    reader = pd.read_csv(
+        path, usecols=list(columns.values()), dtype=str, keep_default_na=False,
+        chunksize=chunk_rows, encoding='latin-1',
+    )
+    for chunk in reader:
+        rows = len(chunk)
+        chunk = chunk.rename(columns=rename)
+        if states:
+            chunk = chunk[chunk['state'].str.strip().str.upper().isin(states)]
+        if chunk.empty:
+            yield rows, chunk
+            continue
+        dates = parse_dates(chunk['mcs150_date'])
+        keep = dates >= since
+        chunk = chunk[keep].assign(mcs150_date=dates[keep].dt.strftime('%Y-%m-%d'))
+        yield rows, chunk
+
+
+def _count(value) -> int:
+    try:
+        return int(float(value or 0))
+    except ValueError:
+        return 0
+
+
+def chunk_leads(chunk: pd.DataFrame) -> list:
+    """
+    Leads for a filtered chunk, shaped like FMCSAScraper.scrape() output and
+    scored, since daily_scraper.push_leads writes them as they are
+    """
+    leads = []
+    for carrier in chunk.to_dict('records'):
+        dot_number = carrier['dot_number'].strip()
+        company_name = carrier['legal_name'].strip() or carrier.get('dba_name', '').strip()
+        if not company_name or not dot_number:
+            continue
+
+        city = carrier.get('city', '').strip()
+        power_units = _count(carrier.get('power_units'))
+        drivers = _count(carrier.get('drivers'))
+        mc_number = carrier.get('mc_number', '').strip()
+        prefix = carrier.get('mc_prefix', '').strip()
+        if mc_number and prefix and prefix != 'MC':
+            # Docket is an MX/FF number, not MC authority
+            mc_number = ''
+
+        leads.append(FMCSAScraper.score_lead({
+            'company_name': name_normalizer.display_name(company_name),
+            'industry': 'Trucking',
+            'city': city.title() if city else 'Unknown',
+            'state': carrier['state'].strip().upper(),
+            'zip': carrier.get('zip', '').strip()[:5],
+            'phone': carrier.get('phone', '').strip(),
+            'source_id': FMCSAScraper.generate_source_id('fmcsa', dot_number),
+            'signal_type': 'new_dot',
+            'signal_date': carrier['mcs150_date'],
+            'employees_estimated': FMCSAScraper.estimate_employees(power_units, drivers),
+            'raw_data': {
+                'dot_number': dot_number,
+                'mc_number': mc_number,
+                'power_units': power_units,
+                'drivers': drivers,
+                'carrier_operation': carrier.get('carrier_operation', '').strip(),
+                'cargo_carried': carrier.get('cargo_carried', '').strip(),
+            }
+        }, 'fmcsa'))
+    return leads
+
+
+def census_leads(path: str = CENSUS_PATH, states=None, days_back: int = DAYS_BACK,
+                 chunk_rows: int = CHUNK_ROWS, stats: dict = None) -> list:
+    """All census carriers in the states with an MCS-150 filed in the last days_back days"""
+    since = datetime.now() - timedelta(days=days_back)
+    stats = stats if stats is not None else {}
+    stats.update(rows=0, matched=0, seconds=0.0)
+
+    start = time.perf_counter()
+    leads = []
+    for rows, chunk in iter_chunks(path, states, since, chunk_rows):
+        stats['rows'] += rows
+        stats['matched'] += len(chunk)
+        leads.extend(chunk_leads(chunk))
+    stats['seconds'] = time.perf_counter() - start
+    return leads
+
+
+class FMCSACensusScraper(FMCSAScraper):
+    """FMCSAScraper fed from a local census file instead of the carrier API"""
+
+    def __init__(self, path: str = CENSUS_PATH, states: list = None, days_back: int = DAYS_BACK):
+        super().__init__()
+        self.path = path
+        self.states = states or self.TARGET_STATES
+        self.days_back = days_back
+
+    def scrape(self) -> list:
+        if not os.path.exists(self.path):
+            self.logger.warning(f"No census file at {self.path}; set LEADFLOW_FMCSA_CENSUS")
+            return []
+
+        self.logger.info(f"Reading FMCSA census {self.path}...")
+        stats = {}
+        leads = census_leads(self.path, self.states, self.days_back, stats=stats)
+        rate = stats['rows'] / stats['seconds'] * 60 if stats['seconds'] else 0
+        self.logger.info(f"Census: {stats['rows']:,} rows, {stats['matched']:,} matched, "
+                         f"{rate:,.0f} rows/min")
+        return leads
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='FMCSA census bulk ingest')
+    parser.add_argument('path', nargs='?', default=CENSUS_PATH, help='Census CSV or zipped CSV')
+    parser.add_argument('--states', type=str, help='Comma-separated states (default: FMCSA target states)')
+    parser.add_argument('--days', type=int, default=DAYS_BACK, help='MCS-150 window in days')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        sys.exit(f"No census file at {args.path}")
+
+    states = [s.strip().upper() for s in args.states.split(',')] if args.states else FMCSAScraper.TARGET_STATES
+    stats = {}
+    leads = census_leads(args.path, states, args.days, stats=stats)
+    print(f"{stats['rows']:,} rows in {stats['seconds']:.1f}s "
+          f"({stats['rows'] / max(stats['seconds'], 1e-9) * 60:,.0f} rows/min), {len(leads):,} leads")
+    for lead in leads[:5]:
+        print(lead)
@@ -11,9 +11,15 @@ FMCSA provides free public data:
 No API key required for basic data.
 """
 
-import requests
+import http_client
 from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
+from parsing import make_soup, response_encoding, SoupStrainer
+from safer_snapshot import extract_snapshot
+import name_normalizer
+from parse_pool import get_pool
+import pagination
+from pagination import Paginator, NEXT
+import watermarks
 import re
 import time
 import json
@@ -36,13 +42,48 @@ HEADERS = {
     'Accept-Language': 'en-US,en;q=0.5',
 }
 
+# Search results: only the carrier snapshot links are parsed
+CARRIER_LINK_RE = re.compile(r'query\.asp\?searchtype=ANY&query_type=queryCarrierSnapshot')
+CARRIER_LINK_STRAINER = SoupStrainer('a', href=CARRIER_LINK_RE)
+
+
+def parse_carrier_links(page):
+    """(carrier_name, dot_number) for each snapshot link on a search results page"""
+    soup = make_soup(page, parse_only=CARRIER_LINK_STRAINER)
+    
+    carriers = []
+    for link in soup.find_all('a', href=CARRIER_LINK_RE):
+        carrier_name = link.get_text(strip=True)
+        
+        # Skip empty names
+        if not carrier_name or len(carrier_name) < 3:
+            continue
+        
+        # Get DOT number from link
+        href = link.get('href', '')
+        dot_match = re.search(r'query_param=USDOT&query_string=(\d+)', href)
+        carriers.append((carrier_name, dot_match.group(1) if dot_match else ''))
+    
+    return carriers
+
+
+def parse_snapshot(page):
+    """Carrier details dict from a SAFER snapshot page"""
+    text = page.content.decode(response_encoding(page), errors='replace')
+    return extract_snapshot(text).to_details()
+
 
 def get_fmcsa_carriers_by_state(state, days_back=7):
     """
     Get new carriers from FMCSA SAFER system
     Uses the public search interface
+    
+    Snapshot pages are parsed in the process pool while the next one is
+    being fetched. The search returns one results page; how many of its
+    carriers get a snapshot is the fmcsa_safer pagination budget.
     """
     leads = []
+    pool = get_pool()
     
     # FMCSA SAFER search URL
     base_url = "https://safer.fmcsa.dot.gov/keywordx.asp"
@@ -55,38 +96,54 @@ def get_fmcsa_carriers_by_state(state, days_back=7):
         'STATE': state,
     }
     
-    try:
-        # Make request
-        response = requests.get(base_url, params=params, headers=HEADERS, timeout=30)
-        
+    def fetch(next_url):
+        # No next link on keywordx.asp results, so this is only called once
+        return http_client.get(next_url or base_url, params=None if next_url else params,
+                               headers=HEADERS, timeout=30)
+    
+    def extract(response):
         if response.status_code != 200:
             print(f"[FMCSA] Error for {state}: Status {response.status_code}")
-            return leads
-        
-        # Parse HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
+            return [], None
         # Find carrier links
-        carrier_links = soup.find_all('a', href=re.compile(r'query\.asp\?searchtype=ANY&query_type=queryCarrierSnapshot'))
+        return pool.parse(parse_carrier_links, response), None
+    
+    try:
+        paginator = Paginator('fmcsa_safer', state, style=NEXT)
         
-        for link in carrier_links[:50]:  # Limit to 50 per state
-            try:
-                carrier_name = link.get_text(strip=True)
-                
-                # Skip empty names
-                if not carrier_name or len(carrier_name) < 3:
+        pending = []
+        seen = 0
+        newest = None
+        for carrier_name, dot_number in paginator.walk(fetch, extract):
+            # DOT numbers are assigned in order, so one at or below the
+            # watermark was registered before an earlier run; skip its snapshot
+            if dot_number:
+                if not watermarks.newer('fmcsa_safer', state, dot_number):
+                    seen += 1
                     continue
-                
-                # Get DOT number from link
-                href = link.get('href', '')
-                dot_match = re.search(r'query_param=USDOT&query_string=(\d+)', href)
-                dot_number = dot_match.group(1) if dot_match else ''
-                
-                # Get carrier details
-                carrier_data = get_carrier_details(dot_number) if dot_number else {}
+                if newest is None or int(dot_number) > int(newest):
+                    newest = dot_number
+            
+            # Get carrier details
+            response = fetch_carrier_snapshot(dot_number) if dot_number else None
+            future = pool.submit(parse_snapshot, response) if response is not None else None
+            pending.append((carrier_name, dot_number, future))
+            
+            # Be nice to the server
+            if response is not None:
+                time.sleep(0.5)
+        
+        for carrier_name, dot_number, future in pending:
+            try:
+                carrier_data = {}
+                if future is not None:
+                    try:
+                        carrier_data = future.result()
+                    except Exception as e:
+                        print(f"[FMCSA] Error getting details for DOT {dot_number}: {e}")
                 
                 lead = {
-                    'company_name': carrier_name.upper(),
+                    'company_name': name_normalizer.display_name(carrier_name),
                     'industry': 'Trucking',
                     'city': carrier_data.get('city', ''),
                     'state': state,
@@ -96,7 +153,7 @@ def get_fmcsa_carriers_by_state(state, days_back=7):
                     'signal_type': 'new_dot',
                     'signal_date': datetime.now().strftime('%Y-%m-%d'),
                     'source': 'fmcsa_scraper',
-                    'source_id': f"FMCSA-{dot_number}" if dot_number else f"FMCSA-{hash(carrier_name)}",
+                    'source_id': f"FMCSA-{dot_number}" if dot_number else f"FMCSA-{name_normalizer.name_id(carrier_name)}",
                     'employees_estimated': estimate_employees(carrier_data.get('drivers', 0)),
                     'priority': 'HIGH',
                     'score': 85,
@@ -109,14 +166,16 @@ def get_fmcsa_carriers_by_state(state, days_back=7):
                 
                 leads.append(lead)
                 
-                # Be nice to the server
-                time.sleep(0.5)
-                
             except Exception as e:
                 print(f"[FMCSA] Error parsing carrier: {e}")
                 continue
         
-        print(f"[FMCSA] Found {len(leads)} carriers in {state}")
+        pagination.count_leads('fmcsa_safer', state, len(leads))
+        # A walk cut off by the item budget may have left lower DOT numbers
+        # unread, so the watermark only moves after a complete walk
+        if newest and paginator.stats['stopped'] == 'exhausted':
+            watermarks.advance('fmcsa_safer', state, key=newest)
+        print(f"[FMCSA] Found {len(leads)} carriers in {state}, {seen} already seen")
         
     except Exception as e:
         print(f"[FMCSA] Error fetching {state}: {e}")
@@ -124,6 +183,17 @@ def get_fmcsa_carriers_by_state(state, days_back=7):
     return leads
 
 
+def fetch_carrier_snapshot(dot_number):
+    """Fetch the SAFER snapshot page for a DOT number; None on failure"""
+    url = f"https://safer.fmcsa.dot.gov/query.asp?searchtype=ANY&query_type=queryCarrierSnapshot&query_param=USDOT&query_string={dot_number}"
+    
+    try:
+        return http_client.get(url, headers=HEADERS, timeout=30)
+    except Exception as e:
+        print(f"[FMCSA] Error getting details for DOT {dot_number}: {e}")
+        return None
+
+
 def get_carrier_details(dot_number):
     """Get detailed carrier info from SAFER"""
     details = {}
@@ -131,38 +201,12 @@ def get_carrier_details(dot_number):
     if not dot_number:
         return details
     
-    url = f"https://safer.fmcsa.dot.gov/query.asp?searchtype=ANY&query_type=queryCarrierSnapshot&query_param=USDOT&query_string={dot_number}"
+    response = fetch_carrier_snapshot(dot_number)
+    if response is None:
+        return details
     
     try:
-        response = requests.get(url, headers=HEADERS, timeout=30)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Find the data table
-        tables = soup.find_all('table')
-        
-        for table in tables:
-            text = table.get_text()
-            
-            # Extract phone
-            phone_match = re.search(r'Phone:\s*\(?(\d{3})\)?[-.\s]?(\d{3})[-.\s]?(\d{4})', text)
-            if phone_match:
-                details['phone'] = f"({phone_match.group(1)}) {phone_match.group(2)}-{phone_match.group(3)}"
-            
-            # Extract city/state
-            addr_match = re.search(r'Physical Address:\s*([^,]+),\s*([A-Z]{2})\s*(\d{5})', text)
-            if addr_match:
-                details['city'] = addr_match.group(1).strip()
-                details['zip'] = addr_match.group(3)
-            
-            # Extract drivers
-            drivers_match = re.search(r'Drivers:\s*(\d+)', text)
-            if drivers_match:
-                details['drivers'] = int(drivers_match.group(1))
-            
-            # Extract MC number
-            mc_match = re.search(r'MC/MX/FF Number\(s\):\s*MC-(\d+)', text)
-            if mc_match:
-                details['mc_number'] = f"MC-{mc_match.group(1)}"
+        details = parse_snapshot(response)
         
     except Exception as e:
         print(f"[FMCSA] Error getting details for DOT {dot_number}: {e}")
@@ -201,6 +245,7 @@ def push_leads_to_supabase(leads, existing_ids):
     """Push new leads to Supabase"""
     inserted = 0
     skipped = 0
+    failed = 0
     
     for lead in leads:
         source_id = lead.get('source_id')
@@ -216,6 +261,13 @@ def push_leads_to_supabase(leads, existing_ids):
                 existing_ids.add(source_id)
         except Exception as e:
             print(f"Error inserting lead: {e}")
+            failed += 1
+    
+    # Watermarks only move once everything they cover is written
+    if failed:
+        watermarks.discard()
+    else:
+        watermarks.commit()
     
     return inserted, skipped
 
@@ -243,6 +295,7 @@ def run_fmcsa_scraper(states=None):
     
     print(f"\n" + "-" * 60)
     print(f"Total leads found: {len(all_leads)}")
+    print(f"Parsing: {get_pool().summary()}")
     
     if all_leads:
         inserted, skipped = push_leads_to_supabase(all_leads, existing_ids)
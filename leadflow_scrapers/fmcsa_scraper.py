@@ -3,9 +3,15 @@ FMCSA Scraper - New DOT Numbers and MC Authority (All States)
 Source: https://ai.fmcsa.dot.gov/SMS/
 """
 import requests
+import http_client
+from json_stream import iter_json_array
 from datetime import datetime, timedelta
 import time
 from base_scraper import BaseScraper
+import name_normalizer
+import pagination
+from pagination import Paginator, OFFSET
+import watermarks
 
 class FMCSAScraper(BaseScraper):
     """Scrape new motor carrier registrations from FMCSA"""
@@ -17,6 +23,9 @@ class FMCSAScraper(BaseScraper):
     # Target states
     TARGET_STATES = ['TX', 'AR', 'GA', 'TN', 'OK', 'LA', 'AL', 'MS']
     
+    # MCS-150 lookback for a state without a watermark
+    DAYS_BACK = 90
+    
     # State name mapping
     STATE_NAMES = {
         'TX': 'TEXAS', 'AR': 'ARKANSAS', 'GA': 'GEORGIA', 'TN': 'TENNESSEE',
@@ -27,7 +36,8 @@ class FMCSAScraper(BaseScraper):
     def get_source_name(self) -> str:
         return 'fmcsa'
     
-    def estimate_employees(self, power_units: int, drivers: int) -> str:
+    @staticmethod
+    def estimate_employees(power_units: int, drivers: int) -> str:
         """Estimate employee count from power units and drivers"""
         total = max(power_units, drivers)
         if total >= 100:
@@ -54,84 +64,102 @@ class FMCSAScraper(BaseScraper):
         }
         
         for state in self.TARGET_STATES:
-            self.logger.info(f"Fetching carriers for {state}...")
+            # The API can't filter by date; carriers filed before the watermark are skipped
+            cutoff = watermarks.since('fmcsa', state, self.DAYS_BACK)
+            self.logger.info(f"Fetching carriers for {state} (MCS-150 since {cutoff.date()})...")
             
             try:
-                # FMCSA provides a public lookup API
+                # FMCSA provides a public lookup API, paged with start/size
                 # Note: Production would need to handle proper API authentication
-                # and pagination for large result sets
+                paginator = Paginator('fmcsa', state, style=OFFSET)
                 
-                params = {
-                    'stateAbbrev': state,
-                    'mcMxFfNum': '',
-                    'dotNum': '',
-                    'legalName': '',
-                    'dbaName': '',
-                    'city': '',
-                    'start': 0,
-                    'size': 100
-                }
+                def fetch(start, state=state):
+                    params = {
+                        'stateAbbrev': state,
+                        'mcMxFfNum': '',
+                        'dotNum': '',
+                        'legalName': '',
+                        'dbaName': '',
+                        'city': '',
+                        'start': start,
+                        'size': paginator.page_size
+                    }
+                    return http_client.get(
+                        f"{self.CARRIER_API}/name",
+                        params=params,
+                        headers=headers,
+                        timeout=30,
+                        stream=True
+                    )
                 
-                # Try the carrier lookup endpoint
-                response = requests.get(
-                    f"{self.CARRIER_API}/name",
-                    params=params,
-                    headers=headers,
-                    timeout=30
-                )
+                def extract(response):
+                    try:
+                        if response.status_code != 200:
+                            # Ends the walk as an error so the watermark stays put
+                            raise requests.HTTPError(f"HTTP {response.status_code} from FMCSA carrier search",
+                                                     response=response)
+                        # Carriers are decoded one at a time from the 'content' array
+                        carriers = list(iter_json_array(response, key='content'))
+                    finally:
+                        response.close()
+                    return carriers, len(carriers) >= paginator.page_size
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    carriers = data.get('content', [])
-                    
-                    for carrier in carriers:
-                        try:
-                            # Check if recently registered (within last 90 days)
-                            mcs150_date = carrier.get('mcs150FormDate', '')
-                            if mcs150_date:
-                                try:
-                                    form_date = datetime.strptime(mcs150_date, '%Y-%m-%d')
-                                    if (datetime.now() - form_date).days > 90:
-                                        continue  # Skip older carriers
-                                except:
-                                    pass
-                            
-                            dot_number = carrier.get('dotNumber', '')
-                            company_name = carrier.get('legalName', '') or carrier.get('dbaName', '')
-                            city = carrier.get('phyCity', '')
-                            
-                            if not company_name or not dot_number:
-                                continue
-                            
-                            power_units = int(carrier.get('totalPowerUnits', 0) or 0)
-                            drivers = int(carrier.get('totalDrivers', 0) or 0)
-                            
-                            lead = {
-                                'company_name': company_name.upper(),
-                                'industry': 'Trucking',
-                                'city': city.title() if city else 'Unknown',
-                                'state': state,
-                                'zip': carrier.get('phyZipcode', ''),
-                                'phone': carrier.get('telephone', ''),
-                                'source_id': self.generate_source_id('fmcsa', dot_number),
-                                'signal_type': 'new_dot',
-                                'signal_date': mcs150_date or datetime.now().isoformat()[:10],
-                                'employees_estimated': self.estimate_employees(power_units, drivers),
-                                'raw_data': {
-                                    'dot_number': dot_number,
-                                    'mc_number': carrier.get('mcNumber', ''),
-                                    'power_units': power_units,
-                                    'drivers': drivers,
-                                    'carrier_operation': carrier.get('carrierOperation', ''),
-                                    'cargo_carried': carrier.get('cargoCarried', '')
-                                }
-                            }
-                            
-                            leads.append(lead)
-                            
-                        except Exception as e:
-                            self.logger.debug(f"Error parsing carrier: {e}")
+                state_leads = len(leads)
+                latest = None
+                
+                for carrier in paginator.walk(fetch, extract):
+                    try:
+                        # Check if filed since the watermark (or within DAYS_BACK)
+                        mcs150_date = carrier.get('mcs150FormDate', '')
+                        if mcs150_date:
+                            try:
+                                form_date = datetime.strptime(mcs150_date[:10], '%Y-%m-%d')
+                                if form_date < cutoff:
+                                    continue  # Skip older carriers
+                                latest = max(latest or form_date, form_date)
+                            except:
+                                pass
+                        
+                        dot_number = carrier.get('dotNumber', '')
+                        company_name = carrier.get('legalName', '') or carrier.get('dbaName', '')
+                        city = carrier.get('phyCity', '')
+                        
+                        if not company_name or not dot_number:
                             continue
+                        
+                        power_units = int(carrier.get('totalPowerUnits', 0) or 0)
+                        drivers = int(carrier.get('totalDrivers', 0) or 0)
+                        
+                        lead = {
+                            'company_name': name_normalizer.display_name(company_name),
+                            'industry': 'Trucking',
+                            'city': city.title() if city else 'Unknown',
+                            'state': state,
+                            'zip': carrier.get('phyZipcode', ''),
+                            'phone': carrier.get('telephone', ''),
+                            'source_id': self.generate_source_id('fmcsa', dot_number),
+                            'signal_type': 'new_dot',
+                            'signal_date': mcs150_date or datetime.now().isoformat()[:10],
+                            'employees_estimated': self.estimate_employees(power_units, drivers),
+                            'raw_data': {
+                                'dot_number': dot_number,
+                                'mc_number': carrier.get('mcNumber', ''),
+                                'power_units': power_units,
+                                'drivers': drivers,
+                                'carrier_operation': carrier.get('carrierOperation', ''),
+                                'cargo_carried': carrier.get('cargoCarried', '')
+                            }
+                        }
+                        
+                        leads.append(lead)
+                        
+                    except Exception as e:
+                        self.logger.debug(f"Error parsing carrier: {e}")
+                        continue
+                
+                pagination.count_leads('fmcsa', state, len(leads) - state_leads)
+                if latest and paginator.stats['stopped'] == 'exhausted':
+                    watermarks.advance('fmcsa', state, covered=latest)
                 
                 # Respect rate limits
                 time.sleep(1)
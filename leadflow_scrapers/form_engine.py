@@ -0,0 +1,284 @@
+"""
+Form submission over plain HTTP for search portals
+
+License boards and UCC search pages only answer form submissions, and
+most are ASP.NET WebForms: every POST must echo the page's hidden fields
+(__VIEWSTATE, __EVENTVALIDATION, ...), and "page 2" is a postback that sets
+__EVENTTARGET/__EVENTARGUMENT on the results page's own form. FormEngine
+does what the browser would, without one:
+
+1. GET the search page and read its form: hidden fields, text inputs,
+   selected options, checked boxes, submit buttons
+2. fill in the configured fields and submit with the configured button
+3. read result rows with the config's TableSpec, then follow the pager
+   (postback, next link, or a next button) from the page just returned
+
+Each portal is described by a config dict:
+
+    {
+        'url': 'https://verify.sos.ga.gov/verification/Search.aspx',
+        'form': 'aspnetForm',               # form id or name; default first form
+        'fields': {'ddLicenseType': 'Electrical Contractor', 'txtCity': ''},
+        'submit': 'btnSearch',
+        'results': TableSpec(...),
+        'pager': 'postback',                # 'postback', 'link', 'button' or None
+        'next': r'Page\\$Next|Page\\$\\d+',   # postback argument / link text / button name
+        'max_pages': 10,
+        'delay': 1,                         # seconds between requests
+    }
+
+Field and button names match exactly or by suffix, so 'txtCity' finds
+ctl00$MainContent$txtCity. A select can be given an option's label instead
+of its value. A configured field the search form doesn't have raises
+FormError rather than being sent and ignored by the portal.
+"""
+import re
+import html
+import time
+import logging
+from urllib.parse import urljoin
+import http_client
+from parsing import make_soup, response_encoding
+
+logger = logging.getLogger('FormEngine')
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+}
+
+POSTBACK_RE = re.compile(r"""__doPostBack\(\s*['"]([^'"]*)['"]\s*,\s*['"]([^'"]*)['"]""")
+PAGE_ARG_RE = re.compile(r'Page\$(\d+)$')
+
+MAX_PAGES = 10
+DELAY = 1.0
+
+SUBMIT_TYPES = ('submit', 'image', 'button')
+
+
+class FormError(Exception):
+    pass
+
+
+class Form:
+    """One HTML form's default submission, as a browser would build it"""
+
+    def __init__(self, element, base_url: str):
+        self.action = urljoin(base_url, element.get('action') or base_url)
+        self.method = (element.get('method') or 'GET').upper()
+        self.fields = {}
+        self.options = {}
+        self.buttons = {}
+
+        for el in element.find_all(['input', 'select', 'textarea']):
+            name = el.get('name')
+            if not name or el.has_attr('disabled'):
+                continue
+            kind = (el.get('type') or 'text').lower()
+            if el.name == 'select':
+                options = [(o.get('value', o.get_text(strip=True)), o.get_text(' ', strip=True))
+                           for o in el.find_all('option')]
+                self.options[name] = options
+                selected = el.find('option', selected=True)
+                if selected is not None:
+                    self.fields[name] = selected.get('value', selected.get_text(strip=True))
+                elif options:
+                    self.fields[name] = options[0][0]
+            elif el.name == 'textarea':
+                self.fields[name] = el.get_text()
+            elif kind in SUBMIT_TYPES:
+                self.buttons[name] = (kind, el.get('value', ''))
+            elif kind in ('checkbox', 'radio'):
+                if el.has_attr('checked'):
+                    self.fields[name] = el.get('value', 'on')
+            elif kind not in ('file', 'reset'):
+                self.fields[name] = el.get('value', '')
+
+        for el in element.find_all('button'):
+            name = el.get('name')
+            if name and (el.get('type') or 'submit').lower() == 'submit':
+                self.buttons[name] = ('submit', el.get('value', ''))
+
+    @staticmethod
+    def _match(key: str, names) -> str:
+        if key in names:
+            return key
+        for name in names:
+            if name.endswith('$' + key) or name.endswith(':' + key) or name.endswith('_' + key):
+                return name
+        for name in names:
+            if name.endswith(key):
+                return name
+        return None
+
+    def field(self, key: str) -> str:
+        """Full name of the field a config key refers to"""
+        return self._match(key, list(self.fields) + list(self.options))
+
+    def button(self, key: str) -> str:
+        return self._match(key, self.buttons)
+
+    def _option_value(self, name: str, value: str) -> str:
+        options = self.options.get(name)
+        if not options or any(v == value for v, _ in options):
+            return value
+        wanted = value.strip().lower()
+        for option_value, label in options:
+            if label.lower() == wanted:
+                return option_value
+        for option_value, label in options:
+            if wanted in label.lower():
+                return option_value
+        logger.warning(f"No option '{value}' for {name}; sending it as given")
+        return value
+
+    def payload(self, values: dict = None, submit: str = None, event: tuple = None,
+                strict: bool = False) -> dict:
+        """
+        Form data with values filled in and one submit button or postback
+        event. A value for a field the form lacks raises FormError when
+        strict, otherwise it is logged and sent under its own name.
+        """
+        data = dict(self.fields)
+        for key, value in (values or {}).items():
+            name = self.field(key)
+            if name is None:
+                if strict:
+                    raise FormError(f"No field '{key}' in form")
+                logger.warning(f"No field '{key}' in form; sending it as given")
+                name = key
+            data[name] = self._option_value(name, str(value))
+
+        if event:
+            data['__EVENTTARGET'], data['__EVENTARGUMENT'] = event
+        elif submit:
+            name = self.button(submit)
+            if name is None:
+                raise FormError(f"No submit button '{submit}' in form")
+            kind, value = self.buttons[name]
+            if kind == 'image':
+                data[f"{name}.x"], data[f"{name}.y"] = '1', '1'
+            else:
+                data[name] = value
+        return data
+
+
+def find_form(page, form: str = None) -> Form:
+    """The form with this id or name, or the first form on the page"""
+    soup = make_soup(page)
+    if form:
+        element = soup.find('form', id=form) or soup.find('form', attrs={'name': form})
+    else:
+        element = soup.find('form')
+    if element is None:
+        raise FormError(f"No form '{form}' on {page.url}" if form else f"No form on {page.url}")
+    return Form(element, page.url)
+
+
+class FormEngine:
+    """Submits one portal's search form and walks its result pages"""
+
+    def __init__(self, config: dict, session=None):
+        self.config = config
+        self.session = session or http_client.new_session()
+        if session is None:
+            self.session.headers.update(config.get('headers', HEADERS))
+        self.delay = config.get('delay', DELAY)
+        self.stats = {'requests': 0, 'pages': 0, 'rows': 0}
+        self._last = 0.0
+
+    def _send(self, method: str, url: str, data: dict = None):
+        wait = self._last + self.delay - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        if method == 'GET':
+            response = self.session.get(url, params=data, timeout=30)
+        else:
+            response = self.session.post(url, data=data, timeout=30)
+        self._last = time.monotonic()
+        self.stats['requests'] += 1
+        if response.status_code != 200:
+            raise FormError(f"HTTP {response.status_code} from {url}")
+        return response
+
+    def submit(self, form: Form, data: dict):
+        return self._send(form.method, form.action, data)
+
+    def _next_postback(self, page, current: int):
+        """(target, argument) of the pager link to the next page, or None"""
+        pattern = re.compile(self.config.get('next') or r'Page\$Next|Page\$\d+')
+        # ASP.NET 4 writes pager hrefs as __doPostBack(&#39;...&#39;,&#39;Page$2&#39;)
+        text = html.unescape(page.content.decode(response_encoding(page), errors='replace'))
+        fallback = None
+        for target, argument in POSTBACK_RE.findall(text):
+            if not pattern.search(argument):
+                continue
+            number = PAGE_ARG_RE.search(argument)
+            if number and int(number.group(1)) == current + 1:
+                return target, argument
+            if argument.endswith('$Next'):
+                fallback = (target, argument)
+        return fallback
+
+    def _next_link(self, page):
+        pattern = re.compile(self.config.get('next') or r'^\s*(Next|>|>>)\s*$', re.I)
+        for link in make_soup(page).find_all('a', href=True):
+            if pattern.search(link.get_text(' ', strip=True)) and not link['href'].startswith('javascript:'):
+                return urljoin(page.url, link['href'])
+        return None
+
+    def next_page(self, page, current: int, values: dict = None):
+        """
+        Response for the page after this one, or None on the last page.
+        Postbacks resend the search values in case the page didn't echo them.
+        """
+        pager = self.config.get('pager')
+        if pager == 'postback':
+            event = self._next_postback(page, current)
+            if event is None:
+                return None
+            form = find_form(page, self.config.get('form'))
+            return self.submit(form, form.payload(values, event=event))
+        if pager == 'link':
+            url = self._next_link(page)
+            return self._send('GET', url) if url else None
+        if pager == 'button':
+            form = find_form(page, self.config.get('form'))
+            button = form.button(self.config['next'])
+            return self.submit(form, form.payload(values, submit=button)) if button else None
+        return None
+
+    def pages(self, values: dict = None):
+        """Yield each result page of one search"""
+        landing = self._send('GET', self.config['url'])
+        form = find_form(landing, self.config.get('form'))
+        fields = {**self.config.get('fields', {}), **(values or {})}
+        page = self.submit(form, form.payload(fields, submit=self.config.get('submit'), strict=True))
+
+        max_pages = self.config.get('max_pages', MAX_PAGES)
+        number = 1
+        while page is not None:
+            self.stats['pages'] += 1
+            yield page
+            if max_pages and number >= max_pages:
+                return
+            page = self.next_page(page, number, fields)
+            number += 1
+
+    def search(self, values: dict = None) -> list:
+        """Result rows from every page of one search; a page that repeats ends the walk"""
+        spec = self.config['results']
+        rows = []
+        previous = None
+        for page in self.pages(values):
+            records = spec.extract(page)
+            if not records or records == previous:
+                break
+            previous = records
+            rows.extend(records)
+        self.stats['rows'] += len(rows)
+        return rows
+
+    def summary(self) -> str:
+        s = self.stats
+        return f"{s['requests']} requests, {s['pages']} result pages, {s['rows']} rows"
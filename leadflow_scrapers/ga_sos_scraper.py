@@ -2,11 +2,15 @@
 Georgia Secretary of State - New Business Formations Scraper
 Source: https://ecorp.sos.ga.gov/BusinessSearch
 """
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
-import time
+from table_spec import TableSpec, Column
+from datetime import datetime
 from base_scraper import BaseScraper
+import industry_classifier
+import name_normalizer
+import gazetteer
+from session_store import PortalSession
+from search_planner import SearchPlanner, CONTAINS
+import watermarks
 
 class GeorgiaSOSScraper(BaseScraper):
     """Scrape new business formations from Georgia Secretary of State"""
@@ -14,45 +18,36 @@ class GeorgiaSOSScraper(BaseScraper):
     SEARCH_URL = "https://ecorp.sos.ga.gov/BusinessSearch"
     API_URL = "https://ecorp.sos.ga.gov/BusinessSearch/BusinessSearchResults"
     
-    INDUSTRY_KEYWORDS = {
-        'Construction': ['construction', 'builder', 'roofing', 'concrete', 'framing', 'drywall', 'excavation', 'contractor'],
-        'Trucking': ['trucking', 'freight', 'transport', 'hauling', 'logistics', 'carrier', 'moving'],
-        'Medical': ['medical', 'health', 'clinic', 'dental', 'therapy', 'physician', 'healthcare', 'wellness'],
-        'Restaurant': ['restaurant', 'cafe', 'grill', 'kitchen', 'food', 'catering', 'bar'],
-        'Manufacturing': ['manufacturing', 'fabrication', 'machine', 'welding', 'industrial'],
-        'Technology': ['technology', 'software', 'tech', 'digital', 'it ', 'computer'],
-        'Real Estate': ['real estate', 'realty', 'property', 'investment'],
-        'Landscaping': ['landscaping', 'lawn', 'garden', 'tree'],
-    }
+    # Seconds between search requests
+    SEARCH_INTERVAL = 2
     
-    GA_CITIES = {
-        'atlanta', 'augusta', 'columbus', 'macon', 'savannah', 'athens',
-        'sandy springs', 'roswell', 'johns creek', 'albany', 'warner robins',
-        'alpharetta', 'marietta', 'valdosta', 'smyrna', 'brookhaven',
-        'dunwoody', 'peachtree corners', 'gainesville', 'newnan', 'dalton',
-        'kennesaw', 'lawrenceville', 'duluth', 'woodstock', 'canton',
-        'carrollton', 'griffin', 'mcdonough', 'acworth', 'rome'
-    }
+    # Formation window when there is no watermark yet
+    DAYS_BACK = 7
+    
+    # Every row on the results page after the header: name, control number, status
+    RESULTS_TABLE = TableSpec(
+        min_cells=4,
+        limit=30,
+        columns=[
+            Column('company_name', 0),
+            Column('control_number', 1),
+            Column('status', 2),
+        ],
+    )
     
     def get_source_name(self) -> str:
         return 'ga_sos'
     
     def classify_industry(self, company_name: str) -> str:
-        name_lower = company_name.lower()
-        for industry, keywords in self.INDUSTRY_KEYWORDS.items():
-            for keyword in keywords:
-                if keyword in name_lower:
-                    return industry
-        return 'Other'
+        return industry_classifier.classify(company_name)
     
     def extract_city(self, address: str) -> str:
         if not address:
             return 'Unknown'
         
-        address_lower = address.lower()
-        for city in self.GA_CITIES:
-            if city in address_lower:
-                return city.title()
+        city = gazetteer.find_city(address, 'GA')
+        if city:
+            return city
         
         parts = address.split(',')
         if len(parts) >= 2:
@@ -65,7 +60,7 @@ class GeorgiaSOSScraper(BaseScraper):
         leads = []
         
         end_date = datetime.now()
-        start_date = end_date - timedelta(days=7)
+        start_date = watermarks.since('ga_sos', 'GA', self.DAYS_BACK)
         
         self.logger.info(f"Scraping GA SOS formations from {start_date.date()} to {end_date.date()}")
         
@@ -75,77 +70,69 @@ class GeorgiaSOSScraper(BaseScraper):
             'Content-Type': 'application/x-www-form-urlencoded',
         }
         
-        session = requests.Session()
+        # The search form issues cookies and an anti-forgery token; the session
+        # merges the token into every POST and persists both between runs
+        session = self.get_portal_session(self.SEARCH_URL, headers)
         
         target_keywords = ['construction', 'trucking', 'medical', 'restaurant', 'logistics']
         
-        for keyword in target_keywords:
-            self.logger.info(f"Searching GA SOS for: {keyword}")
+        def search(keyword):
+            # Georgia uses a POST-based search
+            data = {
+                'SearchType': 'BusinessName',
+                'SearchText': keyword,
+                'BusinessType': 'All',
+                'Status': 'Active',
+                'StartDate': start_date.strftime('%m/%d/%Y'),
+                'EndDate': end_date.strftime('%m/%d/%Y'),
+            }
+            response = session.post(self.API_URL, data=data, timeout=30)
+            if response.status_code != 200:
+                # A failed search, so the planner holds the watermark
+                raise ConnectionError(f"HTTP {response.status_code} from GA SOS search")
+            return self.RESULTS_TABLE.extract(response)
+        
+        planner = SearchPlanner('ga_sos', match=CONTAINS, interval=self.SEARCH_INTERVAL)
+        records = planner.run(target_keywords, search,
+                              key=lambda r: r['control_number'] or r['company_name'].upper())
+        self.logger.info(f"Searches: {planner.summary()}")
+        
+        for record in records:
+            company_name = record['company_name']
+            control_number = record['control_number']
+            status = record['status']
             
-            try:
-                # Georgia uses a POST-based search
-                data = {
-                    'SearchType': 'BusinessName',
-                    'SearchText': keyword,
-                    'BusinessType': 'All',
-                    'Status': 'Active',
-                    'StartDate': start_date.strftime('%m/%d/%Y'),
-                    'EndDate': end_date.strftime('%m/%d/%Y'),
-                }
-                
-                response = session.post(self.API_URL, data=data, headers=headers, timeout=30)
-                
-                if response.status_code == 200:
-                    # Try parsing as HTML
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    rows = soup.find_all('tr')[1:]  # Skip header
-                    
-                    for row in rows[:30]:
-                        try:
-                            cols = row.find_all('td')
-                            if len(cols) >= 4:
-                                company_name = cols[0].get_text(strip=True)
-                                control_number = cols[1].get_text(strip=True) if len(cols) > 1 else ''
-                                status = cols[2].get_text(strip=True) if len(cols) > 2 else ''
-                                
-                                if not company_name:
-                                    continue
-                                
-                                if 'active' not in status.lower():
-                                    continue
-                                
-                                industry = self.classify_industry(company_name)
-                                if industry == 'Other':
-                                    continue
-                                
-                                lead = {
-                                    'company_name': company_name.upper(),
-                                    'industry': industry,
-                                    'city': 'Atlanta',  # Default - would need detail lookup
-                                    'state': 'GA',
-                                    'source_id': self.generate_source_id('ga_sos', control_number or company_name),
-                                    'signal_type': 'new_formation',
-                                    'signal_date': datetime.now().isoformat()[:10],
-                                    'employees_estimated': '1-5',
-                                    'raw_data': {
-                                        'control_number': control_number,
-                                        'status': status
-                                    }
-                                }
-                                
-                                leads.append(lead)
-                                
-                        except Exception as e:
-                            self.logger.debug(f"Error parsing row: {e}")
-                            continue
-                
-                time.sleep(2)
-                
-            except requests.RequestException as e:
-                self.logger.warning(f"Request failed for {keyword}: {e}")
+            if not company_name:
+                continue
+            
+            if 'active' not in status.lower():
                 continue
+            
+            industry = self.classify_industry(company_name)
+            if industry == 'Other':
+                continue
+            
+            lead = {
+                'company_name': name_normalizer.display_name(company_name),
+                'industry': industry,
+                'city': 'Atlanta',  # Default - would need detail lookup
+                'state': 'GA',
+                'source_id': self.generate_source_id('ga_sos', control_number or company_name),
+                'signal_type': 'new_formation',
+                'signal_date': datetime.now().isoformat()[:10],
+                'employees_estimated': '1-5',
+                'raw_data': {
+                    'control_number': control_number,
+                    'status': status
+                }
+            }
+            
+            leads.append(lead)
+        
+        if not planner.stats['failed']:
+            watermarks.advance('ga_sos', 'GA', covered=end_date)
         
+        self.logger.info(f"Session: {PortalSession.summary(self.get_source_name())}")
         self.logger.info(f"Found {len(leads)} leads from GA SOS")
         return leads
 
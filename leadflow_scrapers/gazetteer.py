@@ -0,0 +1,323 @@
+"""
+Multi-state city gazetteer for address parsing
+
+City names for every state we scrape are loaded once into a token trie.
+find_city() walks the address tokens a single time, trying at each token
+the longest city name that starts there, so lookup is linear in the length
+of the address rather than in the size of the city list.
+
+Matches are whole tokens only ('allen' never matches inside 'Gallentine')
+and a city name followed by a street suffix ('123 Mission St'), or preceded
+by a house number without a comma, state or ZIP after it, is treated as a
+street. When several cities appear, the one closest to the state/ZIP at
+the end of the address wins.
+"""
+import re
+
+CITIES = {
+    'TX': [
+        'Houston', 'Dallas', 'San Antonio', 'Austin', 'Fort Worth', 'El Paso', 'Arlington',
+        'Corpus Christi', 'Plano', 'Laredo', 'Lubbock', 'Irving', 'Garland', 'Amarillo',
+        'Grand Prairie', 'Brownsville', 'McKinney', 'Frisco', 'Pasadena', 'Mesquite',
+        'Killeen', 'McAllen', 'Waco', 'Midland', 'Odessa', 'Beaumont', 'Denton', 'Carrollton',
+        'Round Rock', 'Lewisville', 'Tyler', 'College Station', 'Abilene', 'Pearland',
+        'San Angelo', 'League City', 'Allen', 'Longview', 'Sugar Land', 'Edinburg',
+        'Mission', 'Bryan', 'Pharr', 'Baytown', 'Temple', 'Missouri City', 'Flower Mound',
+        'North Richland Hills', 'Harlingen', 'Conroe', 'New Braunfels', 'Victoria', 'Cedar Park',
+        'Wichita Falls', 'Georgetown', 'Port Arthur', 'Texarkana', 'Katy', 'Spring', 'Humble',
+        'Cypress', 'The Woodlands', 'Nacogdoches', 'Lufkin', 'San Marcos', 'Kyle', 'Weatherford',
+    ],
+    'AR': [
+        'Little Rock', 'Fort Smith', 'Fayetteville', 'Springdale', 'Jonesboro',
+        'Rogers', 'Conway', 'North Little Rock', 'Bentonville', 'Pine Bluff',
+        'Hot Springs', 'Benton', 'Texarkana', 'Sherwood', 'Jacksonville',
+        'Bella Vista', 'Paragould', 'Cabot', 'Russellville', 'Searcy',
+        'Van Buren', 'El Dorado', 'Maumelle', 'Bryant', 'Siloam Springs',
+        'Lowell', 'West Memphis', 'Mountain Home', 'Harrison', 'Magnolia', 'Arkadelphia',
+    ],
+    'GA': [
+        'Atlanta', 'Augusta', 'Columbus', 'Macon', 'Savannah', 'Athens',
+        'Sandy Springs', 'Roswell', 'Johns Creek', 'Albany', 'Warner Robins',
+        'Alpharetta', 'Marietta', 'Valdosta', 'Smyrna', 'Brookhaven',
+        'Dunwoody', 'Peachtree Corners', 'Gainesville', 'Newnan', 'Dalton',
+        'Kennesaw', 'Lawrenceville', 'Duluth', 'Woodstock', 'Canton',
+        'Carrollton', 'Griffin', 'McDonough', 'Acworth', 'Rome',
+        'Stockbridge', 'Decatur', 'Norcross', 'Peachtree City', 'Statesboro', 'Hinesville', 'Douglasville',
+    ],
+    'TN': [
+        'Nashville', 'Memphis', 'Knoxville', 'Chattanooga', 'Clarksville', 'Murfreesboro',
+        'Franklin', 'Johnson City', 'Jackson', 'Hendersonville', 'Bartlett', 'Kingsport',
+        'Collierville', 'Smyrna', 'Cleveland', 'Brentwood', 'Germantown', 'Columbia',
+        'Spring Hill', 'La Vergne', 'Gallatin', 'Cookeville', 'Mount Juliet', 'Lebanon',
+        'Morristown', 'Oak Ridge', 'Maryville', 'Bristol', 'Farragut', 'Shelbyville', 'Tullahoma',
+    ],
+    'OK': [
+        'Oklahoma City', 'Tulsa', 'Norman', 'Broken Arrow', 'Edmond', 'Lawton', 'Moore',
+        'Midwest City', 'Enid', 'Stillwater', 'Owasso', 'Muskogee', 'Bixby', 'Shawnee',
+        'Yukon', 'Ardmore', 'Ponca City', 'Duncan', 'Del City', 'Jenks', 'Sand Springs',
+        'Sapulpa', 'Mustang', 'Bartlesville', 'Claremore', 'Bethany', 'Altus', 'Durant',
+        'Ada', 'McAlester', 'Tahlequah', 'Chickasha', 'Elk City', 'Guymon',
+    ],
+    'LA': [
+        'New Orleans', 'Baton Rouge', 'Shreveport', 'Lafayette', 'Lake Charles', 'Kenner',
+        'Bossier City', 'Monroe', 'Alexandria', 'Houma', 'Metairie', 'Marrero', 'Laplace',
+        'New Iberia', 'Slidell', 'Prairieville', 'Central', 'Ruston', 'Sulphur', 'Hammond',
+        'Natchitoches', 'Gretna', 'Opelousas', 'Zachary', 'Thibodaux', 'Pineville',
+        'Crowley', 'Baker', 'Covington', 'Mandeville', 'Broussard', 'Youngsville', 'Denham Springs',
+    ],
+    'AL': [
+        'Birmingham', 'Montgomery', 'Huntsville', 'Mobile', 'Tuscaloosa', 'Hoover', 'Dothan',
+        'Auburn', 'Decatur', 'Madison', 'Florence', 'Vestavia Hills', 'Prattville', 'Phenix City',
+        'Alabaster', 'Opelika', 'Northport', 'Enterprise', 'Daphne', 'Homewood', 'Bessemer',
+        'Athens', 'Pelham', 'Fairhope', 'Anniston', 'Trussville', 'Gadsden', 'Foley',
+        'Cullman', 'Albertville', 'Selma', 'Jasper', 'Troy',
+    ],
+    'MS': [
+        'Jackson', 'Gulfport', 'Southaven', 'Biloxi', 'Hattiesburg', 'Olive Branch', 'Tupelo',
+        'Meridian', 'Greenville', 'Horn Lake', 'Madison', 'Clinton', 'Pearl', 'Ridgeland',
+        'Starkville', 'Columbus', 'Vicksburg', 'Pascagoula', 'Brandon', 'Oxford', 'Gautier',
+        'Laurel', 'Hernando', 'Long Beach', 'Natchez', 'Corinth', 'Greenwood', 'Ocean Springs',
+        'Moss Point', 'McComb', 'Grenada', 'Brookhaven', 'Picayune',
+    ],
+    'FL': [
+        'Jacksonville', 'Miami', 'Tampa', 'Orlando', 'St Petersburg', 'Hialeah', 'Port St Lucie',
+        'Tallahassee', 'Cape Coral', 'Fort Lauderdale', 'Pembroke Pines', 'Hollywood', 'Gainesville',
+        'Miramar', 'Coral Springs', 'Lehigh Acres', 'Palm Bay', 'West Palm Beach', 'Clearwater',
+        'Brandon', 'Lakeland', 'Pompano Beach', 'Spring Hill', 'Miami Gardens', 'Davie',
+        'Boca Raton', 'Riverview', 'Sunrise', 'Plantation', 'Deltona', 'Fort Myers', 'Ocala',
+        'Pensacola', 'Sarasota', 'Kissimmee', 'Daytona Beach', 'Naples', 'Panama City', 'Doral',
+    ],
+    'NC': [
+        'Charlotte', 'Raleigh', 'Greensboro', 'Durham', 'Winston-Salem', 'Fayetteville', 'Cary',
+        'Wilmington', 'High Point', 'Concord', 'Asheville', 'Greenville', 'Gastonia', 'Jacksonville',
+        'Apex', 'Huntersville', 'Chapel Hill', 'Burlington', 'Rocky Mount', 'Kannapolis',
+        'Wake Forest', 'Wilson', 'Indian Trail', 'Mooresville', 'Holly Springs', 'Hickory',
+        'Monroe', 'Salisbury', 'Goldsboro', 'Matthews', 'Sanford', 'New Bern', 'Garner', 'Statesville',
+    ],
+    'SC': [
+        'Charleston', 'Columbia', 'North Charleston', 'Mount Pleasant', 'Rock Hill', 'Greenville',
+        'Summerville', 'Goose Creek', 'Sumter', 'Hilton Head Island', 'Florence', 'Spartanburg',
+        'Myrtle Beach', 'Greer', 'Aiken', 'Anderson', 'Mauldin', 'Greenwood', 'North Augusta',
+        'Easley', 'Simpsonville', 'Hanahan', 'Lexington', 'Conway', 'West Columbia',
+        'North Myrtle Beach', 'Clemson', 'Orangeburg', 'Cayce', 'Bluffton', 'Beaufort', 'Fort Mill',
+    ],
+    'KY': [
+        'Louisville', 'Lexington', 'Bowling Green', 'Owensboro', 'Covington', 'Richmond',
+        'Georgetown', 'Florence', 'Hopkinsville', 'Nicholasville', 'Elizabethtown', 'Henderson',
+        'Frankfort', 'Independence', 'Jeffersontown', 'Paducah', 'Radcliff', 'Ashland',
+        'Madisonville', 'Murray', 'Erlanger', 'Winchester', 'St Matthews', 'Danville',
+        'Fort Thomas', 'Newport', 'Shively', 'Shelbyville', 'Glasgow', 'Berea', 'Bardstown', 'Somerset',
+    ],
+    'MO': [
+        'Kansas City', 'St Louis', 'Springfield', 'Columbia', 'Independence', "Lee's Summit",
+        "O'Fallon", 'St Joseph', 'St Charles', 'St Peters', 'Blue Springs', 'Florissant', 'Joplin',
+        'Chesterfield', 'Jefferson City', 'Cape Girardeau', 'Wildwood', 'University City',
+        'Ballwin', 'Raytown', 'Liberty', 'Wentzville', 'Mehlville', 'Kirkwood', 'Maryland Heights',
+        'Hazelwood', 'Gladstone', 'Grandview', 'Belton', 'Raymore', 'Sedalia', 'Rolla', 'Branson',
+    ],
+    'KS': [
+        'Wichita', 'Overland Park', 'Kansas City', 'Olathe', 'Topeka', 'Lawrence', 'Shawnee',
+        'Lenexa', 'Manhattan', 'Salina', 'Hutchinson', 'Leavenworth', 'Leawood', 'Dodge City',
+        'Garden City', 'Emporia', 'Derby', 'Junction City', 'Prairie Village', 'Liberal',
+        'Hays', 'Pittsburg', 'Gardner', 'Newton', 'Great Bend', 'McPherson', 'El Dorado',
+        'Ottawa', 'Arkansas City', 'Winfield', 'Andover', 'Merriam', 'Haysville', 'Atchison',
+    ],
+    'NM': [
+        'Albuquerque', 'Las Cruces', 'Rio Rancho', 'Santa Fe', 'Roswell', 'Farmington',
+        'Hobbs', 'Clovis', 'Carlsbad', 'Alamogordo', 'Gallup', 'Los Lunas', 'Deming',
+        'Sunland Park', 'Las Vegas', 'Portales', 'Los Alamos', 'Artesia', 'Lovington',
+        'Silver City', 'Espanola', 'Anthony', 'Grants', 'Socorro', 'Bernalillo', 'Belen',
+        'Bloomfield', 'Ruidoso', 'Taos', 'Aztec', 'Raton', 'Truth or Consequences',
+    ],
+    'AZ': [
+        'Phoenix', 'Tucson', 'Mesa', 'Chandler', 'Gilbert', 'Glendale', 'Scottsdale', 'Peoria',
+        'Tempe', 'Surprise', 'San Tan Valley', 'Yuma', 'Avondale', 'Goodyear', 'Flagstaff',
+        'Buckeye', 'Lake Havasu City', 'Casa Grande', 'Maricopa', 'Sierra Vista', 'Prescott',
+        'Oro Valley', 'Prescott Valley', 'Queen Creek', 'Marana', 'Bullhead City', 'Apache Junction',
+        'El Mirage', 'Kingman', 'Sahuarita', 'Fountain Hills', 'Florence', 'Nogales', 'Douglas',
+    ],
+    'CO': [
+        'Denver', 'Colorado Springs', 'Aurora', 'Fort Collins', 'Lakewood', 'Thornton', 'Arvada',
+        'Westminster', 'Pueblo', 'Centennial', 'Boulder', 'Greeley', 'Longmont', 'Loveland',
+        'Broomfield', 'Grand Junction', 'Castle Rock', 'Commerce City', 'Parker', 'Littleton',
+        'Northglenn', 'Brighton', 'Englewood', 'Wheat Ridge', 'Fountain', 'Lafayette',
+        'Windsor', 'Erie', 'Evans', 'Golden', 'Louisville', 'Durango', 'Montrose', 'Sterling',
+    ],
+    'CA': [
+        'Los Angeles', 'San Diego', 'San Jose', 'San Francisco', 'Fresno', 'Sacramento',
+        'Long Beach', 'Oakland', 'Bakersfield', 'Anaheim', 'Santa Ana', 'Riverside', 'Stockton',
+        'Irvine', 'Chula Vista', 'Fremont', 'San Bernardino', 'Modesto', 'Fontana', 'Oxnard',
+        'Moreno Valley', 'Huntington Beach', 'Glendale', 'Santa Clarita', 'Ontario', 'Elk Grove',
+        'Corona', 'Rancho Cucamonga', 'Oceanside', 'Garden Grove', 'Lancaster', 'Palmdale',
+        'Salinas', 'Hayward', 'Pomona', 'Escondido', 'Sunnyvale', 'Torrance', 'Pasadena',
+        'Visalia', 'Victorville', 'Santa Rosa', 'Temecula', 'Murrieta', 'Ventura', 'Concord',
+    ],
+    'OH': [
+        'Columbus', 'Cleveland', 'Cincinnati', 'Toledo', 'Akron', 'Dayton', 'Parma', 'Canton',
+        'Youngstown', 'Lorain', 'Hamilton', 'Springfield', 'Kettering', 'Elyria', 'Lakewood',
+        'Cuyahoga Falls', 'Middletown', 'Euclid', 'Newark', 'Mansfield', 'Mentor', 'Beavercreek',
+        'Cleveland Heights', 'Strongsville', 'Dublin', 'Fairfield', 'Findlay', 'Warren',
+        'Lancaster', 'Lima', 'Huber Heights', 'Westerville', 'Marion', 'Grove City', 'Delaware',
+    ],
+    'PA': [
+        'Philadelphia', 'Pittsburgh', 'Allentown', 'Reading', 'Erie', 'Scranton', 'Bethlehem',
+        'Lancaster', 'Harrisburg', 'Altoona', 'York', 'State College', 'Wilkes-Barre',
+        'Chester', 'Norristown', 'Easton', 'Lebanon', 'Hazleton', 'New Castle', 'Johnstown',
+        'McKeesport', 'Williamsport', 'Pottstown', 'Hermitage', 'Sharon', 'Chambersburg',
+        'Carlisle', 'King of Prussia', 'West Chester', 'Levittown', 'Bensalem', 'Monroeville',
+        'Doylestown', 'Butler', 'Washington', 'Greensburg', 'Pottsville',
+    ],
+    'IL': [
+        'Chicago', 'Aurora', 'Joliet', 'Naperville', 'Rockford', 'Springfield', 'Elgin',
+        'Peoria', 'Champaign', 'Waukegan', 'Cicero', 'Bloomington', 'Arlington Heights',
+        'Evanston', 'Schaumburg', 'Bolingbrook', 'Palatine', 'Skokie', 'Des Plaines',
+        'Orland Park', 'Tinley Park', 'Oak Lawn', 'Berwyn', 'Mount Prospect', 'Normal',
+        'Wheaton', 'Hoffman Estates', 'Oak Park', 'Downers Grove', 'Elmhurst', 'Glenview',
+        'DeKalb', 'Moline', 'Decatur', 'Carbondale', 'Danville', 'Quincy', 'Kankakee',
+    ],
+    'NY': [
+        'New York', 'Brooklyn', 'Bronx', 'Queens', 'Staten Island', 'Manhattan', 'Buffalo',
+        'Rochester', 'Yonkers', 'Syracuse', 'Albany', 'New Rochelle', 'Mount Vernon',
+        'Schenectady', 'Utica', 'White Plains', 'Hempstead', 'Troy', 'Niagara Falls',
+        'Binghamton', 'Freeport', 'Valley Stream', 'Long Beach', 'Rome', 'Ithaca',
+        'Poughkeepsie', 'Newburgh', 'Jamestown', 'Elmira', 'Saratoga Springs', 'Watertown',
+        'Middletown', 'Kingston', 'Plattsburgh', 'Hicksville', 'Jamaica', 'Flushing', 'Long Island City',
+    ],
+}
+
+# Tokens after a place name that mean it is part of a street name
+STREET_SUFFIXES = {
+    'st', 'street', 'ave', 'avenue', 'rd', 'road', 'blvd', 'boulevard', 'dr', 'drive',
+    'ln', 'lane', 'way', 'pkwy', 'parkway', 'hwy', 'highway', 'ct', 'court', 'cir',
+    'circle', 'pl', 'place', 'trl', 'trail', 'fwy', 'freeway', 'expy', 'loop', 'ter',
+    'terrace', 'plz', 'plaza', 'sq', 'row', 'run', 'pike', 'ste', 'suite',
+}
+
+# Street-name tokens that can precede a place name ('N Dallas Pkwy', 'Old Katy Rd')
+STREET_PREFIXES = {'n', 's', 'e', 'w', 'ne', 'nw', 'se', 'sw', 'north', 'south', 'east', 'west', 'old'}
+
+STATE_CODES = {state.lower() for state in CITIES}
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:['\-][a-z0-9]+)*|,")
+ZIP_RE = re.compile(r'^\d{5}$')
+
+# Word forms that differ only in punctuation or abbreviation
+ALIASES = {'saint': 'st', 'ft': 'fort', 'mt': 'mount'}
+
+
+def tokenize(text: str) -> list:
+    """Lowercase word tokens, with ',' kept as a segment separator"""
+    tokens = TOKEN_RE.findall(text.lower())
+    return [ALIASES.get(token, token) for token in tokens]
+
+
+class Gazetteer:
+    """Token trie over city names, each terminal holding {state: display name}"""
+
+    def __init__(self, cities: dict = CITIES):
+        self.root = {}
+        self.size = 0
+        for state, names in cities.items():
+            for name in names:
+                self.add(name, state)
+
+    def add(self, name: str, state: str):
+        node = self.root
+        for token in tokenize(name):
+            node = node.setdefault(token, {})
+        node.setdefault(None, {})[state] = name
+        self.size += 1
+
+    def candidates(self, tokens: list):
+        """(start, end, {state: name}) for the longest city name starting at each token"""
+        for start in range(len(tokens)):
+            node = self.root
+            best = None
+            for end in range(start, len(tokens)):
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                if None in node:
+                    best = (start, end + 1, node[None])
+            if best:
+                yield best
+
+    def find_city(self, address: str, state: str = None) -> str:
+        """City named in an address, or '' if none is recognized"""
+        if not address:
+            return ''
+        tokens = tokenize(address)
+        best = None
+        covered = 0
+
+        for start, end, states in self.candidates(tokens):
+            if state:
+                name = states.get(state.upper())
+                if not name:
+                    continue
+            else:
+                name = next(iter(states.values()))
+
+            # 'Little Rock' inside 'North Little Rock' is not a separate match
+            if start < covered:
+                continue
+            covered = end
+
+            following = tokens[end] if end < len(tokens) else None
+            preceding = tokens[start - 1] if start else None
+
+            # '123 Mission St', 'N Dallas Pkwy' are streets, not cities
+            if following in STREET_SUFFIXES:
+                continue
+
+            # Right before a comma, state code, ZIP or the end of the address
+            anchored = following in (None, ',') or following in STATE_CODES or bool(ZIP_RE.match(following))
+            if not anchored and preceding and (preceding.isdigit() or preceding in STREET_PREFIXES):
+                continue
+            rank = (anchored, start)
+            if best is None or rank > best[0]:
+                best = (rank, name)
+
+        return best[1] if best else ''
+
+    def find_cities(self, addresses, state: str = None) -> list:
+        """find_city() over a list of addresses"""
+        return [self.find_city(address, state) for address in addresses]
+
+
+_default = None
+
+
+def get_gazetteer() -> Gazetteer:
+    """Shared gazetteer, built once per process"""
+    global _default
+    if _default is None:
+        _default = Gazetteer()
+    return _default
+
+
+def find_city(address: str, state: str = None) -> str:
+    return get_gazetteer().find_city(address, state)
+
+
+def find_cities(addresses, state: str = None) -> list:
+    return get_gazetteer().find_cities(addresses, state)
+
+
+def fill_missing_cities(leads: list) -> int:
+    """
+    Set 'city' on leads that have none ('' or 'Unknown') from any address
+    the scraper kept. Returns the number of leads filled.
+    """
+    gazetteer = get_gazetteer()
+    filled = 0
+    for lead in leads:
+        if lead.get('city') and lead['city'] != 'Unknown':
+            continue
+        raw = lead.get('raw_data') or {}
+        address = lead.get('address') or raw.get('address') or raw.get('physical_address')
+        city = gazetteer.find_city(address, lead.get('state')) if address else ''
+        if city:
+            lead['city'] = city
+            filled += 1
+    return filled
@@ -0,0 +1,222 @@
+"""
+Shared HTTP transport for LeadFlow scrapers
+
+By default every request goes through a pooled HTTP/1.1 requests.Session.
+Set LEADFLOW_HTTP2=1 to send HTTPS traffic over HTTP/2 instead, so bursts of
+small requests to one origin (SAFER snapshots, OSHA inspections, Socrata
+resources) multiplex over a single connection. HTTP/2 needs the optional
+httpx[http2] package; without it, or when a host doesn't speak HTTP/2, the
+transport falls back to HTTP/1.1 automatically.
+
+Scrapers use get()/post()/new_session() exactly like the requests functions.
+"""
+import os
+import logging
+import threading
+from http.client import HTTPMessage
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+import requests
+from requests.adapters import HTTPAdapter, BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from requests.cookies import extract_cookies_to_jar
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger('http_client')
+
+HTTP2_ENABLED = os.getenv('LEADFLOW_HTTP2', '').lower() in ('1', 'true', 'yes')
+
+# Connections kept open per host on the HTTP/1.1 path
+POOL_CONNECTIONS = 20
+POOL_MAXSIZE = 20
+
+# Connection-specific headers are illegal in HTTP/2
+HOP_BY_HOP_HEADERS = {'connection', 'keep-alive', 'proxy-connection', 'transfer-encoding', 'upgrade'}
+
+
+class _OriginalResponse:
+    """What requests reads Set-Cookie headers from (urllib3's http.client response)"""
+
+    def __init__(self, headers):
+        self.msg = HTTPMessage()
+        for name, value in headers:
+            self.msg[name] = value
+
+
+class _StreamingBody:
+    """Minimal urllib3-style raw body so Response.iter_content() works"""
+
+    def __init__(self, response):
+        self._response = response
+        self._iterator = None
+        self._buffer = b''
+        # Lets requests store cookies in response.cookies and the session jar
+        self._original_response = _OriginalResponse(response.headers.multi_items())
+
+    def stream(self, chunk_size=None, decode_content=True):
+        for chunk in self._response.iter_bytes(chunk_size):
+            yield chunk
+        self._response.close()
+
+    def read(self, amt=None, decode_content=True):
+        if self._iterator is None:
+            self._iterator = self._response.iter_bytes()
+        while amt is None or len(self._buffer) < amt:
+            try:
+                self._buffer += next(self._iterator)
+            except StopIteration:
+                break
+        if amt is None:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:amt], self._buffer[amt:]
+        return data
+
+    def close(self):
+        self._response.close()
+
+    def release_conn(self):
+        self._response.close()
+
+
+class HTTP2Adapter(BaseAdapter):
+    """
+    requests adapter that sends over an httpx HTTP/2 client.
+    ALPN picks HTTP/1.1 for servers without HTTP/2; if the HTTP/2 client
+    itself fails, the host is pinned to the pooled HTTP/1.1 adapter.
+    """
+
+    def __init__(self, verify=True, max_connections=POOL_MAXSIZE, transport=None):
+        super().__init__()
+        self.fallback = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+        self.verify = verify
+        self.client = httpx.Client(
+            http2=True,
+            verify=verify,
+            limits=httpx.Limits(max_connections=max_connections),
+            follow_redirects=False,
+            # The requests session jar is the only cookie store; httpx's own
+            # would keep sending cookies after PortalSession.clear()
+            cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+            transport=transport,
+        )
+        self.http1_hosts = set()
+        self.stats = {'http2': 0, 'http1': 0, 'fallback': 0}
+        self._lock = threading.Lock()
+
+    def _timeout(self, timeout):
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return httpx.Timeout(read, connect=connect)
+        return httpx.Timeout(timeout)
+
+    def _use_fallback(self, request, **kwargs):
+        with self._lock:
+            self.stats['fallback'] += 1
+        return self.fallback.send(request, **kwargs)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        host = requests.utils.urlparse(request.url).netloc
+        if host in self.http1_hosts or proxies or cert or verify != self.verify:
+            return self._use_fallback(request, stream=stream, timeout=timeout,
+                                      verify=verify, cert=cert, proxies=proxies)
+
+        try:
+            upstream = self.client.send(
+                self.client.build_request(
+                    request.method, request.url,
+                    headers={k: v for k, v in request.headers.items()
+                             if k.lower() not in HOP_BY_HOP_HEADERS},
+                    content=request.body,
+                    timeout=self._timeout(timeout),
+                ),
+                stream=True,
+            )
+        except (httpx.ConnectError, httpx.RemoteProtocolError, httpx.LocalProtocolError) as e:
+            logger.info(f"HTTP/2 failed for {host} ({e}), falling back to HTTP/1.1")
+            self.http1_hosts.add(host)
+            return self._use_fallback(request, stream=stream, timeout=timeout,
+                                      verify=verify, cert=cert, proxies=proxies)
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(e, request=request)
+        except httpx.HTTPError as e:
+            raise requests.ConnectionError(e, request=request)
+
+        with self._lock:
+            self.stats['http2' if upstream.http_version == 'HTTP/2' else 'http1'] += 1
+        return self.build_response(request, upstream, stream)
+
+    def build_response(self, request, upstream, stream):
+        response = requests.Response()
+        response.status_code = upstream.status_code
+        # Repeated headers are joined as urllib3 does; Set-Cookie is read from raw
+        headers = CaseInsensitiveDict()
+        for name, value in upstream.headers.multi_items():
+            headers[name] = f"{headers[name]}, {value}" if name in headers else value
+        response.headers = headers
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.reason = upstream.reason_phrase
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.raw = _StreamingBody(upstream)
+        extract_cookies_to_jar(response.cookies, request, response.raw)
+        if not stream:
+            try:
+                response._content = upstream.read()
+                response.elapsed = upstream.elapsed
+            finally:
+                upstream.close()
+        return response
+
+    def close(self):
+        self.client.close()
+        self.fallback.close()
+
+
+def new_session(http2: bool = None, verify: bool = True) -> requests.Session:
+    """Session with the configured transport mounted"""
+    if http2 is None:
+        http2 = HTTP2_ENABLED
+
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE))
+
+    if http2 and httpx is not None:
+        try:
+            session.mount('https://', HTTP2Adapter(verify=verify))
+            return session
+        except ImportError:
+            # httpx is installed without the h2 extra
+            logger.warning("HTTP/2 requested but h2 is not installed, using HTTP/1.1")
+    elif http2:
+        logger.warning("HTTP/2 requested but httpx is not installed, using HTTP/1.1")
+
+    session.mount('https://', HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE))
+    return session
+
+
+_shared_session = None
+_shared_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Process-wide session so repeated requests to a host share connections"""
+    global _shared_session
+    if _shared_session is None:
+        with _shared_lock:
+            if _shared_session is None:
+                _shared_session = new_session()
+    return _shared_session
+
+
+def get(url, params=None, **kwargs) -> requests.Response:
+    return get_session().get(url, params=params, **kwargs)
+
+
+def post(url, data=None, json=None, **kwargs) -> requests.Response:
+    return get_session().post(url, data=data, json=json, **kwargs)
@@ -0,0 +1,181 @@
+"""
+Industry classification shared by all scrapers
+
+Every keyword in the taxonomy is compiled into one Aho-Corasick automaton,
+so a company name is classified in a single left-to-right pass no matter
+how many keywords there are. When a name matches several industries the
+one with the highest priority wins; ties go to the longest keyword and then
+the earliest match. Results never depend on dict ordering.
+
+Keywords match at the start of a word ('electric' matches ELECTRICAL but
+'tree' does not match STREET). A trailing '$' makes a keyword whole-word
+only ('bar$' matches BAR & GRILL but not BARBER).
+"""
+from collections import deque
+from functools import lru_cache
+import name_normalizer
+
+# industry -> (priority, keywords)
+TAXONOMY = {
+    'Construction': (100, [
+        'construction', 'builder', 'contractor', 'roofing', 'concrete', 'framing',
+        'drywall', 'excavation', 'grading', 'paving',
+    ]),
+    'Trucking': (95, [
+        'trucking', 'freight', 'transport', 'hauling', 'logistics', 'carrier', 'moving',
+    ]),
+    'Oilfield': (90, [
+        'oilfield', 'drilling', 'petroleum', 'energy', 'wellhead', 'pipeline', 'frac$',
+    ]),
+    'Electrical': (85, ['electric', 'wiring', 'power']),
+    'Plumbing': (85, ['plumbing', 'plumber', 'hvac', 'heating', 'cooling', 'air conditioning']),
+    'Manufacturing': (80, [
+        'manufactur', 'fabrication', 'machine', 'weld', 'metal', 'industrial',
+    ]),
+    'Medical': (80, [
+        'medical', 'health', 'clinic', 'dental', 'therapy', 'chiropractic', 'physician', 'wellness',
+    ]),
+    'Landscaping': (75, ['landscap', 'lawn', 'garden', 'tree service', 'tree$', 'irrigation']),
+    'Restaurant': (70, ['restaurant', 'cafe', 'grill', 'kitchen', 'food', 'catering', 'bar$', 'tavern']),
+    'Cleaning': (70, ['cleaning', 'janitorial', 'maid', 'sanitation']),
+    'Auto Services': (70, ['auto', 'mechanic', 'body shop', 'tire', 'collision']),
+    'Staffing': (65, ['staffing', 'employment', 'recruiting', 'temp$', 'personnel']),
+    'Warehouse': (65, ['warehouse', 'storage', 'distribution', 'fulfillment']),
+    'Technology': (50, ['technology', 'software', 'tech', 'digital', 'it services', 'it$', 'computer']),
+    'Wholesale': (45, ['wholesale', 'distributor', 'supply']),
+    'Retail': (40, ['retail', 'store', 'shop', 'boutique', 'sales']),
+    'Real Estate': (35, ['real estate', 'realty', 'property', 'investment']),
+    'Consulting': (30, ['consulting', 'consultant', 'advisory', 'management']),
+}
+
+CACHE_SIZE = 200_000
+
+
+class KeywordClassifier:
+    """Aho-Corasick automaton over a {label: (priority, keywords)} taxonomy"""
+
+    def __init__(self, taxonomy: dict, cache_size: int = CACHE_SIZE):
+        # goto[state] maps a character to the next state
+        self.goto = [{}]
+        self.fail = [0]
+        # out[state] lists (length, priority, label, whole_word) for keywords ending here
+        self.out = [[]]
+
+        for label, (priority, keywords) in taxonomy.items():
+            for keyword in keywords:
+                whole_word = keyword.endswith('$')
+                self._add(keyword.rstrip('$').lower(), (priority, label, whole_word))
+        self._link()
+
+        self.classify = lru_cache(maxsize=cache_size)(self._classify)
+
+    def _add(self, keyword, payload):
+        state = 0
+        for char in keyword:
+            nxt = self.goto[state].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][char] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            state = nxt
+        priority, label, whole_word = payload
+        self.out[state].append((len(keyword), priority, label, whole_word))
+
+    def _link(self):
+        """
+        Breadth-first failure links; outputs of the fail state are inherited.
+        Failure transitions are then folded into each state's table so that
+        matching is one dict lookup per character.
+        """
+        order = []
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            order.append(state)
+            for char, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(char, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+        # BFS order guarantees a state's fail target is complete before it
+        self.delta = [dict(self.goto[0])] + [None] * (len(self.goto) - 1)
+        for state in order:
+            table = dict(self.delta[self.fail[state]])
+            table.update(self.goto[state])
+            self.delta[state] = table
+
+    def matches(self, text: str):
+        """Yield (start, length, priority, label) for every keyword hit at a word start"""
+        text = text.lower()
+        delta, out = self.delta, self.out
+        state = 0
+        last = len(text) - 1
+        for i, char in enumerate(text):
+            state = delta[state].get(char, 0)
+            if not out[state]:
+                continue
+            for length, priority, label, whole_word in out[state]:
+                start = i - length + 1
+                if start and text[start - 1].isalnum():
+                    continue
+                if whole_word and i < last and text[i + 1].isalnum():
+                    continue
+                yield start, length, priority, label
+
+    def _classify(self, name: str):
+        best = None
+        for start, length, priority, label in self.matches(name):
+            key = (priority, length, -start)
+            if best is None or key > best[0]:
+                best = (key, label)
+        return best[1] if best else None
+
+    def classify_name(self, name: str, default: str = 'Other') -> str:
+        if not name:
+            return default
+        return self.classify(name) or default
+
+    def classify_batch(self, names, default: str = 'Other') -> list:
+        """Classify a whole list of names; repeated names hit the cache"""
+        classify = self.classify
+        return [(classify(name) or default) if name else default for name in names]
+
+    def cache_stats(self) -> dict:
+        info = self.classify.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            'hits': info.hits,
+            'misses': info.misses,
+            'size': info.currsize,
+            'hit_rate': info.hits / lookups if lookups else 0.0,
+        }
+
+
+# Shared classifier for company names, compiled once per process
+_default = None
+
+
+def get_classifier() -> KeywordClassifier:
+    global _default
+    if _default is None:
+        _default = KeywordClassifier(TAXONOMY)
+    return _default
+
+
+def classify(name: str, default: str = 'Other') -> str:
+    """
+    Industry for a company name. The canonical key is classified, so
+    abbreviations like CONSTR or MFG count and spelling variants of a name
+    share one cache entry.
+    """
+    return get_classifier().classify_name(name_normalizer.canonical_key(name), default)
+
+
+def classify_batch(names, default: str = 'Other') -> list:
+    """Industries for a list of company names"""
+    return get_classifier().classify_batch(name_normalizer.canonical_keys(names), default)
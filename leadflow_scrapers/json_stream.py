@@ -0,0 +1,98 @@
+"""
+Incremental JSON parsing for large API responses
+
+Socrata and the FMCSA QC API return one big JSON array per page. Calling
+response.json() buffers the whole body and materializes every record before
+the first lead is built. iter_json_array() instead decodes the response
+stream and yields array elements one at a time, so memory stays bounded by
+the largest single record rather than the page size.
+"""
+import re
+import json
+import codecs
+
+CHUNK_SIZE = 64 * 1024
+
+# Consumed text is dropped from the buffer once it grows past this
+TRIM_THRESHOLD = 256 * 1024
+
+WHITESPACE = ' \t\n\r'
+SEPARATORS = WHITESPACE + ',]'
+
+_decoder = json.JSONDecoder()
+
+
+def _text_chunks(response, chunk_size):
+    decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        if chunk:
+            yield decoder.decode(chunk)
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def iter_json_array(response, key: str = None, chunk_size: int = CHUNK_SIZE):
+    """
+    Yield the elements of a JSON array from a streamed response.
+    With key=None the body itself must be an array; otherwise the array is
+    the value of that key in the top-level object (e.g. 'content').
+    Request the response with stream=True for memory to stay bounded.
+    """
+    chunks = _text_chunks(response, chunk_size)
+    buf = ''
+    pos = 0
+    exhausted = False
+
+    def fill():
+        nonlocal buf, pos, exhausted
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            exhausted = True
+            return False
+        if pos > TRIM_THRESHOLD:
+            buf = buf[pos:]
+            pos = 0
+        buf += chunk
+        return True
+
+    # Find the opening bracket of the array
+    if key is None:
+        start_re = re.compile(r'\s*\[')
+    else:
+        start_re = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+    while True:
+        match = start_re.match(buf) if key is None else start_re.search(buf)
+        if match:
+            pos = match.end()
+            break
+        if not fill():
+            return
+
+    while True:
+        # Skip separators between elements
+        while True:
+            while pos < len(buf) and (buf[pos] in WHITESPACE or buf[pos] == ','):
+                pos += 1
+            if pos < len(buf) or not fill():
+                break
+
+        if pos >= len(buf):
+            raise ValueError('Unterminated JSON array in response')
+        if buf[pos] == ']':
+            return
+
+        try:
+            item, end = _decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if fill():
+                continue
+            raise
+
+        # A number or literal may have been cut mid-token at a chunk boundary
+        if (end >= len(buf) or buf[end] not in SEPARATORS) and not exhausted and fill():
+            continue
+
+        pos = end
+        yield item
@@ -7,10 +7,13 @@ Most states have public license lookup portals.
 """
 
 import requests
-from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
+from datetime import datetime
 import time
-import re
+from industry_classifier import KeywordClassifier
+from form_engine import FormEngine, FormError
+from table_spec import TableSpec, Column
+import name_normalizer
+import watermarks
 from supabase import create_client
 import os
 
@@ -23,17 +26,50 @@ HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
 }
 
-# State license boards
+# Results columns shared by most board configs: licensee, license number,
+# license type, city, status, issue date
+LICENSE_RESULTS = TableSpec(
+    table_text='License',
+    min_cells=4,
+    columns=[
+        Column('name', 0),
+        Column('license_number', 1),
+        Column('license_type', 2),
+        Column('city', 3),
+        Column('status', 4),
+        Column('issued', 5),
+    ],
+)
+
+# State license boards. 'form' drives form_engine.FormEngine; field and
+# button names match by suffix, so ASP.NET control prefixes can be left off.
+# '{license_type}', '{start_date}' and '{end_date}' are filled in per search.
 LICENSE_BOARDS = {
     'TX': {
         'name': 'Texas Department of Licensing and Regulation',
         'url': 'https://www.tdlr.texas.gov/LicenseSearch/',
-        'types': ['HVAC', 'Electrician', 'Plumber']
+        'types': ['HVAC', 'Electrician', 'Plumber'],
+        'form': {
+            'url': 'https://www.tdlr.texas.gov/LicenseSearch/',
+            'fields': {'pgm': '{license_type}', 'issueDateFrom': '{start_date}', 'issueDateTo': '{end_date}'},
+            'submit': 'Search',
+            'results': LICENSE_RESULTS,
+            'pager': 'link',
+        },
     },
     'GA': {
         'name': 'Georgia Secretary of State',
         'url': 'https://verify.sos.ga.gov/',
-        'types': ['Contractor', 'Electrician', 'Plumber']
+        # Matched against the license type dropdown's labels ('Electrical Contractor ...')
+        'types': ['Contractor', 'Electrical', 'Plumber'],
+        'form': {
+            'url': 'https://verify.sos.ga.gov/verification/Search.aspx',
+            'form': 'aspnetForm',
+            'fields': {'ddLicenseType': '{license_type}', 'txtIssueDateFrom': '{start_date}'},
+            'submit': 'btnSearch',
+            'results': LICENSE_RESULTS,
+            'pager': 'postback',
+        },
     },
     'TN': {
         'name': 'Tennessee Board for Licensing Contractors',
@@ -57,74 +93,116 @@ LICENSE_BOARDS = {
     },
 }
 
+# Issue dates as boards print them
+DATE_FORMATS = ['%m/%d/%Y', '%Y-%m-%d', '%m-%d-%Y', '%b %d, %Y']
+
+# industry -> (priority, license type keywords); trade licenses beat generic "contractor"
 LICENSE_TYPE_TO_INDUSTRY = {
-    'contractor': 'Construction',
-    'general contractor': 'Construction',
-    'building contractor': 'Construction',
-    'roofing': 'Construction',
-    'hvac': 'Plumbing',
-    'air conditioning': 'Plumbing',
-    'plumb': 'Plumbing',
-    'electric': 'Electrical',
+    'Electrical': (90, ['electric']),
+    'Plumbing': (90, ['hvac', 'air conditioning', 'plumb']),
+    'Construction': (80, ['contractor', 'general contractor', 'building contractor', 'roofing']),
 }
 
+license_classifier = KeywordClassifier(LICENSE_TYPE_TO_INDUSTRY)
+
 
 def determine_industry(license_type):
     """Determine industry from license type"""
-    type_lower = license_type.lower()
-    
-    for keyword, industry in LICENSE_TYPE_TO_INDUSTRY.items():
-        if keyword in type_lower:
-            return industry
-    
-    return 'Construction'
-
-
-def scrape_texas_licenses(days_back=7):
-    """Scrape Texas TDLR for new licenses"""
-    leads = []
-    
-    # TDLR has a public search portal
-    # Would need to implement form submission for actual search
-    
-    return leads
-
-
-def scrape_georgia_licenses(days_back=7):
-    """Scrape Georgia SOS for new contractor licenses"""
-    leads = []
-    
-    url = "https://verify.sos.ga.gov/verification/Search.aspx"
-    
-    try:
-        # Would need to implement actual search
-        pass
-        
-    except Exception as e:
-        print(f"[License-GA] Error: {e}")
-    
-    return leads
+    return license_classifier.classify_name(license_type, default='Construction')
+
+
+def parse_issued(text):
+    """Issue date from a results cell, or None"""
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text.strip(), fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def license_lead(state, row, license_type):
+    """Lead dict for one license row"""
+    issued = parse_issued(row.get('issued', ''))
+    return {
+        'company_name': name_normalizer.display_name(row['name']),
+        'industry': determine_industry(row.get('license_type') or license_type),
+        'city': (row.get('city') or '').title() or 'Unknown',
+        'state': state,
+        'zip': '',
+        'phone': '',
+        'email': '',
+        'signal_type': 'new_license',
+        'signal_date': (issued or datetime.now()).strftime('%Y-%m-%d'),
+        'source': 'license_scraper',
+        'source_id': f"LICENSE-{state}-{row.get('license_number') or name_normalizer.name_id(row['name'])}",
+        'employees_estimated': '1-5',
+        'priority': 'HIGH',
+        'score': 80,
+        'lead_type': 'likely_uninsured',
+        'stage': 'new',
+        'owner': 'Unassigned',
+        'raw_data': {
+            'license_number': row.get('license_number', ''),
+            'license_type': row.get('license_type') or license_type,
+            'status': row.get('status', ''),
+            'issued': row.get('issued', ''),
+        },
+    }
+
+
+def scrape_board(state, days_back=7, engine=None, since=None, until=None, stats=None):
+    """
+    Search one board's form for every license type and build leads, from the
+    board's watermark or an explicit since/until window (backfill)
+    """
+    board = LICENSE_BOARDS[state]
+    config = board.get('form')
+    if not config:
+        print(f"[License-{state}] No form config for {board['name']}, skipping")
+        return []
+
+    engine = engine or FormEngine(config)
+    window = since is not None
+    end_date = until or datetime.now()
+    start_date = since if window else watermarks.since('licenses', state, days_back)
+    dates = {'start_date': start_date.strftime('%m/%d/%Y'), 'end_date': end_date.strftime('%m/%d/%Y')}
+
+    leads = {}
+    failed = 0
+    for license_type in board['types']:
+        values = {key: value.format(license_type=license_type, **dates)
+                  for key, value in config.get('fields', {}).items()}
+        try:
+            rows = engine.search(values)
+        except (FormError, requests.RequestException) as e:
+            print(f"[License-{state}] {license_type} search failed: {e}")
+            failed += 1
+            continue
+
+        for row in rows:
+            if not row.get('name') or len(row['name']) < 3:
+                continue
+            issued = parse_issued(row.get('issued', ''))
+            # Boards that ignore the date filter still print the issue date
+            if issued and (issued < start_date or issued > end_date):
+                continue
+            lead = license_lead(state, row, license_type)
+            leads.setdefault(lead['source_id'], lead)
+
+    print(f"[License-{state}] {engine.summary()}, {len(leads)} leads")
+    if not failed and not window:
+        watermarks.advance('licenses', state, covered=end_date)
+    if stats is not None:
+        stats.update(rows=engine.stats['rows'], complete=not failed)
+    return list(leads.values())
 
 
 def scrape_contractor_licenses(state, days_back=7):
     """Scrape contractor licenses for a state"""
-    leads = []
-    
     if state not in LICENSE_BOARDS:
-        return leads
-    
-    board = LICENSE_BOARDS[state]
-    
-    # State-specific implementations
-    if state == 'TX':
-        return scrape_texas_licenses(days_back)
-    elif state == 'GA':
-        return scrape_georgia_licenses(days_back)
-    
-    # Generic approach for other states
-    # Most require form submission
-    
-    return leads
+        return []
+    return scrape_board(state, days_back)
 
 
 def run_license_scraper(states=None):
@@ -0,0 +1,192 @@
+"""
+Company name normalization shared by scrapers, dedup and classification
+
+canonical_key() reduces a company name to the form used for comparison:
+accents folded to ASCII, '&' spelled out, punctuation dropped (so L.L.C.
+becomes LLC), common abbreviations expanded, and legal suffixes such as
+LLC / INC / CO stripped from the end. "Smith Bros. Constr., L.L.C." and
+"SMITH BROTHERS CONSTRUCTION LLC" both become
+"SMITH BROTHERS CONSTRUCTION".
+
+Keys are memoized in a bounded LRU since the same names come back from
+every keyword search, page and daily run.
+"""
+import re
+import time
+import hashlib
+import unicodedata
+from functools import lru_cache
+
+CACHE_SIZE = 200_000
+
+# Longest stored company_name
+MAX_NAME_LENGTH = 200
+
+# Dropped from the end of a name, repeatedly ("FOO CO INC" -> "FOO")
+LEGAL_SUFFIXES = {
+    'LLC', 'LC', 'PLLC', 'LLP', 'LP', 'LTD', 'LIMITED', 'INC', 'INCORPORATED',
+    'CORP', 'CORPORATION', 'CO', 'COMPANY', 'PC', 'PA', 'PLC', 'DBA',
+}
+
+# Two-word suffixes as they look once punctuation is gone ("L L C" from "L. L. C.")
+SPLIT_SUFFIXES = {('L', 'L', 'C'): 'LLC', ('L', 'P'): 'LP', ('L', 'L', 'P'): 'LLP', ('P', 'C'): 'PC'}
+
+ABBREVIATIONS = {
+    'BROS': 'BROTHERS',
+    'CONSTR': 'CONSTRUCTION',
+    'CONST': 'CONSTRUCTION',
+    'SVC': 'SERVICE',
+    'SVCS': 'SERVICES',
+    'SERV': 'SERVICE',
+    'MFG': 'MANUFACTURING',
+    'MGMT': 'MANAGEMENT',
+    'MGT': 'MANAGEMENT',
+    'INTL': 'INTERNATIONAL',
+    'NATL': 'NATIONAL',
+    'ASSOC': 'ASSOCIATES',
+    'ASSOCS': 'ASSOCIATES',
+    'ELEC': 'ELECTRIC',
+    'DIST': 'DISTRIBUTION',
+    'TRANSP': 'TRANSPORTATION',
+    'TRKG': 'TRUCKING',
+    'ENTPR': 'ENTERPRISES',
+    'ENTERP': 'ENTERPRISES',
+    'ENT': 'ENTERPRISES',
+    'SOLNS': 'SOLUTIONS',
+    'HLDGS': 'HOLDINGS',
+    'GRP': 'GROUP',
+    'CNTR': 'CENTER',
+    'CTR': 'CENTER',
+    'MECH': 'MECHANICAL',
+    'PLBG': 'PLUMBING',
+}
+
+# Apostrophes join ("O'REILLY" -> "OREILLY"); every other non-alphanumeric splits
+APOSTROPHE_RE = re.compile(r"['’`]")
+PERIOD_RE = re.compile(r'(?<=\b[A-Z])\.(?=[A-Z]\b)')
+NON_ALNUM_RE = re.compile(r'[^A-Z0-9]+')
+SPACE_RE = re.compile(r'\s+')
+
+
+def _ascii_upper(name: str) -> str:
+    text = unicodedata.normalize('NFKD', name)
+    return text.encode('ascii', 'ignore').decode('ascii').upper()
+
+
+def display_name(name: str) -> str:
+    """Name as stored in company_name: uppercased, whitespace folded, length capped"""
+    if not name:
+        return ''
+    return SPACE_RE.sub(' ', name.upper()).strip()[:MAX_NAME_LENGTH]
+
+
+def _canonical_key(name: str) -> str:
+    text = _ascii_upper(name)
+    text = text.replace('&', ' AND ')
+    text = APOSTROPHE_RE.sub('', text)
+    # Initialisms keep their letters together: "L.L.C." -> "LLC", "U.S.A." -> "USA"
+    text = PERIOD_RE.sub('', text)
+    tokens = NON_ALNUM_RE.sub(' ', text).split()
+    if not tokens:
+        return ''
+
+    tokens = [ABBREVIATIONS.get(token, token) for token in tokens]
+
+    if tokens[0] == 'THE' and len(tokens) > 1:
+        tokens = tokens[1:]
+
+    while len(tokens) > 1:
+        for parts, suffix in SPLIT_SUFFIXES.items():
+            if tuple(tokens[-len(parts):]) == parts and len(tokens) > len(parts):
+                tokens = tokens[:-len(parts)] + [suffix]
+                break
+        if tokens[-1] not in LEGAL_SUFFIXES:
+            break
+        tokens.pop()
+
+    return ' '.join(tokens)
+
+
+class NameNormalizer:
+    """Memoized canonical keys with hit-rate and throughput counters"""
+
+    def __init__(self, cache_size: int = CACHE_SIZE):
+        self.canonical_key = lru_cache(maxsize=cache_size)(_canonical_key)
+        self.names = 0
+        self.seconds = 0.0
+
+    def key(self, name: str) -> str:
+        return self.canonical_key(name) if name else ''
+
+    def keys(self, names) -> list:
+        """Canonical keys for a batch of names; repeats hit the cache"""
+        start = time.perf_counter()
+        canonical_key = self.canonical_key
+        result = [canonical_key(name) if name else '' for name in names]
+        self.seconds += time.perf_counter() - start
+        self.names += len(result)
+        return result
+
+    def stats(self) -> dict:
+        info = self.canonical_key.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            'names': self.names,
+            'names_per_sec': self.names / self.seconds if self.seconds else 0.0,
+            'hits': info.hits,
+            'misses': info.misses,
+            'size': info.currsize,
+            'hit_rate': info.hits / lookups if lookups else 0.0,
+        }
+
+
+_default = None
+
+
+def get_normalizer() -> NameNormalizer:
+    global _default
+    if _default is None:
+        _default = NameNormalizer()
+    return _default
+
+
+def canonical_key(name: str) -> str:
+    """Comparison key for one company name"""
+    return get_normalizer().key(name)
+
+
+def canonical_keys(names) -> list:
+    """Comparison keys for a list of company names"""
+    return get_normalizer().keys(names)
+
+
+def name_id(name: str, length: int = 10) -> str:
+    """
+    Stable short id for a company name, for source_ids built from the name.
+    Unlike hash(), it is the same in every process and for every spelling
+    variant of the name.
+    """
+    return hashlib.md5(canonical_key(name).encode()).hexdigest()[:length]
+
+
+def lead_keys(leads) -> list:
+    """
+    Dedup keys for a batch of leads: the same company with the same signal
+    in the same state on the same day. None for leads without a usable name.
+    """
+    keys = canonical_keys([lead.get('company_name') for lead in leads])
+    return [
+        (key, lead.get('state', ''), lead.get('signal_type', ''), lead.get('signal_date', ''))
+        if key else None
+        for key, lead in zip(keys, leads)
+    ]
+
+
+def stats() -> dict:
+    return get_normalizer().stats()
+
+
+if __name__ == '__main__':
+    import sys
+    for name in sys.argv[1:]:
+        print(f"{name!r} -> {canonical_key(name)!r}")
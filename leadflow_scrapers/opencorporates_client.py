@@ -0,0 +1,267 @@
+"""
+OpenCorporates API client with a monthly call budget
+
+The free API tier allows a fixed number of calls a month (500 by default,
+OPENCORPORATES_MONTHLY_CALLS), and a daily run over every state would use
+that up in days. Every call goes through a QuotaLedger kept in SQLite, and
+it is refused once the month's budget is spent. A day gets its share of what
+is left in the month. That share is split across states by how many leads
+each state has produced per call before, weighted by how many days the
+state is behind. A state that gets no calls today is not lost: its search
+window starts where it was last covered, and a window cut short by the
+budget resumes at the next unread page.
+
+Windows end yesterday, so a page never changes once fetched; responses are
+cached permanently (.cache/opencorporates.sqlite) and re-runs cost nothing.
+Searches use the API's largest page size.
+
+    client = OpenCorporatesClient()
+    for state, calls in client.plan(['TX', 'GA']).items():
+        for company in client.new_companies(state, max_calls=calls):
+            ...
+
+Set OPENCORPORATES_API_TOKEN to the account's API token.
+"""
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+import calendar
+from datetime import date, timedelta
+import http_client
+
+logger = logging.getLogger('OpenCorporatesClient')
+
+API_URL = "https://api.opencorporates.com/v0.4/companies/search"
+
+API_TOKEN = os.getenv('OPENCORPORATES_API_TOKEN', '')
+
+MONTHLY_CALLS = int(os.getenv('OPENCORPORATES_MONTHLY_CALLS', 500))
+
+# Largest per_page the API accepts
+PAGE_SIZE = 100
+
+# Furthest back a state's window reaches after being deferred
+MAX_WINDOW_DAYS = 30
+
+# Leads-per-call assumed for a state with no history, so new states get tried
+DEFAULT_YIELD = 20.0
+
+CACHE_DIR = os.getenv(
+    'LEADFLOW_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+)
+
+
+class QuotaExceeded(Exception):
+    pass
+
+
+class QuotaLedger:
+    """Calls made and results returned, per state per day, plus each state's covered window"""
+
+    def __init__(self, path: str = None, monthly_calls: int = MONTHLY_CALLS):
+        self.path = path or os.path.join(CACHE_DIR, 'opencorporates.sqlite')
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.monthly_calls = monthly_calls
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript(
+            'CREATE TABLE IF NOT EXISTS calls '
+            '(day TEXT, state TEXT, calls INTEGER, results INTEGER, PRIMARY KEY (day, state));'
+            'CREATE TABLE IF NOT EXISTS coverage '
+            '(state TEXT PRIMARY KEY, covered_through TEXT, pending_until TEXT, next_page INTEGER);'
+            'CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, fetched_at REAL, body TEXT);'
+        )
+        self._db.commit()
+
+    def _query(self, sql, args=()):
+        with self._lock:
+            return self._db.execute(sql, args).fetchall()
+
+    def _write(self, sql, args=()):
+        with self._lock:
+            self._db.execute(sql, args)
+            self._db.commit()
+
+    def used(self, today: date = None) -> int:
+        """Calls made so far this calendar month"""
+        month = (today or date.today()).strftime('%Y-%m')
+        return self._query('SELECT COALESCE(SUM(calls), 0) FROM calls WHERE day LIKE ?', (month + '-%',))[0][0]
+
+    def remaining(self, today: date = None) -> int:
+        return max(0, self.monthly_calls - self.used(today))
+
+    def daily_allowance(self, today: date = None) -> int:
+        """This month's remaining calls spread evenly over the days left, today included"""
+        today = today or date.today()
+        days_left = calendar.monthrange(today.year, today.month)[1] - today.day + 1
+        spent_today = self._query('SELECT COALESCE(SUM(calls), 0) FROM calls WHERE day = ?',
+                                  (today.isoformat(),))[0][0]
+        share = (self.remaining(today) + spent_today) // days_left
+        return max(0, min(share - spent_today, self.remaining(today)))
+
+    def record(self, state: str, results: int, today: date = None):
+        """One API call for a state and how many results it returned"""
+        day = (today or date.today()).isoformat()
+        self._write(
+            'INSERT INTO calls VALUES (?, ?, 1, ?) ON CONFLICT (day, state) '
+            'DO UPDATE SET calls = calls + 1, results = results + excluded.results',
+            (day, state, results),
+        )
+
+    def yield_per_call(self, state: str) -> float:
+        calls, results = self._query(
+            'SELECT COALESCE(SUM(calls), 0), COALESCE(SUM(results), 0) FROM calls WHERE state = ?', (state,)
+        )[0]
+        return results / calls if calls else DEFAULT_YIELD
+
+    def coverage(self, state: str) -> tuple:
+        """(covered_through, pending_until, next_page); dates are None when unset"""
+        rows = self._query('SELECT covered_through, pending_until, next_page FROM coverage WHERE state = ?',
+                           (state,))
+        if not rows:
+            return None, None, 1
+        covered, pending, page = rows[0]
+        return (date.fromisoformat(covered) if covered else None,
+                date.fromisoformat(pending) if pending else None, page or 1)
+
+    def set_coverage(self, state: str, covered_through: date, pending_until: date = None, next_page: int = 1):
+        self._write('INSERT OR REPLACE INTO coverage VALUES (?, ?, ?, ?)', (
+            state, covered_through.isoformat() if covered_through else None,
+            pending_until.isoformat() if pending_until else None, next_page,
+        ))
+
+    def cached(self, key: str):
+        rows = self._query('SELECT body FROM responses WHERE key = ?', (key,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def cache(self, key: str, body: dict):
+        self._write('INSERT OR REPLACE INTO responses VALUES (?, ?, ?)', (key, time.time(), json.dumps(body)))
+
+    def close(self):
+        self._db.close()
+
+
+class OpenCorporatesClient:
+    """Budgeted company searches against the OpenCorporates API"""
+
+    def __init__(self, token: str = API_TOKEN, ledger: QuotaLedger = None, headers: dict = None):
+        self.token = token
+        self.ledger = ledger or QuotaLedger()
+        self.headers = headers or {'Accept': 'application/json'}
+        self.stats = {'calls': 0, 'cached': 0, 'refused': 0}
+
+    @property
+    def available(self) -> bool:
+        return bool(self.token)
+
+    def plan(self, states: list, today: date = None) -> dict:
+        """
+        state -> calls allowed today. States are ranked by historical yield
+        times days of backlog; the day's allowance gives each state one call
+        in that order and splits the rest by the same weight. States left at
+        0 are deferred, and their growing backlog moves them up next time.
+        """
+        allowance = self.ledger.daily_allowance(today)
+        yields = {}
+        for state in states:
+            since, until = self.window(state, today)
+            backlog = max(1, (until - since).days + 1)
+            yields[state] = self.ledger.yield_per_call(state) * backlog
+        ranked = sorted(states, key=lambda s: yields[s], reverse=True)
+
+        plan = {state: 0 for state in states}
+        for state in ranked[:allowance]:
+            plan[state] = 1
+        spare = allowance - sum(plan.values())
+        total_yield = sum(yields[s] for s in ranked[:allowance]) or 1
+        for state in ranked[:allowance]:
+            extra = int(spare * yields[state] / total_yield)
+            plan[state] += extra
+        # Rounding leftovers go to the best states
+        leftover = allowance - sum(plan.values())
+        for state in ranked[:max(0, leftover)]:
+            plan[state] += 1
+        return plan
+
+    def _get(self, state: str, params: dict, allow_call: bool = True) -> tuple:
+        """(results body, whether an API call was made); None body when not allowed to call"""
+        key = json.dumps(params, sort_keys=True)
+        body = self.ledger.cached(key)
+        if body is not None:
+            self.stats['cached'] += 1
+            return body, False
+        if not allow_call:
+            return None, False
+
+        if self.ledger.remaining() <= 0:
+            self.stats['refused'] += 1
+            raise QuotaExceeded(f"OpenCorporates monthly budget of {self.ledger.monthly_calls} calls is spent")
+
+        response = http_client.get(API_URL, params={**params, 'api_token': self.token},
+                                   headers=self.headers, timeout=30)
+        self.stats['calls'] += 1
+        if response.status_code != 200:
+            self.ledger.record(state, 0)
+            raise RuntimeError(f"OpenCorporates {state}: HTTP {response.status_code}")
+        body = response.json().get('results', {})
+        self.ledger.record(state, len(body.get('companies', [])))
+        self.ledger.cache(key, body)
+        return body, True
+
+    def window(self, state: str, today: date = None) -> tuple:
+        """
+        (since, until) for a state: an unfinished window as it was, else the
+        day after it was last covered through yesterday
+        """
+        yesterday = (today or date.today()) - timedelta(days=1)
+        covered, pending, _ = self.ledger.coverage(state)
+        since = covered + timedelta(days=1) if covered else yesterday - timedelta(days=6)
+        since = max(since, yesterday - timedelta(days=MAX_WINDOW_DAYS - 1))
+        return since, pending or yesterday
+
+    def new_companies(self, state: str, jurisdiction: str = None, max_calls: int = 1, today: date = None):
+        """
+        Yield company dicts incorporated in the state's window, using at most
+        max_calls uncached calls. The window is marked covered once every
+        page is read; otherwise the next run resumes at the next page.
+        """
+        since, until = self.window(state, today)
+        if since > until:
+            return
+        covered, _, page = self.ledger.coverage(state)
+        params = {
+            'jurisdiction_code': jurisdiction or f"us_{state.lower()}",
+            'incorporation_date': f"{since.isoformat()}:{until.isoformat()}",
+            'order': 'incorporation_date',
+            'per_page': PAGE_SIZE,
+        }
+
+        calls = 0
+        while True:
+            try:
+                body, called = self._get(state, {**params, 'page': page}, allow_call=calls < max_calls)
+            except QuotaExceeded as e:
+                logger.warning(str(e))
+                body = None
+            if body is None:
+                logger.info(f"{state}: call budget reached at page {page}, rest deferred")
+                self.ledger.set_coverage(state, covered, until, page)
+                return
+            calls += called
+
+            for item in body.get('companies', []):
+                yield item.get('company', item)
+
+            if page >= (body.get('total_pages') or 1):
+                self.ledger.set_coverage(state, until)
+                return
+            page += 1
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"{s['calls']} API calls, {s['cached']} from cache, {s['refused']} refused; "
+                f"{self.ledger.remaining()} of {self.ledger.monthly_calls} left this month")
@@ -4,13 +4,19 @@ OpenCorporates Scraper - Free Business Formation Data
 https://opencorporates.com/
 
 OpenCorporates aggregates business registration data from all 50 states.
-Free tier: 500 API calls/month
+Free tier: 500 API calls/month, budgeted by opencorporates_client when
+OPENCORPORATES_API_TOKEN is set
 No key needed for basic web scraping
 """
 
-import requests
+import http_client
 from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
+from parsing import make_soup, SoupStrainer
+import industry_classifier
+import name_normalizer
+import pagination
+from pagination import Paginator, PAGE
+from opencorporates_client import OpenCorporatesClient
 import re
 import time
 import json
@@ -32,55 +38,8 @@ STATE_CODES = {
     'CO': 'us_co', 'CA': 'us_ca', 'OH': 'us_oh', 'PA': 'us_pa',
 }
 
-# Industry keywords
-INDUSTRY_KEYWORDS = {
-    'construction': 'Construction',
-    'contractor': 'Construction',
-    'builder': 'Construction',
-    'roofing': 'Construction',
-    'concrete': 'Construction',
-    'plumbing': 'Plumbing',
-    'hvac': 'Plumbing',
-    'heating': 'Plumbing',
-    'electric': 'Electrical',
-    'trucking': 'Trucking',
-    'transport': 'Trucking',
-    'freight': 'Trucking',
-    'logistics': 'Trucking',
-    'hauling': 'Trucking',
-    'oilfield': 'Oilfield',
-    'energy': 'Oilfield',
-    'petroleum': 'Oilfield',
-    'drilling': 'Oilfield',
-    'restaurant': 'Restaurant',
-    'cafe': 'Restaurant',
-    'food': 'Restaurant',
-    'catering': 'Restaurant',
-    'medical': 'Medical',
-    'health': 'Medical',
-    'dental': 'Medical',
-    'clinic': 'Medical',
-    'therapy': 'Medical',
-    'landscap': 'Landscaping',
-    'lawn': 'Landscaping',
-    'tree': 'Landscaping',
-    'cleaning': 'Cleaning',
-    'janitorial': 'Cleaning',
-    'maid': 'Cleaning',
-    'auto': 'Auto Services',
-    'mechanic': 'Auto Services',
-    'body shop': 'Auto Services',
-    'tire': 'Auto Services',
-    'staffing': 'Staffing',
-    'temp ': 'Staffing',
-    'personnel': 'Staffing',
-    'warehouse': 'Warehouse',
-    'storage': 'Warehouse',
-    'manufactur': 'Manufacturing',
-    'machine': 'Manufacturing',
-    'weld': 'Manufacturing',
-    'metal': 'Manufacturing',
-}
+# Only company result elements are built into the parse tree
+COMPANY_STRAINER = SoupStrainer(['a', 'li'], class_=['company_search_result', 'company'])
 
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
@@ -90,13 +49,24 @@ HEADERS = {
 
 def determine_industry(company_name):
     """Determine industry from company name"""
-    name_lower = company_name.lower()
+    return industry_classifier.classify(company_name, default='General Business')
+
+
+def parse_companies(response):
+    """(company_name, company_url) for each company on a listing page"""
+    soup = make_soup(response, parse_only=COMPANY_STRAINER)
     
-    for keyword, industry in INDUSTRY_KEYWORDS.items():
-        if keyword in name_lower:
-            return industry
+    # Find company listings
+    companies = soup.find_all('a', class_='company_search_result')
+    if not companies:
+        companies = soup.find_all('li', class_='company')
     
-    return 'General Business'
+    results = []
+    for company in companies:
+        name_elem = company.find('a') if company.name != 'a' else company
+        if name_elem:
+            results.append((name_elem.get_text(strip=True), name_elem.get('href', '')))
+    return results
 
 
 def scrape_opencorporates(state, days_back=7):
@@ -113,30 +83,22 @@ def scrape_opencorporates(state, days_back=7):
     # OpenCorporates search URL
     base_url = f"https://opencorporates.com/companies/{state_code}"
     
-    try:
-        # Get the page
-        response = requests.get(base_url, headers=HEADERS, timeout=30)
-        
+    paginator = Paginator('opencorporates', state, style=PAGE)
+    
+    def fetch(page):
+        return http_client.get(base_url, params={'page': page}, headers=HEADERS, timeout=30)
+    
+    def extract(response):
         if response.status_code != 200:
             print(f"[OpenCorp] Error for {state}: Status {response.status_code}")
-            return leads
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Find company listings
-        companies = soup.find_all('a', class_='company_search_result')
-        if not companies:
-            companies = soup.find_all('li', class_='company')
-        
-        for company in companies[:100]:  # Limit to 100 per state
+            return [], False
+        companies = parse_companies(response)
+        # A short page is the last one
+        return companies, len(companies) >= paginator.page_size
+    
+    try:
+        for company_name, company_url in paginator.walk(fetch, extract):
             try:
-                # Get company name
-                name_elem = company.find('a') if company.name != 'a' else company
-                if not name_elem:
-                    continue
-                    
-                company_name = name_elem.get_text(strip=True)
-                
                 if not company_name or len(company_name) < 3:
                     continue
                 
@@ -144,15 +106,12 @@ def scrape_opencorporates(state, days_back=7):
                 if 'dissolved' in company_name.lower() or 'inactive' in company_name.lower():
                     continue
                 
-                # Get company URL for more details
-                company_url = name_elem.get('href', '')
-                
                 # Determine industry
                 industry = determine_industry(company_name)
                 
                 # Create lead
                 lead = {
-                    'company_name': company_name.upper()[:200],  # Limit length
+                    'company_name': name_normalizer.display_name(company_name),
                     'industry': industry,
                     'city': '',
                     'state': state,
@@ -162,7 +121,7 @@ def scrape_opencorporates(state, days_back=7):
                     'signal_type': 'new_formation',
                     'signal_date': datetime.now().strftime('%Y-%m-%d'),
                     'source': 'opencorporates',
-                    'source_id': f"OC-{state}-{hash(company_name) % 10000000}",
+                    'source_id': f"OC-{state}-{name_normalizer.name_id(company_name)}",
                     'employees_estimated': '1-5',
                     'priority': 'MEDIUM' if industry == 'General Business' else 'HIGH',
                     'score': 75 if industry == 'General Business' else 85,
@@ -177,6 +136,7 @@ def scrape_opencorporates(state, days_back=7):
                 print(f"[OpenCorp] Error parsing company: {e}")
                 continue
         
+        pagination.count_leads('opencorporates', state, len(leads))
         print(f"[OpenCorp] Found {len(leads)} companies in {state}")
         
     except Exception as e:
@@ -185,6 +145,71 @@ def scrape_opencorporates(state, days_back=7):
     return leads
 
 
+def company_lead(state, company):
+    """Lead from an API company record"""
+    company_name = company.get('name') or ''
+    industry = determine_industry(company_name)
+    address = company.get('registered_address') or {}
+    city = address.get('locality') or ''
+    
+    return {
+        'company_name': name_normalizer.display_name(company_name),
+        'industry': industry,
+        'city': city.title(),
+        'state': state,
+        'zip': (address.get('postal_code') or '')[:5],
+        'phone': '',
+        'email': '',
+        'signal_type': 'new_formation',
+        'signal_date': company.get('incorporation_date') or datetime.now().strftime('%Y-%m-%d'),
+        'source': 'opencorporates',
+        'source_id': f"OC-{state}-{name_normalizer.name_id(company_name)}",
+        'employees_estimated': '1-5',
+        'priority': 'MEDIUM' if industry == 'General Business' else 'HIGH',
+        'score': 75 if industry == 'General Business' else 85,
+        'lead_type': 'likely_uninsured',
+        'stage': 'new',
+        'owner': 'Unassigned',
+        'raw_data': {
+            'company_number': company.get('company_number', ''),
+            'company_type': company.get('company_type', ''),
+            'address': company.get('registered_address_in_full') or '',
+            'opencorporates_url': company.get('opencorporates_url', ''),
+        },
+    }
+
+
+def scrape_opencorporates_api(states, client=None):
+    """
+    New formations from the API for several states, within today's share
+    of the monthly call budget. States the plan defers are caught up later.
+    """
+    client = client or OpenCorporatesClient()
+    plan = client.plan(states)
+    print(f"[OpenCorp] Plan: {', '.join(f'{s}={n}' for s, n in plan.items() if n) or 'no calls left today'}")
+    
+    leads = []
+    for state, calls in plan.items():
+        if not calls:
+            continue
+        
+        state_leads = []
+        try:
+            for company in client.new_companies(state, STATE_CODES.get(state), max_calls=calls):
+                company_name = company.get('name') or ''
+                if len(company_name) < 3 or company.get('inactive') or company.get('dissolution_date'):
+                    continue
+                state_leads.append(company_lead(state, company))
+        except Exception as e:
+            print(f"[OpenCorp] Error for {state}: {e}")
+        
+        print(f"[OpenCorp] Found {len(state_leads)} companies in {state}")
+        leads.extend(state_leads)
+    
+    print(f"[OpenCorp] {client.summary()}")
+    return leads
+
+
 def scrape_state_sos_texas():
     """
     Scrape Texas SOS directly
@@ -0,0 +1,267 @@
+"""
+OSHA enforcement bulk-data ingest
+
+The IMIS search pages give 50 rows per state with SIC scraped out of the
+row text and no penalty detail. DOL publishes the full enforcement data as
+CSV downloads (enforcedata.dol.gov: osha_inspection*.csv and
+osha_violation*.csv, several GB together). This reads them in two chunked
+passes with bounded memory:
+
+1. inspections: keep rows in the target states, opened inside the window,
+   whose SIC (or NAICS when SIC is blank) maps to a target industry
+2. violations: keep only rows for those inspections and sum current
+   penalties (initial when there is no current one) per inspection
+
+Only matched inspections and their running totals are held in memory.
+
+    python osha_bulk.py data/osha --states TX,AR --days 365
+
+The directory can also be set with LEADFLOW_OSHA_BULK_DIR.
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+from datetime import datetime, timedelta
+import pandas as pd
+from osha_scraper import OSHAScraper
+from osha_real import SIC_TO_INDUSTRY
+import name_normalizer
+
+BULK_DIR = os.getenv(
+    'LEADFLOW_OSHA_BULK_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'osha'),
+)
+
+CHUNK_ROWS = 250_000
+
+# Penalty threshold for a lead, same as the search-page scraper
+MIN_PENALTY = 1000
+
+DAYS_BACK = 365
+
+# SIC prefix -> industry; OSHAScraper's targets win where both map a prefix
+SIC_INDUSTRIES = {**SIC_TO_INDUSTRY, **OSHAScraper.TARGET_SIC_CODES}
+
+# Inspections since ~2002 often carry only NAICS; longest prefix wins
+NAICS_INDUSTRIES = {
+    '23': 'Construction',
+    '484': 'Trucking', '492': 'Trucking',
+    '211': 'Oilfield', '213': 'Oilfield',
+    '31': 'Manufacturing', '32': 'Manufacturing', '33': 'Manufacturing',
+    '62': 'Medical',
+    '722': 'Restaurant',
+}
+
+INSPECTION_COLUMNS = ['activity_nr', 'estab_name', 'site_city', 'site_state', 'site_zip',
+                      'sic_code', 'naics_code', 'open_date']
+VIOLATION_COLUMNS = ['activity_nr', 'viol_type', 'current_penalty', 'initial_penalty',
+                     'issuance_date', 'delete_flag']
+
+# Most to least severe
+VIOLATION_TYPES = {'W': 'Willful', 'R': 'Repeat', 'S': 'Serious', 'U': 'Unclassified', 'O': 'Other'}
+
+
+def bulk_files(directory: str, kind: str) -> list:
+    """osha_inspection*.csv / osha_violation*.csv in a directory, in order"""
+    return sorted(glob.glob(os.path.join(directory, f"osha_{kind}*.csv*")))
+
+
+def _read_chunks(paths, columns, chunk_rows):
+    for path in paths:
+        yield from pd.read_csv(
+            path, usecols=lambda c: c.strip().lower() in columns, dtype=str,
+            keep_default_na=False, chunksize=chunk_rows, encoding='latin-1',
+        )
+
+
+def _lower_columns(chunk):
+    return chunk.rename(columns=lambda c: c.strip().lower())
+
+
+def industry_for(sic: str, naics: str) -> str:
+    """Target industry from SIC, else NAICS, else None"""
+    if sic:
+        return SIC_INDUSTRIES.get(sic[:2])
+    for length in (3, 2):
+        industry = NAICS_INDUSTRIES.get(naics[:length])
+        if industry:
+            return industry
+    return None
+
+
+def _industries(chunk, industries):
+    sic = chunk['sic_code'].str.strip().str.zfill(4).where(chunk['sic_code'].str.strip() != '', '')
+    naics = chunk['naics_code'].str.strip() if 'naics_code' in chunk else pd.Series('', index=chunk.index)
+    values = [industry_for(s, n) for s, n in zip(sic, naics)]
+    result = pd.Series(values, index=chunk.index, dtype=object)
+    if industries:
+        result = result.where(result.isin(industries))
+    return result
+
+
+def scan_inspections(directory, states, since, industries=None, chunk_rows=CHUNK_ROWS, stats=None) -> dict:
+    """activity_nr -> inspection dict for target-state, in-window, target-industry inspections"""
+    states = {s.upper() for s in states} if states else None
+    since = since.strftime('%Y-%m-%d')
+    matched = {}
+
+    for chunk in _read_chunks(bulk_files(directory, 'inspection'), set(INSPECTION_COLUMNS), chunk_rows):
+        chunk = _lower_columns(chunk)
+        if stats is not None:
+            stats['inspections'] += len(chunk)
+        if states:
+            chunk = chunk[chunk['site_state'].str.strip().str.upper().isin(states)]
+        # open_date is ISO (YYYY-MM-DD), so string comparison is date order
+        chunk = chunk[chunk['open_date'].str.slice(0, 10) >= since]
+        if chunk.empty:
+            continue
+        chunk = chunk.assign(industry=_industries(chunk, industries)).dropna(subset=['industry'])
+
+        for row in chunk.to_dict('records'):
+            matched[row['activity_nr'].strip()] = row
+
+    return matched
+
+
+def sum_violations(directory, inspections: dict, chunk_rows=CHUNK_ROWS, stats=None) -> dict:
+    """activity_nr -> {'penalty', 'initial_penalty', 'violations', 'violation_type', 'issued'}"""
+    totals = {}
+    wanted = pd.Index(list(inspections))
+    severity = list(VIOLATION_TYPES)
+
+    for chunk in _read_chunks(bulk_files(directory, 'violation'), set(VIOLATION_COLUMNS), chunk_rows):
+        chunk = _lower_columns(chunk)
+        if stats is not None:
+            stats['violations'] += len(chunk)
+        chunk = chunk[chunk['activity_nr'].str.strip().isin(wanted)]
+        if 'delete_flag' in chunk:
+            chunk = chunk[chunk['delete_flag'].str.strip() != 'X']
+        if chunk.empty:
+            continue
+
+        current = pd.to_numeric(chunk['current_penalty'], errors='coerce')
+        initial = pd.to_numeric(chunk['initial_penalty'], errors='coerce').fillna(0)
+        rank = chunk['viol_type'].str.strip().map({t: i for i, t in enumerate(severity)}).fillna(len(severity))
+        frame = pd.DataFrame({
+            'activity_nr': chunk['activity_nr'].str.strip(),
+            'penalty': current.fillna(initial),
+            'initial_penalty': initial,
+            'rank': rank,
+            'issued': chunk['issuance_date'].str.slice(0, 10),
+        })
+        grouped = frame.groupby('activity_nr').agg(
+            penalty=('penalty', 'sum'), initial_penalty=('initial_penalty', 'sum'),
+            violations=('penalty', 'size'), rank=('rank', 'min'), issued=('issued', 'max'),
+        )
+
+        # An inspection's violations can span chunks and files
+        for activity_nr, row in zip(grouped.index, grouped.itertuples(index=False)):
+            total = totals.setdefault(activity_nr, {
+                'penalty': 0.0, 'initial_penalty': 0.0, 'violations': 0, 'rank': len(severity), 'issued': '',
+            })
+            total['penalty'] += row.penalty
+            total['initial_penalty'] += row.initial_penalty
+            total['violations'] += row.violations
+            total['rank'] = min(total['rank'], row.rank)
+            total['issued'] = max(total['issued'], row.issued)
+
+    for total in totals.values():
+        rank = int(total.pop('rank'))
+        total['violation_type'] = VIOLATION_TYPES[severity[rank]] if rank < len(severity) else ''
+    return totals
+
+
+def bulk_leads(directory: str = BULK_DIR, states=None, days_back: int = DAYS_BACK,
+               min_penalty: float = MIN_PENALTY, industries=None, chunk_rows: int = CHUNK_ROWS,
+               stats: dict = None) -> list:
+    """
+    Scored leads for inspections with at least min_penalty in current
+    penalties, ready for daily_scraper.push_leads
+    """
+    stats = stats if stats is not None else {}
+    stats.update(inspections=0, violations=0, matched=0, seconds=0.0)
+    start = time.perf_counter()
+
+    since = datetime.now() - timedelta(days=days_back)
+    inspections = scan_inspections(directory, states, since, industries, chunk_rows, stats)
+    stats['matched'] = len(inspections)
+    totals = sum_violations(directory, inspections, chunk_rows, stats)
+
+    leads = []
+    for activity_nr, total in totals.items():
+        if total['penalty'] < min_penalty:
+            continue
+        inspection = inspections[activity_nr]
+        company_name = inspection['estab_name'].strip()
+        if len(company_name) < 3:
+            continue
+        city = inspection['site_city'].strip()
+
+        leads.append(OSHAScraper.score_lead({
+            'company_name': name_normalizer.display_name(company_name),
+            'industry': inspection['industry'],
+            'city': city.title() if city else 'Unknown',
+            'state': inspection['site_state'].strip().upper(),
+            'zip': inspection.get('site_zip', '').strip()[:5],
+            'source_id': OSHAScraper.generate_source_id('osha', activity_nr),
+            'signal_type': 'osha_violation',
+            'signal_date': total['issued'] or inspection['open_date'][:10],
+            'employees_estimated': '10-25',
+            'raw_data': {
+                'inspection_nr': activity_nr,
+                'sic_code': inspection['sic_code'].strip(),
+                'naics_code': inspection.get('naics_code', '').strip(),
+                'penalty': round(total['penalty'], 2),
+                'initial_penalty': round(total['initial_penalty'], 2),
+                'violations': total['violations'],
+                'violation_type': total['violation_type'],
+            }
+        }, 'osha'))
+
+    stats['seconds'] = time.perf_counter() - start
+    return leads
+
+
+class OSHABulkScraper(OSHAScraper):
+    """OSHAScraper fed from the DOL enforcement bulk files"""
+
+    def __init__(self, directory: str = BULK_DIR, states: list = None, days_back: int = DAYS_BACK):
+        super().__init__()
+        self.directory = directory
+        self.states = states or self.TARGET_STATES
+        self.days_back = days_back
+
+    def scrape(self) -> list:
+        if not bulk_files(self.directory, 'inspection'):
+            self.logger.warning(f"No osha_inspection*.csv in {self.directory}; set LEADFLOW_OSHA_BULK_DIR")
+            return []
+
+        self.logger.info(f"Reading OSHA bulk data from {self.directory}...")
+        stats = {}
+        leads = bulk_leads(self.directory, self.states, self.days_back, stats=stats)
+        self.logger.info(f"OSHA bulk: {stats['inspections']:,} inspections, {stats['violations']:,} "
+                         f"violations read, {stats['matched']:,} matched in {stats['seconds']:.1f}s")
+        return leads
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='OSHA enforcement bulk ingest')
+    parser.add_argument('directory', nargs='?', default=BULK_DIR,
+                        help='Directory with osha_inspection*.csv and osha_violation*.csv')
+    parser.add_argument('--states', type=str, help='Comma-separated states (default: OSHA target states)')
+    parser.add_argument('--days', type=int, default=DAYS_BACK, help='Inspection open-date window in days')
+    parser.add_argument('--min-penalty', type=float, default=MIN_PENALTY)
+    args = parser.parse_args()
+
+    if not bulk_files(args.directory, 'inspection'):
+        sys.exit(f"No osha_inspection*.csv in {args.directory}")
+
+    states = [s.strip().upper() for s in args.states.split(',')] if args.states else OSHAScraper.TARGET_STATES
+    stats = {}
+    leads = bulk_leads(args.directory, states, args.days, args.min_penalty, stats=stats)
+    print(f"{stats['inspections']:,} inspections, {stats['violations']:,} violations in "
+          f"{stats['seconds']:.1f}s; {stats['matched']:,} matched, {len(leads):,} leads")
+    for lead in leads[:5]:
+        print(lead)
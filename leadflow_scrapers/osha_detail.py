@@ -0,0 +1,231 @@
+"""
+OSHA inspection-detail enrichment
+
+Search and list pages only give establishment, SIC and a total penalty, so
+OSHA leads went out with no violation type and today's date. This
+stage fetches establishment.inspection_detail for each lead that has an
+inspection number, with bounded concurrency, and fills in:
+
+- signal_date: the date the inspection was opened
+- raw_data: case status, open/close dates, current and initial penalties,
+  violation counts by type, and the most severe type cited
+
+Closed inspections don't change, so their details are cached permanently
+in a small SQLite file keyed by inspection number
+(.cache/osha_inspections.sqlite, directory set with LEADFLOW_CACHE_DIR).
+Open inspections are re-fetched once OPEN_TTL has passed.
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import http_client
+from parsing import response_encoding
+from table_spec import TableSpec, Column
+from safer_snapshot import flatten
+from parse_pool import get_pool
+
+logger = logging.getLogger('OSHADetail')
+
+DETAIL_URL = "https://www.osha.gov/ords/imis/establishment.inspection_detail"
+
+CACHE_DIR = os.getenv(
+    'LEADFLOW_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+)
+
+# Open cases can still get citations; re-check them after a day
+OPEN_TTL = 24 * 60 * 60
+
+MAX_WORKERS = 4
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+}
+
+# Most to least severe, as labeled in the Violation Summary table
+VIOLATION_TYPES = ['Willful', 'Repeat', 'Serious', 'Other', 'Unclass']
+
+# Column order of the summary table when its header can't be read
+SUMMARY_ORDER = ['Serious', 'Willful', 'Repeat', 'Other', 'Unclass', 'Total']
+
+# Violation Summary: one row per measure (Initial Violations, Current
+# Penalty, ...), one column per violation type in header order
+SUMMARY_TABLE = TableSpec(
+    table_text='Violation Summary',
+    skip_header=False,
+    min_cells=2,
+    columns=[Column('measure', 0)] + [Column(i, i) for i in range(1, len(SUMMARY_ORDER) + 1)],
+)
+
+STATUS_RE = re.compile(r'Case Status:\s*(OPEN|CLOSED)', re.I)
+OPENED_RE = re.compile(r'Date Opened:\s*(\d{2}/\d{2}/\d{4})', re.I)
+CLOSED_RE = re.compile(r'(?:Close Case|Case Closed):\s*(\d{2}/\d{2}/\d{4})', re.I)
+NUMBER_RE = re.compile(r'[^\d.]')
+SUMMARY_HEADER_RE = re.compile(r'Violation Summary\s*((?:(?:Serious|Willful|Repeat|Other|Unclass|Total)\b\s*)+)')
+
+
+def _number(text: str) -> float:
+    try:
+        return float(NUMBER_RE.sub('', text) or 0)
+    except ValueError:
+        return 0.0
+
+
+def _iso(date: str) -> str:
+    try:
+        return datetime.strptime(date, '%m/%d/%Y').strftime('%Y-%m-%d')
+    except (TypeError, ValueError):
+        return ''
+
+
+def parse_detail(page) -> dict:
+    """Inspection detail page -> details dict; runs in a parse_pool worker"""
+    text = flatten(page.content.decode(response_encoding(page), errors='replace'))
+
+    status = STATUS_RE.search(text)
+    opened = OPENED_RE.search(text)
+    closed = CLOSED_RE.search(text)
+
+    header = SUMMARY_HEADER_RE.search(text)
+    order = header.group(1).split() if header else SUMMARY_ORDER
+    summary = {}
+    for row in SUMMARY_TABLE.extract(page):
+        measure = row.pop('measure').lower()
+        if measure:
+            summary[measure] = {name.lower(): row.get(i + 1, '') for i, name in enumerate(order)}
+
+    current = summary.get('current violations') or summary.get('initial violations') or {}
+    counts = {name: int(_number(current.get(name.lower(), ''))) for name in VIOLATION_TYPES}
+    cited = [name for name in VIOLATION_TYPES if counts[name]]
+
+    return {
+        'case_status': status.group(1).upper() if status else '',
+        'opened': _iso(opened.group(1)) if opened else '',
+        'closed': _iso(closed.group(1)) if closed else '',
+        'violation_counts': counts,
+        'violations': sum(counts.values()),
+        'violation_type': 'Unclassified' if cited[:1] == ['Unclass'] else (cited[0] if cited else ''),
+        'penalty': _number(summary.get('current penalty', {}).get('total', '')),
+        'initial_penalty': _number(summary.get('initial penalty', {}).get('total', '')),
+    }
+
+
+class DetailCache:
+    """Inspection details by inspection number, in SQLite"""
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(CACHE_DIR, 'osha_inspections.sqlite')
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS inspections '
+            '(inspection_nr TEXT PRIMARY KEY, closed INTEGER, fetched_at REAL, details TEXT)'
+        )
+        self._db.commit()
+
+    def get(self, inspection_nr: str) -> dict:
+        """Cached details, or None if missing or an open case past OPEN_TTL"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT closed, fetched_at, details FROM inspections WHERE inspection_nr = ?',
+                (inspection_nr,),
+            ).fetchone()
+        if row is None:
+            return None
+        closed, fetched_at, details = row
+        if not closed and time.time() - fetched_at > OPEN_TTL:
+            return None
+        return json.loads(details)
+
+    def put(self, inspection_nr: str, details: dict):
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO inspections VALUES (?, ?, ?, ?)',
+                (inspection_nr, int(details.get('case_status') == 'CLOSED'), time.time(), json.dumps(details)),
+            )
+            self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+
+def fetch_detail(inspection_nr: str, session=None):
+    """Fetch one inspection detail page; None on failure"""
+    try:
+        response = (session or http_client).get(DETAIL_URL, params={'id': inspection_nr},
+                                                headers=HEADERS, timeout=30)
+    except Exception as e:
+        logger.debug(f"Detail fetch failed for {inspection_nr}: {e}")
+        return None
+    return response if response.status_code == 200 else None
+
+
+def _qualifies(lead: dict) -> bool:
+    raw = lead.get('raw_data')
+    return (lead.get('signal_type') == 'osha_violation' and isinstance(raw, dict)
+            and bool(raw.get('inspection_nr')) and 'violations' not in raw)
+
+
+def apply_details(lead: dict, details: dict):
+    if details.get('opened'):
+        lead['signal_date'] = details['opened']
+    raw = lead['raw_data']
+    raw.update(details)
+    if not details.get('violation_type'):
+        # Nothing cited yet
+        raw['violation_type'] = ''
+
+
+def enrich_leads(leads: list, workers: int = MAX_WORKERS, cache: DetailCache = None) -> dict:
+    """
+    Fill OSHA leads from their inspection detail pages, in place.
+    Returns counts of cached, fetched and failed inspections.
+    """
+    stats = {'cached': 0, 'fetched': 0, 'failed': 0}
+    by_inspection = {}
+    for lead in leads:
+        if _qualifies(lead):
+            by_inspection.setdefault(str(lead['raw_data']['inspection_nr']), []).append(lead)
+    if not by_inspection:
+        return stats
+
+    owns_cache = cache is None
+    cache = cache or DetailCache()
+    pool = get_pool()
+    session = http_client.new_session()
+
+    def load(inspection_nr):
+        details = cache.get(inspection_nr)
+        if details is not None:
+            return inspection_nr, details, 'cached'
+        response = fetch_detail(inspection_nr, session)
+        if response is None:
+            return inspection_nr, None, 'failed'
+        try:
+            details = pool.parse(parse_detail, response)
+        except Exception as e:
+            logger.debug(f"Detail parse failed for {inspection_nr}: {e}")
+            return inspection_nr, None, 'failed'
+        cache.put(inspection_nr, details)
+        return inspection_nr, details, 'fetched'
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for inspection_nr, details, outcome in executor.map(load, list(by_inspection)):
+                stats[outcome] += 1
+                if details:
+                    for lead in by_inspection[inspection_nr]:
+                        apply_details(lead, details)
+    finally:
+        if owns_cache:
+            cache.close()
+
+    return stats
@@ -9,9 +9,16 @@ Companies with OSHA violations = coverage gap opportunities
 - Carriers may non-renew them
 """
 
-import requests
-from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
+import http_client
+from datetime import datetime
+from table_spec import TableSpec, Column
+import name_normalizer
+import osha_detail
+from osha_scraper import OSHAScraper
+from parse_pool import get_pool
+import pagination
+from pagination import Paginator, OFFSET
+import watermarks
 import re
 import time
 from supabase import create_client
@@ -43,6 +50,19 @@ SIC_TO_INDUSTRY = {
     '80': 'Medical',
 }
 
+# The inspection table: class="table", else the one headed "Establishment"
+INSPECTION_TABLE = TableSpec(
+    table_class='table',
+    table_text='Establishment',
+    min_cells=4,
+    columns=[
+        Column('company_name', 0),
+        Column('inspection_nr', 0, href=r'(?:InspNr|id)=(\d+)'),
+        Column('city', 1),
+        Column('sic', None, pattern=r'SIC:\s*(\d{2})'),
+    ],
+)
+
 STATE_FIPS = {
     'TX': '48', 'AR': '05', 'GA': '13', 'TN': '47',
     'OK': '40', 'LA': '22', 'AL': '01', 'MS': '28',
@@ -50,105 +70,161 @@ STATE_FIPS = {
 }
 
 
-def get_osha_violations_by_state(state, days_back=30):
+def fetch_inspection_page(state, since, start=0, page_size=None, until=None):
     """
-    Get recent OSHA violations for a state
-    Uses OSHA's public enforcement data
+    Fetch one inspection list page for a state, inspections opened between
+    since and until (default today); None on failure
     """
-    leads = []
-    
     # OSHA enforcement search
     # This URL searches for recent inspections
     base_url = "https://www.osha.gov/pls/imis/establishment.inspection_list"
+    until = until or datetime.now()
     
     params = {
         'p_logger': '1',
         'State': state,
         'owner': '',
-        'startmonth': (datetime.now() - timedelta(days=days_back)).strftime('%m'),
-        'startday': (datetime.now() - timedelta(days=days_back)).strftime('%d'),
-        'startyear': (datetime.now() - timedelta(days=days_back)).strftime('%Y'),
-        'endmonth': datetime.now().strftime('%m'),
-        'endday': datetime.now().strftime('%d'),
-        'endyear': datetime.now().strftime('%Y'),
+        'startmonth': since.strftime('%m'),
+        'startday': since.strftime('%d'),
+        'startyear': since.strftime('%Y'),
+        'endmonth': until.strftime('%m'),
+        'endday': until.strftime('%d'),
+        'endyear': until.strftime('%Y'),
     }
+    if page_size:
+        params.update({'p_start': start, 'p_finish': start + page_size, 'p_show': page_size})
     
     try:
-        response = requests.get(base_url, params=params, headers=HEADERS, timeout=30)
+        response = http_client.get(base_url, params=params, headers=HEADERS, timeout=30)
         
         if response.status_code != 200:
             print(f"[OSHA] Error for {state}: {response.status_code}")
-            return leads
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Find inspection table
-        table = soup.find('table', {'class': 'table'})
-        if not table:
-            tables = soup.find_all('table')
-            for t in tables:
-                if 'Establishment' in t.get_text():
-                    table = t
-                    break
+            return None
+        return response
         
-        if not table:
-            print(f"[OSHA] No data table found for {state}")
-            return leads
-        
-        rows = table.find_all('tr')[1:]  # Skip header
+    except Exception as e:
+        print(f"[OSHA] Error: {e}")
+        return None
+
+
+def parse_inspections(page, state):
+    """
+    Leads from an inspection list page. Runs in a parse_pool worker, so it
+    only touches the page it is given.
+    """
+    return inspection_leads(INSPECTION_TABLE.extract(page), state)
+
+
+def parse_inspections_page(page, state, page_size):
+    """(leads, more) for one page of the paginated inspection list"""
+    records = INSPECTION_TABLE.extract(page)
+    return inspection_leads(records, state), len(records) >= page_size
+
+
+def inspection_leads(records, state):
+    leads = []
+    
+    for record in records:
+        company_name = record['company_name']
+        if not company_name or len(company_name) < 3:
+            continue
         
-        for row in rows[:50]:  # Limit to 50
-            try:
-                cells = row.find_all('td')
-                if len(cells) < 4:
-                    continue
-                
-                company_name = cells[0].get_text(strip=True)
-                city = cells[1].get_text(strip=True) if len(cells) > 1 else ''
-                
-                if not company_name or len(company_name) < 3:
-                    continue
-                
-                # Determine industry from SIC if available
-                industry = 'Manufacturing'  # Default for OSHA violations
-                sic_match = re.search(r'SIC:\s*(\d{2})', row.get_text())
-                if sic_match:
-                    sic = sic_match.group(1)
-                    industry = SIC_TO_INDUSTRY.get(sic, 'Manufacturing')
-                
-                lead = {
-                    'company_name': company_name.upper()[:200],
-                    'industry': industry,
-                    'city': city,
-                    'state': state,
-                    'zip': '',
-                    'phone': '',
-                    'email': '',
-                    'signal_type': 'osha_violation',
-                    'signal_date': datetime.now().strftime('%Y-%m-%d'),
-                    'source': 'osha_scraper',
-                    'source_id': f"OSHA-{state}-{hash(company_name) % 10000000}",
-                    'employees_estimated': '10-25',
-                    'priority': 'HIGH',
-                    'score': 80,
-                    'lead_type': 'coverage_gap',
-                    'stage': 'new',
-                    'owner': 'Unassigned',
-                }
-                
-                leads.append(lead)
-                
-            except Exception as e:
-                continue
+        # Determine industry from SIC if available
+        industry = SIC_TO_INDUSTRY.get(record['sic'], 'Manufacturing')  # Default for OSHA violations
         
-        print(f"[OSHA] Found {len(leads)} violations in {state}")
+        lead = {
+            'company_name': name_normalizer.display_name(company_name),
+            'industry': industry,
+            'city': record['city'],
+            'state': state,
+            'zip': '',
+            'phone': '',
+            'email': '',
+            'signal_type': 'osha_violation',
+            'signal_date': datetime.now().strftime('%Y-%m-%d'),
+            'source': 'osha_scraper',
+            # Same id OSHAScraper and osha_bulk give the inspection
+            'source_id': OSHAScraper.generate_source_id('osha', record['inspection_nr'] or company_name),
+            'employees_estimated': '10-25',
+            'lead_type': 'coverage_gap',
+            'stage': 'new',
+            'owner': 'Unassigned',
+            'raw_data': {'inspection_nr': record['inspection_nr']},
+        }
         
+        leads.append(lead)
+    
+    return leads
+
+
+def get_osha_violations_by_state(state, days_back=30, since=None, until=None, stats=None):
+    """
+    Get recent OSHA violations for a state
+    Uses OSHA's public enforcement data, every page up to the osha budget,
+    from the state's watermark (days_back without one). An explicit
+    since/until window (backfill) leaves the watermark alone.
+    """
+    paginator = Paginator('osha', state, style=OFFSET)
+    window = since is not None
+    if not window:
+        since = watermarks.since('osha', state, days_back)
+    
+    def fetch(start):
+        response = fetch_inspection_page(state, since, start, paginator.page_size, until)
+        if response is None:
+            raise ConnectionError(f"no inspection page at offset {start}")
+        return response
+    
+    def extract(response):
+        # Parsed in the process pool while other pages are fetched
+        return get_pool().parse(parse_inspections_page, response, state, paginator.page_size)
+    
+    leads = []
+    complete = False
+    try:
+        for lead in paginator.walk(fetch, extract):
+            leads.append(lead)
+        # List rows carry no dates; a complete walk covers the window to today
+        complete = paginator.stats['stopped'] == 'exhausted'
+        if complete and not window:
+            watermarks.advance('osha', state, covered=datetime.now())
     except Exception as e:
         print(f"[OSHA] Error: {e}")
     
+    if stats is not None:
+        stats.update(rows=len(leads), complete=complete)
+    
+    pagination.count_leads('osha', state, len(leads))
+    print(f"[OSHA] Found {len(leads)} violations in {state}")
     return leads
 
 
+def score_leads(leads):
+    """
+    Score and prioritize leads once osha_detail has filled in the penalty,
+    violation type and open date
+    """
+    for lead in leads:
+        OSHAScraper.score_lead(lead, lead.get('source') or 'osha_scraper')
+    return leads
+
+
+def get_osha_violations(states, days_back=30, delay=2):
+    """Violations for several states, one paginated walk per state"""
+    all_leads = []
+    for state in states:
+        all_leads.extend(get_osha_violations_by_state(state, days_back))
+        time.sleep(delay)
+    
+    for line in pagination.report('osha'):
+        print(f"[OSHA] {line}")
+    
+    details = osha_detail.enrich_leads(all_leads)
+    print(f"[OSHA] Inspection details: {details['fetched']} fetched, "
+          f"{details['cached']} cached, {details['failed']} failed")
+    return score_leads(all_leads)
+
+
 def run_osha_scraper(states=None):
     """Run OSHA scraper for all states"""
     if states is None:
@@ -158,14 +234,10 @@ def run_osha_scraper(states=None):
     print(f"OSHA Scraper - {datetime.now()}")
     print("=" * 60)
     
-    all_leads = []
-    
-    for state in states:
-        leads = get_osha_violations_by_state(state)
-        all_leads.extend(leads)
-        time.sleep(2)
+    all_leads = get_osha_violations(states)
     
     print(f"Total: {len(all_leads)} leads")
+    print(f"Parsing: {get_pool().summary()}")
     return all_leads
 
 
@@ -3,22 +3,32 @@ OSHA Violations Scraper - Federal OSHA Database (All States)
 Source: https://www.osha.gov/ords/imis/establishment.search
 """
 import requests
-from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
+import http_client
+from table_spec import TableSpec, Column
+from datetime import datetime
 import time
 import re
 from base_scraper import BaseScraper
+import name_normalizer
+from parse_pool import get_pool
+import osha_detail
+import pagination
+from pagination import Paginator, OFFSET
+import watermarks
 
 class OSHAScraper(BaseScraper):
     """Scrape OSHA violations for coverage gap leads"""
     
     # OSHA Data API
     SEARCH_URL = "https://www.osha.gov/ords/imis/establishment.search"
-    DETAIL_URL = "https://www.osha.gov/ords/imis/establishment.inspection_detail"
+    DETAIL_URL = osha_detail.DETAIL_URL
     
     # Target states
     TARGET_STATES = ['TX', 'AR', 'GA', 'TN', 'OK', 'LA', 'AL', 'MS']
     
+    # Lookback for a state without a watermark
+    DAYS_BACK = 30
+    
     # Industry SIC codes we care about
     TARGET_SIC_CODES = {
         '15': 'Construction',  # Building Construction
@@ -34,17 +44,44 @@ class OSHAScraper(BaseScraper):
         '58': 'Restaurant',    # Eating and Drinking Places
     }
     
+    # Points for the most severe violation type cited and for the current
+    # penalty; together they replace the flat osha_violation bonus
+    VIOLATION_POINTS = {'Willful': 15, 'Repeat': 15, 'Serious': 10, 'Unclassified': 5}
+    PENALTY_POINTS = [(40000, 15), (10000, 10), (1000, 5)]
+    
     def get_source_name(self) -> str:
         return 'osha'
     
-    def classify_industry_from_sic(self, sic_code: str) -> str:
+    @classmethod
+    def calculate_score(cls, lead: dict) -> int:
+        """
+        Base score without the signal bonus, plus violation type and penalty
+        points. Until inspection details are in (osha_detail or the bulk
+        files set 'violations') the signal_date is only the scrape date and
+        no violation type is known, so neither earns points.
+        """
+        raw = lead.get('raw_data') or {}
+        scored = {**lead, 'signal_type': ''}
+        detailed = 'violations' in raw
+        if not detailed:
+            scored['signal_date'] = None
+        score = BaseScraper.calculate_score(scored)
+        if detailed:
+            score += cls.VIOLATION_POINTS.get(raw.get('violation_type') or '', 0)
+        penalty = raw.get('penalty') or 0
+        score += next((points for floor, points in cls.PENALTY_POINTS if penalty >= floor), 0)
+        return min(score, 100)
+    
+    @classmethod
+    def classify_industry_from_sic(cls, sic_code: str) -> str:
         """Get industry from SIC code"""
         if not sic_code:
             return 'Other'
         prefix = sic_code[:2]
-        return self.TARGET_SIC_CODES.get(prefix, 'Other')
+        return cls.TARGET_SIC_CODES.get(prefix, 'Other')
     
-    def parse_penalty(self, penalty_str: str) -> float:
+    @staticmethod
+    def parse_penalty(penalty_str: str) -> float:
         """Parse penalty string to float"""
         if not penalty_str:
             return 0
@@ -59,23 +96,25 @@ class OSHAScraper(BaseScraper):
         """Scrape recent OSHA violations"""
         leads = []
         
-        # Get violations from last 30 days
+        # Each state resumes at its watermark; DAYS_BACK without one
         end_date = datetime.now()
-        start_date = end_date - timedelta(days=30)
         
-        self.logger.info(f"Scraping OSHA violations from {start_date.date()} to {end_date.date()}")
+        self.logger.info(f"Scraping OSHA violations through {end_date.date()}")
         
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
         }
         
-        session = requests.Session()
+        session = http_client.new_session()
+        pool = get_pool()
         
         for state in self.TARGET_STATES:
-            self.logger.info(f"Searching OSHA violations in {state}...")
+            start_date = watermarks.since('osha', state, self.DAYS_BACK)
+            self.logger.info(f"Searching OSHA violations in {state} since {start_date.date()}...")
+            paginator = Paginator('osha', state, style=OFFSET)
             
-            try:
+            def fetch(start, state=state, start_date=start_date):
                 # Search for recent inspections with violations
                 params = {
                     'State': state,
@@ -88,79 +127,29 @@ class OSHAScraper(BaseScraper):
                     'endmonth': end_date.month,
                     'endday': end_date.day,
                     'endyear': end_date.year,
-                    'p_finish': '',
+                    'p_start': start,
+                    'p_finish': start + paginator.page_size,
+                    'p_show': paginator.page_size,
                     'sort': 'close_date desc',
                     'owner': '',
                     'establishment': '',
                     'InspNr': '',
                 }
-                
-                response = session.get(self.SEARCH_URL, params=params, headers=headers, timeout=30)
-                
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Find results table
-                    table = soup.find('table', {'class': 'table'}) or soup.find('table')
-                    
-                    if table:
-                        rows = table.find_all('tr')[1:]  # Skip header
-                        
-                        for row in rows[:50]:  # Limit to 50 per state
-                            try:
-                                cols = row.find_all('td')
-                                if len(cols) >= 5:
-                                    company_name = cols[0].get_text(strip=True)
-                                    city = cols[1].get_text(strip=True) if len(cols) > 1 else ''
-                                    sic_code = cols[2].get_text(strip=True) if len(cols) > 2 else ''
-                                    penalty = cols[4].get_text(strip=True) if len(cols) > 4 else '$0'
-                                    inspection_nr = ''
-                                    
-                                    # Try to extract inspection number from link
-                                    link = cols[0].find('a')
-                                    if link and 'href' in link.attrs:
-                                        href = link['href']
-                                        match = re.search(r'InspNr=(\d+)', href)
-                                        if match:
-                                            inspection_nr = match.group(1)
-                                    
-                                    if not company_name or len(company_name) < 3:
-                                        continue
-                                    
-                                    penalty_amount = self.parse_penalty(penalty)
-                                    
-                                    # Only include significant violations (penalty > $1000)
-                                    if penalty_amount < 1000:
-                                        continue
-                                    
-                                    industry = self.classify_industry_from_sic(sic_code)
-                                    
-                                    # Skip industries we don't target
-                                    if industry == 'Other':
-                                        continue
-                                    
-                                    lead = {
-                                        'company_name': company_name.upper(),
-                                        'industry': industry,
-                                        'city': city.title() if city else 'Unknown',
-                                        'state': state,
-                                        'source_id': self.generate_source_id('osha', inspection_nr or company_name),
-                                        'signal_type': 'osha_violation',
-                                        'signal_date': datetime.now().isoformat()[:10],
-                                        'employees_estimated': '10-25',  # OSHA typically inspects larger employers
-                                        'raw_data': {
-                                            'inspection_nr': inspection_nr,
-                                            'sic_code': sic_code,
-                                            'penalty': penalty_amount,
-                                            'violation_type': 'Serious'  # Default assumption
-                                        }
-                                    }
-                                    
-                                    leads.append(lead)
-                                    
-                            except Exception as e:
-                                self.logger.debug(f"Error parsing row: {e}")
-                                continue
+                return session.get(self.SEARCH_URL, params=params, headers=headers, timeout=30)
+            
+            def extract(response, state=state):
+                if response.status_code != 200:
+                    # Ends the walk as an error so the watermark stays put
+                    raise requests.HTTPError(f"HTTP {response.status_code} from OSHA search", response=response)
+                # Parsed in the process pool while other pages are fetched
+                return pool.parse(parse_results_page, response, state, paginator.page_size)
+            
+            try:
+                state_leads = list(paginator.walk(fetch, extract))
+                pagination.count_leads('osha', state, len(state_leads))
+                leads.extend(state_leads)
+                if paginator.stats['stopped'] == 'exhausted':
+                    watermarks.advance('osha', state, covered=end_date)
                 
                 # Respect rate limits
                 time.sleep(2)
@@ -168,11 +157,84 @@ class OSHAScraper(BaseScraper):
             except requests.RequestException as e:
                 self.logger.warning(f"Request failed for {state}: {e}")
                 continue
+            except Exception as e:
+                self.logger.warning(f"Parse failed for {state}: {e}")
         
         self.logger.info(f"Found {len(leads)} OSHA violation leads")
+        
+        # Real violation types, penalties and dates from the detail pages
+        details = osha_detail.enrich_leads(leads)
+        self.logger.info(f"Inspection details: {details['fetched']} fetched, "
+                         f"{details['cached']} cached, {details['failed']} failed")
+        self.logger.info(f"Parsing: {pool.summary()}")
         return leads
 
 
+# Establishment, city, SIC, open date, penalty
+RESULTS_TABLE = TableSpec(
+    table_class='table',
+    min_cells=5,
+    columns=[
+        Column('company_name', 0),
+        Column('inspection_nr', 0, href=r'InspNr=(\d+)'),
+        Column('city', 1),
+        Column('sic_code', 2),
+        Column('penalty', 4, convert=OSHAScraper.parse_penalty, default=0),
+    ],
+)
+
+
+def parse_results(page, state: str) -> list:
+    """Leads from an OSHA search results page; runs in a parse_pool worker"""
+    return results_leads(RESULTS_TABLE.extract(page), state)
+
+
+def parse_results_page(page, state: str, page_size: int) -> tuple:
+    """(leads, more) for one page of a paginated search; more when the page was full"""
+    records = RESULTS_TABLE.extract(page)
+    return results_leads(records, state), len(records) >= page_size
+
+
+def results_leads(records: list, state: str) -> list:
+    leads = []
+    
+    for record in records:
+        company_name = record['company_name']
+        if not company_name or len(company_name) < 3:
+            continue
+        
+        # Only include significant violations (penalty > $1000)
+        if record['penalty'] < 1000:
+            continue
+        
+        industry = OSHAScraper.classify_industry_from_sic(record['sic_code'])
+        
+        # Skip industries we don't target
+        if industry == 'Other':
+            continue
+        
+        inspection_nr = record['inspection_nr']
+        lead = {
+            'company_name': name_normalizer.display_name(company_name),
+            'industry': industry,
+            'city': record['city'].title() if record['city'] else 'Unknown',
+            'state': state,
+            'source_id': OSHAScraper.generate_source_id('osha', inspection_nr or company_name),
+            'signal_type': 'osha_violation',
+            'signal_date': datetime.now().isoformat()[:10],
+            'employees_estimated': '10-25',  # OSHA typically inspects larger employers
+            'raw_data': {
+                'inspection_nr': inspection_nr,
+                'sic_code': record['sic_code'],
+                'penalty': record['penalty'],
+            }
+        }
+        
+        leads.append(lead)
+    
+    return leads
+
+
 # For testing
 if __name__ == '__main__':
     scraper = OSHAScraper()
@@ -0,0 +1,165 @@
+"""
+Pagination for list and search sources
+
+Scrapers used to stop at the first page or a hard slice (rows[:50],
+companies[:100]). A Paginator walks every page a source has, up to a
+per-source budget, in one of four styles:
+
+- offset:  fetch(offset)      offset = 0, page_size, 2 * page_size, ...
+- page:    fetch(page_number) page_number = first_page, first_page + 1, ...
+- next:    fetch(url)         None first, then the next link the page gave
+- cursor:  fetch(cursor)      None first, then the cursor the page gave
+
+fetch returns a response; extract turns it into (items, next). For offset
+and page styles next is just "there may be more" (usually: the page was
+full); for next/cursor it is the link or cursor, None on the last page.
+Offset and page requests don't depend on each other, so up to `workers`
+of them are fetched at once.
+
+    paginator = Paginator('opencorporates', state='TX', style='page')
+    for company in paginator.walk(lambda n: get(url, params={'page': n}), parse_companies):
+        ...
+
+Pages fetched and items/leads yielded are kept per source and state;
+report() summarizes them for the run log. stats['stopped'] says why the
+last walk ended: 'exhausted' (the source ran out), 'max_pages',
+'max_items', or 'error' when fetch or extract raised. Only an exhausted
+walk read everything, so callers that raise on a bad page (a non-200)
+keep their watermark from moving.
+"""
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+OFFSET, PAGE, NEXT, CURSOR = 'offset', 'page', 'next', 'cursor'
+
+# Per-source page size and budget. max_pages / max_items bound one walk
+# (one state); workers is how many independent pages are fetched at once.
+LIMITS = {
+    'fmcsa': {'page_size': 100, 'max_pages': 20, 'max_items': 2000, 'workers': 2},
+    'fmcsa_safer': {'max_items': 500},
+    'osha': {'page_size': 100, 'max_pages': 10, 'max_items': 1000, 'workers': 2},
+    'opencorporates': {'page_size': 30, 'max_pages': 10, 'max_items': 300, 'workers': 2},
+}
+
+DEFAULT_LIMITS = {'page_size': 100, 'max_pages': 10, 'max_items': None, 'workers': 1}
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def limits(source: str) -> dict:
+    return {**DEFAULT_LIMITS, **LIMITS.get(source, {})}
+
+
+class Paginator:
+    """Walks one source/state's pages within its budget"""
+
+    def __init__(self, source: str, state: str = '', style: str = OFFSET, first_page: int = 1, **overrides):
+        if style not in (OFFSET, PAGE, NEXT, CURSOR):
+            raise ValueError(f"Unknown pagination style: {style}")
+        settings = {**limits(source), **{k: v for k, v in overrides.items() if v is not None}}
+        self.source = source
+        self.state = state
+        self.style = style
+        self.first_page = first_page
+        self.page_size = settings['page_size']
+        self.max_pages = settings['max_pages']
+        self.max_items = settings['max_items']
+        self.workers = max(1, settings['workers']) if style in (OFFSET, PAGE) else 1
+        self.stats = record(source, state)
+
+    def _token(self, index: int):
+        return index * self.page_size if self.style == OFFSET else self.first_page + index
+
+    def _pages(self, fetch, extract):
+        """(items, more) per page, in order"""
+        if self.style in (NEXT, CURSOR):
+            token = None
+            for _ in (range(self.max_pages) if self.max_pages else itertools.count()):
+                items, token = extract(fetch(token))
+                yield items, token is not None
+                if token is None:
+                    return
+            return
+
+        def load(index):
+            return extract(fetch(self._token(index)))
+
+        index = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while not self.max_pages or index < self.max_pages:
+                wave = range(index, index + self.workers)
+                if self.max_pages:
+                    wave = range(index, min(index + self.workers, self.max_pages))
+                for items, more in pool.map(load, wave):
+                    yield items, bool(more)
+                    if not more:
+                        return
+                index += len(wave)
+
+    def walk(self, fetch, extract):
+        """Yield items from every page until the source or the budget runs out"""
+        fetched = yielded = 0
+        reason = 'exhausted'
+        pages = self._pages(fetch, extract)
+        try:
+            for items, more in pages:
+                fetched += 1
+                self._count(pages=1)
+                for item in items:
+                    if self.max_items and yielded >= self.max_items:
+                        reason = 'max_items'
+                        return
+                    yielded += 1
+                    self._count(items=1)
+                    yield item
+                if more and self.max_pages and fetched >= self.max_pages:
+                    reason = 'max_pages'
+        except Exception:
+            reason = 'error'
+            raise
+        finally:
+            pages.close()
+            with _stats_lock:
+                self.stats['stopped'] = reason
+
+    def _count(self, **counts):
+        with _stats_lock:
+            for key, value in counts.items():
+                self.stats[key] += value
+
+
+def record(source: str, state: str = '') -> dict:
+    """The stats entry for a source/state, created on first use"""
+    with _stats_lock:
+        return _stats.setdefault((source, state), {'pages': 0, 'items': 0, 'leads': 0, 'stopped': ''})
+
+
+def count_leads(source: str, state: str, leads: int):
+    """Leads a scraper kept from the items a walk yielded"""
+    entry = record(source, state)
+    with _stats_lock:
+        entry['leads'] += leads
+
+
+def stats() -> dict:
+    with _stats_lock:
+        return {key: dict(value) for key, value in _stats.items()}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def report(source: str = None) -> list:
+    """One line per source/state: pages fetched, items and leads yielded, why it stopped"""
+    lines = []
+    for (name, state), s in sorted(stats().items()):
+        if source and name != source:
+            continue
+        where = f"{name}/{state}" if state else name
+        stopped = f", stopped at {s['stopped']}" if s['stopped'] not in ('', 'exhausted') else ''
+        lines.append(f"{where}: {s['pages']} pages, {s['items']} items, {s['leads']} leads{stopped}")
+    return lines
@@ -0,0 +1,183 @@
+"""
+Process pool for HTML parsing
+
+BeautifulSoup/lxml tree building is CPU work, and in one process the GIL
+serializes it with everything else. The fetch side hands each page's raw
+bytes to a ParsePool; a worker process runs the scraper's parse function
+and sends back compact lead records while the fetch side moves on to the
+next request.
+
+Parse functions must be module-level (picklable) and take a Page first:
+
+    pool = parse_pool.get_pool()
+    future = pool.submit(parse_inspections, response, state)
+    ...
+    leads = future.result()
+
+Pool size comes from LEADFLOW_PARSE_WORKERS (default: one per CPU, or 0 on
+a single CPU, where a worker only adds pickling and a process switch to
+every page). With 0 pages are parsed inline in the calling process, which
+is also what happens when the pool can't be started.
+"""
+import os
+import time
+import atexit
+import logging
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+logger = logging.getLogger('ParsePool')
+
+CPUS = os.cpu_count() or 1
+
+DEFAULT_WORKERS = int(os.getenv('LEADFLOW_PARSE_WORKERS', CPUS if CPUS > 1 else 0))
+
+
+class Page:
+    """
+    The parts of a response a parse function needs, small enough to pickle.
+    Works anywhere make_soup() and response_encoding() take a response.
+    """
+    __slots__ = ('content', 'url', 'headers', 'status_code')
+
+    def __init__(self, content: bytes, url: str = '', headers: dict = None, status_code: int = 200):
+        self.content = content
+        self.url = url
+        self.headers = headers or {}
+        self.status_code = status_code
+
+    @classmethod
+    def from_response(cls, response) -> 'Page':
+        content_type = response.headers.get('Content-Type')
+        return cls(
+            response.content,
+            response.url,
+            {'Content-Type': content_type} if content_type else {},
+            response.status_code,
+        )
+
+
+def _timed_parse(fn, page, args):
+    """Runs in the worker: the parse result plus its CPU and wall time"""
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    result = fn(page, *args)
+    return result, time.process_time() - cpu, time.perf_counter() - wall
+
+
+class ParsePool:
+    """Runs parse functions on page bytes in worker processes and times them"""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS):
+        self.workers = max(0, workers)
+        self._executor = None
+        self._lock = threading.Lock()
+        self.pages = 0
+        self.cpu_seconds = 0.0
+        self.parse_seconds = 0.0
+        self.max_parse_seconds = 0.0
+        self.first_submit = None
+        self.last_done = None
+
+    def _get_executor(self):
+        if self.workers and self._executor is None:
+            try:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            except (OSError, NotImplementedError) as e:
+                logger.warning(f"Process pool unavailable ({e}); parsing inline")
+                self.workers = 0
+        return self._executor
+
+    def _record(self, cpu, wall):
+        with self._lock:
+            self.pages += 1
+            self.cpu_seconds += cpu
+            self.parse_seconds += wall
+            self.max_parse_seconds = max(self.max_parse_seconds, wall)
+            self.last_done = time.perf_counter()
+
+    def submit(self, fn, page, *args) -> Future:
+        """Parse a page (or response) in the pool; the Future resolves to fn's result"""
+        if not isinstance(page, Page):
+            page = Page.from_response(page)
+
+        with self._lock:
+            if self.first_submit is None:
+                self.first_submit = time.perf_counter()
+
+        result = Future()
+        executor = self._get_executor()
+
+        if executor is None:
+            try:
+                value, cpu, wall = _timed_parse(fn, page, args)
+                self._record(cpu, wall)
+                result.set_result(value)
+            except Exception as e:
+                result.set_exception(e)
+            return result
+
+        def done(inner):
+            try:
+                value, cpu, wall = inner.result()
+            except Exception as e:
+                result.set_exception(e)
+                return
+            self._record(cpu, wall)
+            result.set_result(value)
+
+        executor.submit(_timed_parse, fn, page, args).add_done_callback(done)
+        return result
+
+    def parse(self, fn, page, *args):
+        """Parse and wait for the result"""
+        return self.submit(fn, page, *args).result()
+
+    def map(self, fn, pages, *args) -> list:
+        """Parse many pages at once; results come back in input order"""
+        futures = [self.submit(fn, page, *args) for page in pages]
+        return [future.result() for future in futures]
+
+    def reset_stats(self):
+        with self._lock:
+            self.pages = 0
+            self.cpu_seconds = self.parse_seconds = self.max_parse_seconds = 0.0
+            self.first_submit = self.last_done = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            window = (self.last_done - self.first_submit) if self.pages else 0.0
+            slots = max(self.workers, 1)
+            return {
+                'workers': self.workers,
+                'pages': self.pages,
+                'avg_parse_ms': self.parse_seconds / self.pages * 1000 if self.pages else 0.0,
+                'max_parse_ms': self.max_parse_seconds * 1000,
+                'cpu_seconds': self.cpu_seconds,
+                # Share of the pool's CPU capacity spent parsing while pages were in flight
+                'cpu_utilization': self.cpu_seconds / (window * slots) if window else 0.0,
+            }
+
+    def summary(self) -> str:
+        s = self.stats()
+        where = f"on {s['workers']} workers" if s['workers'] else 'inline'
+        return (f"{s['pages']} pages parsed {where}, "
+                f"avg {s['avg_parse_ms']:.1f}ms / max {s['max_parse_ms']:.1f}ms per page, "
+                f"{s['cpu_utilization']:.0%} CPU utilization")
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+# One pool per process, started on first use
+_default = None
+
+
+def get_pool() -> ParsePool:
+    global _default
+    if _default is None:
+        _default = ParsePool()
+        atexit.register(_default.shutdown)
+    return _default
@@ -0,0 +1,76 @@
+"""
+HTML parsing helpers shared by the scrapers
+
+make_soup() hands the raw response bytes to BeautifulSoup with an explicit
+encoding instead of going through response.text. For pages served without a
+charset header, response.text runs charset detection over the whole body and
+builds a second full-size str before parsing starts; here the encoding comes
+from the header, a per-host declaration, or the encoding learned from the
+previous page on that host.
+
+Pages are parsed with lxml's C parser when it is installed. Scrapers that
+only need one results table or a set of links pass a SoupStrainer so that
+only those elements (and their subtrees) are built into the tree.
+"""
+import re
+import threading
+from urllib.parse import urlparse
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    DEFAULT_PARSER = 'lxml'
+except ImportError:
+    DEFAULT_PARSER = 'html.parser'
+
+# Hosts whose pages are known to omit a charset header
+HOST_ENCODINGS = {
+    'safer.fmcsa.dot.gov': 'windows-1252',
+    'www.osha.gov': 'utf-8',
+    'opencorporates.com': 'utf-8',
+    'www.sos.arkansas.gov': 'utf-8',
+}
+
+CHARSET_HEADER_RE = re.compile(r'charset=["\']?([\w.:-]+)', re.I)
+CHARSET_META_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w.:-]+)', re.I)
+
+# Only the head of the document is checked for a <meta charset>
+META_SNIFF_BYTES = 2048
+
+_encoding_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _host(response) -> str:
+    return urlparse(response.url or '').netloc.lower()
+
+
+def response_encoding(response) -> str:
+    """Best known encoding for a response without running charset detection"""
+    match = CHARSET_HEADER_RE.search(response.headers.get('Content-Type', ''))
+    if match:
+        return match.group(1).lower()
+
+    host = _host(response)
+    if host in _encoding_cache:
+        return _encoding_cache[host]
+    if host in HOST_ENCODINGS:
+        return HOST_ENCODINGS[host]
+
+    match = CHARSET_META_RE.search(response.content[:META_SNIFF_BYTES])
+    if match:
+        return match.group(1).decode('ascii').lower()
+
+    # Tried first; BeautifulSoup falls back to its own detection if it fails
+    return 'utf-8'
+
+
+def make_soup(response, parser: str = DEFAULT_PARSER, parse_only: SoupStrainer = None) -> BeautifulSoup:
+    """Parse response.content directly, remembering the encoding per host"""
+    encoding = response_encoding(response)
+    soup = BeautifulSoup(response.content, parser, from_encoding=encoding, parse_only=parse_only)
+
+    if soup.original_encoding:
+        with _cache_lock:
+            _encoding_cache[_host(response)] = soup.original_encoding
+    return soup
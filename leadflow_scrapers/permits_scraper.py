@@ -7,11 +7,12 @@ Many cities publish permit data for free.
 Focus on major metros in target states.
 """
 
-import requests
-from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
+from socrata_client import SocrataClient, quote
+from arcgis_client import ArcGISClient, find_layer
+import name_normalizer
+import watermarks
+from datetime import datetime, timezone
 import time
-import json
 from supabase import create_client
 import os
 
@@ -27,10 +28,14 @@ HEADERS = {
 # Cities with open data portals
 CITY_PORTALS = {
     # Texas
+    # arcgis 'url' may be the layer itself (.../FeatureServer/<n>), its
+    # service, a services directory or a Hub dataset page; the layer named
+    # like 'layer' is found through arcgis_client.find_layer
     'Houston': {
         'state': 'TX',
-        'url': 'https://cohgis-mycity.opendata.arcgis.com/datasets/building-permits/api',
-        'type': 'arcgis'
+        'url': 'https://cohgis-mycity.opendata.arcgis.com/datasets/building-permits',
+        'type': 'arcgis',
+        'layer': r'permit',
     },
     'Dallas': {
         'state': 'TX', 
@@ -46,7 +51,8 @@ CITY_PORTALS = {
     'Atlanta': {
         'state': 'GA',
         'url': 'https://gis.atlantaga.gov/portal/rest/services',
-        'type': 'arcgis'
+        'type': 'arcgis',
+        'layer': r'permit',
     },
     # Tennessee
     'Nashville': {
@@ -63,61 +69,188 @@ CITY_PORTALS = {
 }
 
 
-def scrape_socrata_permits(city, config, days_back=7):
-    """Scrape permits from Socrata open data portal"""
+# Candidate dataset columns for each field we map, first match wins.
+# A city can override any of them with a 'fields' entry in CITY_PORTALS.
+PERMIT_FIELDS = {
+    'contractor': ['contractor_name', 'contractor_company_name', 'applicant_name', 'contractor', 'contractorname'],
+    'permit_number': ['permit_number', 'permit_num', 'permit_no', 'permitnum', 'project_no'],
+    'zip': ['zip_code', 'original_zip', 'zip', 'zipcode'],
+    'phone': ['contractor_phone', 'applicant_phone'],
+    'issue_date': ['issue_date', 'issued_date', 'issueddate', 'date_issued', 'issue_dt'],
+}
+
+# Business-entity markers; individuals are skipped
+ENTITY_MARKERS = ['LLC', 'INC', 'CORP', 'CO', 'COMPANY', 'CONSTRUCTION', 'BUILDER']
+
+
+# Issue dates as text: Socrata timestamps, and the formats string fields use
+ISSUE_DATE_FORMATS = ['%Y-%m-%d', '%m/%d/%Y']
+
+
+def issue_date(value):
+    """
+    YYYY-MM-DD from a Socrata timestamp, an ArcGIS date (epoch milliseconds,
+    UTC) or a date string; None when there is no usable date
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+    text = str(value).strip()
+    for fmt in ISSUE_DATE_FORMATS:
+        try:
+            return datetime.strptime(text[:10], fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
+
+def permit_lead(city, config, contractor, permit_number, zip_code, phone, issued=None):
+    """Lead dict for one permit, shared by every portal type"""
+    return {
+        'company_name': name_normalizer.display_name(contractor),
+        'industry': 'Construction',
+        'city': city,
+        'state': config['state'],
+        'zip': zip_code or '',
+        'phone': phone or '',
+        'email': '',
+        'signal_type': 'building_permit',
+        'signal_date': issue_date(issued) or datetime.now().strftime('%Y-%m-%d'),
+        'source': 'permits_scraper',
+        'source_id': f"PERMIT-{city}-{permit_number or name_normalizer.name_id(contractor)}",
+        'employees_estimated': '5-10',
+        'priority': 'HIGH',
+        'score': 85,
+        'lead_type': 'likely_uninsured',
+        'stage': 'new',
+        'owner': 'Unassigned',
+    }
+
+
+def is_business(contractor):
+    return bool(contractor) and len(contractor) >= 3 and any(x in contractor.upper() for x in ENTITY_MARKERS)
+
+
+def scrape_socrata_permits(city, config, days_back=7, since=None, until=None, stats=None):
+    """
+    Scrape permits from Socrata open data portal. Every page of results is
+    read, only mapped columns are transferred, and the date and entity
+    filters run server-side. An explicit since/until window (backfill)
+    leaves the city's watermark alone.
+    """
     leads = []
     
     if not config.get('url'):
         return leads
     
-    # Calculate date filter
-    since_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%dT00:00:00')
+    # Date filter: from the city's watermark, or days_back without one
+    started = datetime.now()
+    window = since is not None
+    since_date = (since if window else watermarks.since('permits', city, days_back)).strftime('%Y-%m-%dT00:00:00')
     
-    url = config['url']
-    params = {
-        '$where': f"issue_date > '{since_date}'",
-        '$limit': 100
-    }
+    client = SocrataClient(config['url'], label=city, headers=HEADERS)
+    
+    try:
+        fields = {**PERMIT_FIELDS, **config.get('fields', {})}
+        columns = {name: client.pick(*candidates) for name, candidates in fields.items()}
+        contractor_col = columns['contractor']
+        date_col = columns['issue_date']
+        
+        if not contractor_col or not date_col:
+            print(f"[Permits-{city}] No contractor/issue date column in dataset")
+            return leads
+        
+        entity_filter = ' OR '.join(
+            f"upper({contractor_col}) like {quote('%' + marker + '%')}" for marker in ENTITY_MARKERS
+        )
+        where = f"{date_col} >= {quote(since_date)} AND ({entity_filter})"
+        if until:
+            where = f"{date_col} <= {quote(until.strftime('%Y-%m-%dT%H:%M:%S'))} AND {where}"
+        
+        for permit in client.query(select=[c for c in columns.values() if c], where=where):
+            contractor = permit.get(contractor_col, '')
+            
+            # Skip individuals (look for LLC, Inc, etc)
+            if not is_business(contractor):
+                continue
+            
+            leads.append(permit_lead(
+                city, config, contractor,
+                permit.get(columns['permit_number']),
+                permit.get(columns['zip']),
+                permit.get(columns['phone']),
+                permit.get(date_col),
+            ))
+        
+        print(f"[Permits] Found {len(leads)} contractors in {city} ({client.summary()})")
+        # Rows past max_rows were never read, so the window isn't covered
+        if not window and not client.truncated:
+            watermarks.advance('permits', city, covered=started)
+        if stats is not None:
+            stats.update(rows=client.stats['rows'], complete=not client.truncated)
+        
+    except Exception as e:
+        print(f"[Permits-{city}] Error: {e}")
+    
+    return leads
+
+
+def scrape_arcgis_permits(city, config, days_back=7, since=None, until=None, stats=None):
+    """
+    Scrape permits from an ArcGIS FeatureServer/MapServer layer, paging
+    within the layer's max record count. Same lead structure as Socrata.
+    """
+    leads = []
+    
+    if not config.get('url'):
+        return leads
+    
+    started = datetime.now()
+    window = since is not None
+    if not window:
+        since = watermarks.since('permits', city, days_back)
     
     try:
-        response = requests.get(url, params=params, headers=HEADERS, timeout=30)
+        layer_url = find_layer(config['url'], config.get('layer', 'permit'), headers=HEADERS)
+        client = ArcGISClient(layer_url, label=city, headers=HEADERS)
+        fields = {**PERMIT_FIELDS, **config.get('fields', {})}
+        columns = {name: client.pick(*candidates) for name, candidates in fields.items()}
+        contractor_col = columns['contractor']
+        date_col = columns['issue_date']
+        
+        if not contractor_col or not date_col:
+            print(f"[Permits-{city}] No contractor/issue date field in layer")
+            return leads
         
-        if response.status_code == 200:
-            data = response.json()
+        entity_filter = ' OR '.join(
+            f"UPPER({contractor_col}) LIKE {quote('%' + marker + '%')}" for marker in ENTITY_MARKERS
+        )
+        where = f"{client.since(date_col, since)} AND ({entity_filter})"
+        if until:
+            where = f"NOT {client.since(date_col, until)} AND {where}"
+        
+        for permit in client.query(where=where, out_fields=[c for c in columns.values() if c]):
+            contractor = (permit.get(contractor_col) or '').strip()
+            
+            if not is_business(contractor):
+                continue
             
-            for permit in data:
-                contractor = permit.get('contractor_name') or permit.get('applicant_name', '')
-                
-                if not contractor or len(contractor) < 3:
-                    continue
-                
-                # Skip individuals (look for LLC, Inc, etc)
-                if not any(x in contractor.upper() for x in ['LLC', 'INC', 'CORP', 'CO', 'COMPANY', 'CONSTRUCTION', 'BUILDER']):
-                    continue
-                
-                lead = {
-                    'company_name': contractor.upper()[:200],
-                    'industry': 'Construction',
-                    'city': city,
-                    'state': config['state'],
-                    'zip': permit.get('zip_code', ''),
-                    'phone': permit.get('contractor_phone', ''),
-                    'email': '',
-                    'signal_type': 'building_permit',
-                    'signal_date': datetime.now().strftime('%Y-%m-%d'),
-                    'source': 'permits_scraper',
-                    'source_id': f"PERMIT-{city}-{permit.get('permit_number', hash(contractor) % 10000000)}",
-                    'employees_estimated': '5-10',
-                    'priority': 'HIGH',
-                    'score': 85,
-                    'lead_type': 'likely_uninsured',
-                    'stage': 'new',
-                    'owner': 'Unassigned',
-                }
-                
-                leads.append(lead)
+            zip_code = permit.get(columns['zip'])
+            leads.append(permit_lead(
+                city, config, contractor,
+                permit.get(columns['permit_number']),
+                str(zip_code) if zip_code is not None else '',
+                permit.get(columns['phone']),
+                permit.get(date_col),
+            ))
         
-        print(f"[Permits] Found {len(leads)} contractors in {city}")
+        print(f"[Permits] Found {len(leads)} contractors in {city} ({client.summary()})")
+        # Rows past max_rows were never read, so the window isn't covered
+        if not window and not client.truncated:
+            watermarks.advance('permits', city, covered=started)
+        if stats is not None:
+            stats.update(rows=client.stats['rows'], complete=not client.truncated)
         
     except Exception as e:
         print(f"[Permits-{city}] Error: {e}")
@@ -125,6 +258,17 @@ def scrape_socrata_permits(city, config, days_back=7):
     return leads
 
 
+def scrape_city(city, days_back=7, since=None, until=None, stats=None):
+    """Permits for one city from whichever portal type it publishes on"""
+    config = CITY_PORTALS.get(city, {})
+    
+    if config.get('type') == 'socrata':
+        return scrape_socrata_permits(city, config, days_back, since, until, stats)
+    elif config.get('type') == 'arcgis':
+        return scrape_arcgis_permits(city, config, days_back, since, until, stats)
+    return []
+
+
 def scrape_permits(cities=None, days_back=7):
     """Scrape building permits from multiple cities"""
     if cities is None:
@@ -133,12 +277,7 @@ def scrape_permits(cities=None, days_back=7):
     all_leads = []
     
     for city in cities:
-        config = CITY_PORTALS.get(city, {})
-        
-        if config.get('type') == 'socrata':
-            leads = scrape_socrata_permits(city, config, days_back)
-            all_leads.extend(leads)
-        
+        all_leads.extend(scrape_city(city, days_back))
         time.sleep(2)
     
     return all_leads
@@ -13,11 +13,15 @@ import os
 # Add current directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+import watermarks
+
 from tx_sos_scraper import TexasSOSScraper
 from ar_sos_scraper import ArkansasSOSScraper
 from ga_sos_scraper import GeorgiaSOSScraper
 from fmcsa_scraper import FMCSAScraper
+from fmcsa_census import FMCSACensusScraper
 from osha_scraper import OSHAScraper
+from osha_bulk import OSHABulkScraper
 
 logging.basicConfig(
     level=logging.INFO,
@@ -31,7 +35,9 @@ SCRAPERS = {
     'ar_sos': ArkansasSOSScraper,
     'ga_sos': GeorgiaSOSScraper,
     'fmcsa': FMCSAScraper,
+    'fmcsa_census': FMCSACensusScraper,
     'osha': OSHAScraper,
+    'osha_bulk': OSHABulkScraper,
 }
 
 # Scraper groups by type
@@ -101,8 +107,10 @@ def main():
     parser.add_argument('--group', '-g', type=str, choices=['sos', 'federal', 'all'], help='Run a group')
     parser.add_argument('--list', '-l', action='store_true', help='List available scrapers')
     parser.add_argument('--output', '-o', type=str, help='Output results to JSON file')
+    parser.add_argument('--full', action='store_true', help='Ignore watermarks and re-read each default window')
     
     args = parser.parse_args()
+    watermarks.set_full(args.full)
     
     if args.list:
         print("\nAvailable Scrapers:")
@@ -0,0 +1,81 @@
+"""
+Single-pass extractor for SAFER company snapshot pages
+
+The snapshot page is a stack of nested layout tables. Walking every table
+with get_text() re-reads the nested ones over and over, and then runs each
+field regex against each table's text. Here the markup is flattened to text
+once and a single precompiled pattern picks up every labeled field in one
+scan.
+"""
+import re
+import html
+from dataclasses import dataclass, asdict
+
+# <br> separates address lines; every other tag is just whitespace
+TAG_RE = re.compile(r'<(br)\b[^>]*>|<[^>]*>', re.I)
+SPACE_RE = re.compile(r'[ \t\r\n\xa0]+')
+
+FIELD_RE = re.compile(
+    r'USDOT Number:\s*(?P<dot>\d+)'
+    r'|Phone:\s*\(?(?P<area>\d{3})\)?[-.\s]?(?P<exchange>\d{3})[-.\s]?(?P<line>\d{4})'
+    r'|Physical Address:\s*(?:(?P<street>[^|,]*?)\s*\|\s*)?'
+    r'(?P<city>[^|,]+?),\s*(?P<state>[A-Z]{2})\s*(?P<zip>\d{5})'
+    r'|Power Units:\s*(?P<power_units>\d+)'
+    r'|Drivers:\s*(?P<drivers>\d+)'
+    r'|MC/MX/FF Number\(s\):\s*MC-(?P<mc>\d+)'
+)
+
+
+@dataclass
+class CarrierSnapshot:
+    """Fields read from one SAFER company snapshot"""
+    dot_number: str = ''
+    phone: str = ''
+    street: str = ''
+    city: str = ''
+    state: str = ''
+    zip: str = ''
+    power_units: int = 0
+    drivers: int = 0
+    mc_number: str = ''
+
+    def to_details(self) -> dict:
+        """Dict in the shape get_carrier_details() has always returned"""
+        return {k: v for k, v in asdict(self).items() if v}
+
+
+def flatten(page: str) -> str:
+    """Markup to a single line of text, with ' | ' where a <br> was"""
+    text = TAG_RE.sub(lambda m: ' | ' if m.group(1) else ' ', page)
+    return SPACE_RE.sub(' ', html.unescape(text))
+
+
+def extract_snapshot(page: str) -> CarrierSnapshot:
+    """Extract carrier fields from snapshot HTML in one pass"""
+    snapshot = CarrierSnapshot()
+    seen = set()
+
+    for match in FIELD_RE.finditer(flatten(page)):
+        field = match.lastgroup
+        # Each label appears once; the first occurrence is the carrier's own
+        if field in seen:
+            continue
+        seen.add(field)
+
+        if field == 'dot':
+            snapshot.dot_number = match.group('dot')
+        elif field == 'line':
+            snapshot.phone = f"({match.group('area')}) {match.group('exchange')}-{match.group('line')}"
+        elif field == 'zip':
+            snapshot.street = (match.group('street') or '').strip()
+            snapshot.city = match.group('city').strip()
+            snapshot.state = match.group('state')
+            snapshot.zip = match.group('zip')
+        elif field == 'power_units':
+            snapshot.power_units = int(match.group('power_units'))
+        elif field == 'drivers':
+            snapshot.drivers = int(match.group('drivers'))
+        elif field == 'mc':
+            snapshot.mc_number = f"MC-{match.group('mc')}"
+
+    return snapshot
@@ -0,0 +1,189 @@
+"""
+Keyword fan-out planning for SOS name searches
+
+SOS portals only search by name, so each scraper runs one search per
+industry keyword. The same entity ("ABC CONSTRUCTION & TRANSPORT") comes
+back from several of them and used to be parsed, classified and
+dedup-checked once per keyword. The planner:
+
+- drops keywords another keyword already covers: with substring search,
+  'electrical' is covered by 'electric'; with prefix search, only by a
+  shorter prefix
+- drops keywords whose results in earlier runs were almost all found by
+  other keywords too (history per portal in .cache/search_<portal>.json),
+  always keeping at least one keyword per target industry
+- runs the remaining searches concurrently, starting no more than one
+  request per `interval` seconds, and dedups rows by file number before
+  the scraper does any work on them
+
+    planner = SearchPlanner('tx_sos', match='contains', interval=2)
+    rows = planner.run(['construction', 'trucking', ...], search, key=lambda r: r['file_number'])
+    logger.info(planner.summary())
+"""
+import os
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import industry_classifier
+
+logger = logging.getLogger('SearchPlanner')
+
+CACHE_DIR = os.getenv(
+    'LEADFLOW_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+)
+
+CONTAINS, BEGINS = 'contains', 'begins'
+
+# A keyword is dropped when less than this share of its rows were unique
+# to it, over at least MIN_HISTORY_ROWS rows of history
+MIN_UNIQUE_SHARE = 0.05
+MIN_HISTORY_ROWS = 50
+
+# Old runs fade, skipped keywords' history included, so a skipped keyword
+# drops under MIN_HISTORY_ROWS after a few runs and is tried again
+HISTORY_DECAY = 0.7
+
+
+class RateLimiter:
+    """Spaces request starts at least `interval` seconds apart across threads"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class SearchPlanner:
+    """Plans and runs one portal's keyword searches, deduplicating rows"""
+
+    def __init__(self, portal: str, match: str = CONTAINS, interval: float = 2.0, workers: int = 3,
+                 history_dir: str = CACHE_DIR):
+        self.portal = portal
+        self.match = match
+        self.limiter = RateLimiter(interval)
+        self.workers = workers
+        self.path = os.path.join(history_dir, f"search_{portal}.json")
+        self.history = self._load()
+        self.stats = {'planned': 0, 'dropped': [], 'rows': 0, 'unique': 0, 'failed': 0}
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self.history, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save search history for {self.portal}: {e}")
+
+    def _covers(self, broad: str, narrow: str) -> bool:
+        """Whether every name matching `narrow` also matches `broad`"""
+        if broad == narrow:
+            return False
+        return narrow.startswith(broad) if self.match == BEGINS else broad in narrow
+
+    def plan(self, keywords: list) -> list:
+        """The keywords worth running, in their original order"""
+        keywords = list(dict.fromkeys(k.lower() for k in keywords))
+        industry = {k: industry_classifier.classify(k) for k in keywords}
+        dropped = {}
+
+        for keyword in keywords:
+            cover = next((k for k in keywords if self._covers(k, keyword)), None)
+            if cover:
+                dropped[keyword] = f"covered by '{cover}'"
+
+        for keyword in keywords:
+            if keyword in dropped:
+                continue
+            seen = self.history.get(keyword)
+            if not seen or seen['rows'] < MIN_HISTORY_ROWS:
+                continue
+            others = [k for k in keywords if k != keyword and k not in dropped and industry[k] == industry[keyword]]
+            # Keep the last keyword standing for an industry
+            if others and seen['unique'] / seen['rows'] < MIN_UNIQUE_SHARE:
+                dropped[keyword] = f"{seen['unique'] / seen['rows']:.0%} unique rows"
+
+        planned = [k for k in keywords if k not in dropped]
+        self.stats['planned'] = len(planned)
+        self.stats['dropped'] = [f"{k} ({reason})" for k, reason in dropped.items()]
+        return planned
+
+    def run(self, keywords: list, search, key) -> list:
+        """
+        Run search(keyword) -> rows for every planned keyword and return the
+        rows with duplicate keys removed (first keyword wins). Each row gets
+        a 'keyword' field naming the search that found it.
+        """
+        planned = self.plan(keywords)
+
+        def fetch(keyword):
+            self.limiter.wait()
+            try:
+                return keyword, search(keyword)
+            except Exception as e:
+                logger.warning(f"{self.portal} search for '{keyword}' failed: {e}")
+                self.stats['failed'] += 1
+                return keyword, []
+
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            results = list(pool.map(fetch, planned))
+
+        found_by = {}
+        for keyword, rows in results:
+            for row in rows:
+                found_by.setdefault(key(row) or id(row), []).append((keyword, row))
+
+        unique = []
+        for hits in found_by.values():
+            keyword, row = hits[0]
+            row['keyword'] = keyword
+            unique.append(row)
+
+        self._record(results, found_by)
+        self.stats['rows'] += sum(len(rows) for _, rows in results)
+        self.stats['unique'] += len(unique)
+        return unique
+
+    def _record(self, results, found_by):
+        ran = {keyword for keyword, _ in results}
+        for keyword, seen in self.history.items():
+            if keyword not in ran:
+                self.history[keyword] = {k: v * HISTORY_DECAY for k, v in seen.items()}
+        for keyword, rows in results:
+            if not rows:
+                continue
+            only_here = sum(1 for hits in found_by.values()
+                            if len({k for k, _ in hits}) == 1 and hits[0][0] == keyword)
+            seen = self.history.get(keyword, {'rows': 0, 'unique': 0})
+            self.history[keyword] = {
+                'rows': seen['rows'] * HISTORY_DECAY + len(rows),
+                'unique': seen['unique'] * HISTORY_DECAY + only_here,
+            }
+        self._save()
+
+    def summary(self) -> str:
+        s = self.stats
+        overlap = s['rows'] - s['unique']
+        share = overlap / s['rows'] if s['rows'] else 0
+        dropped = f"; skipped {', '.join(s['dropped'])}" if s['dropped'] else ''
+        return (f"{s['planned']} searches, {s['rows']} rows, {s['unique']} unique, "
+                f"{overlap} duplicates eliminated ({share:.0%}){dropped}")
@@ -0,0 +1,211 @@
+"""
+Persisted session state for stateful form portals (SOS business searches)
+
+Form portals such as ecorp.sos.ga.gov hand out cookies, anti-forgery tokens
+and ASP.NET viewstate on a bootstrap GET before they accept a search.
+PortalSession keeps that state on disk per portal so it is reused across
+keyword searches and across runs until it expires.
+"""
+import os
+import json
+import time
+import logging
+import threading
+import requests
+from http_client import new_session
+from bs4 import BeautifulSoup
+
+SESSION_DIR = os.getenv(
+    'LEADFLOW_SESSION_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.sessions')
+)
+
+# Portals typically time out idle sessions after 20-60 minutes
+DEFAULT_TTL = 30 * 60
+
+# Hidden form fields that carry server-side state
+TOKEN_FIELDS = (
+    '__RequestVerificationToken',
+    '__VIEWSTATE',
+    '__VIEWSTATEGENERATOR',
+    '__EVENTVALIDATION',
+)
+
+# Status codes that mean the stored state is no longer accepted
+EXPIRED_STATUS = (400, 401, 403, 419, 440)
+
+logger = logging.getLogger('PortalSession')
+
+
+class PortalSession:
+    """requests.Session wrapper that bootstraps once and persists its state"""
+
+    # Counters shared by every portal in this process, keyed by portal name
+    stats = {}
+
+    def __init__(self, portal: str, bootstrap_url: str, headers: dict = None,
+                 ttl: int = DEFAULT_TTL, store_dir: str = SESSION_DIR):
+        self.portal = portal
+        self.bootstrap_url = bootstrap_url
+        self.ttl = ttl
+        self.path = os.path.join(store_dir, f"{portal}.json")
+        self.session = new_session()
+        if headers:
+            self.session.headers.update(headers)
+        self.tokens = {}
+        self.expires_at = 0
+        # Searches may share one session across threads; state changes are serialized
+        self._lock = threading.RLock()
+        self.stats.setdefault(portal, {'bootstraps': 0, 'reused': 0, 'expired': 0})
+
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def load(self) -> bool:
+        """Load persisted state. Returns True if it is still valid."""
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if state.get('bootstrap_url') != self.bootstrap_url or time.time() >= state.get('expires_at', 0):
+            return False
+
+        for cookie in state.get('cookies', []):
+            self.session.cookies.set(
+                cookie['name'], cookie['value'],
+                domain=cookie.get('domain', ''),
+                path=cookie.get('path', '/'),
+                expires=cookie.get('expires'),
+                secure=cookie.get('secure', False),
+            )
+        self.tokens = state.get('tokens', {})
+        self.expires_at = state['expires_at']
+        return True
+
+    def save(self):
+        cookies = [
+            {
+                'name': c.name,
+                'value': c.value,
+                'domain': c.domain,
+                'path': c.path,
+                'expires': c.expires,
+                'secure': c.secure,
+            }
+            for c in self.session.cookies
+        ]
+        state = {
+            'bootstrap_url': self.bootstrap_url,
+            'expires_at': self.expires_at,
+            'cookies': cookies,
+            'tokens': self.tokens,
+        }
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not persist session for {self.portal}: {e}")
+
+    def clear(self):
+        """Drop in-memory and persisted state"""
+        self.session.cookies.clear()
+        self.tokens = {}
+        self.expires_at = 0
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def next_expiry(self) -> float:
+        """Sliding expiry that never outlives the cookies the portal gave us"""
+        expiry = time.time() + self.ttl
+        cookie_expiry = [c.expires for c in self.session.cookies if c.expires]
+        if cookie_expiry:
+            expiry = min(expiry, min(cookie_expiry))
+        return expiry
+
+    def extract_tokens(self, html: str) -> dict:
+        """Pull anti-forgery tokens and viewstate out of a page"""
+        tokens = {}
+        soup = BeautifulSoup(html, 'html.parser')
+        for field in TOKEN_FIELDS:
+            elem = soup.find('input', {'name': field})
+            if elem and elem.get('value') is not None:
+                tokens[field] = elem['value']
+        meta = soup.find('meta', {'name': 'csrf-token'})
+        if meta and meta.get('content'):
+            tokens['csrf-token'] = meta['content']
+        return tokens
+
+    def bootstrap(self):
+        """GET the landing page to pick up cookies and tokens"""
+        response = self.session.get(self.bootstrap_url, timeout=30)
+        response.raise_for_status()
+
+        self.stats[self.portal]['bootstraps'] += 1
+        self.tokens = self.extract_tokens(response.text)
+        self.expires_at = self.next_expiry()
+        self.save()
+        logger.info(f"Bootstrapped {self.portal} session ({len(self.tokens)} tokens)")
+
+    def warm(self):
+        """Make sure the session has valid state, bootstrapping only if needed"""
+        if self.is_fresh():
+            self.stats[self.portal]['reused'] += 1
+            return
+        if self.load():
+            self.stats[self.portal]['reused'] += 1
+            logger.debug(f"Reusing persisted {self.portal} session")
+            return
+        self.bootstrap()
+
+    def with_tokens(self, data: dict = None) -> dict:
+        """Form payload with the current session tokens merged in"""
+        payload = dict(self.tokens)
+        if data:
+            payload.update(data)
+        return payload
+
+    def request(self, method: str, url: str, data: dict = None, **kwargs) -> requests.Response:
+        """Send a request on a warm session, re-bootstrapping once if it was rejected"""
+        with self._lock:
+            self.warm()
+            payload = self.with_tokens(data) if data is not None else None
+        response = self.session.request(method, url, data=payload, **kwargs)
+
+        with self._lock:
+            if response.status_code in EXPIRED_STATUS:
+                self.stats[self.portal]['expired'] += 1
+                logger.info(f"{self.portal} session rejected ({response.status_code}), re-bootstrapping")
+                self.clear()
+                self.bootstrap()
+                payload = self.with_tokens(data) if data is not None else None
+                response = self.session.request(method, url, data=payload, **kwargs)
+            else:
+                # Portals rotate tokens on each response; keep the latest ones
+                if any(field in response.text for field in TOKEN_FIELDS):
+                    rotated = self.extract_tokens(response.text)
+                    if rotated:
+                        self.tokens.update(rotated)
+                self.expires_at = self.next_expiry()
+                self.save()
+
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, data: dict = None, **kwargs) -> requests.Response:
+        return self.request('POST', url, data=data, **kwargs)
+
+    @classmethod
+    def summary(cls, portal: str) -> str:
+        counts = cls.stats.get(portal, {})
+        return (f"{counts.get('bootstraps', 0)} bootstrap(s), "
+                f"{counts.get('reused', 0)} redundant bootstrap(s) avoided, "
+                f"{counts.get('expired', 0)} expired")
@@ -0,0 +1,138 @@
+"""
+Socrata (SODA 2) query client
+
+Pages through a dataset with keyset pagination on the system :id column
+($order=:id plus ":id > last" in $where), so no rows are skipped or
+repeated however large the result is. Callers ask only for the columns
+they map ($select) and push their filters into $where, so rows that would
+be thrown away never leave the server.
+
+    client = SocrataClient('https://data.austintexas.gov/resource/3syk-w9eu.json', label='Austin')
+    for row in client.query(select=['permit_number', 'contractor_name'],
+                            where="issue_date > '2025-01-01T00:00:00'"):
+        ...
+    print(client.summary())   # rows, pages and bytes transferred
+
+A query stops after max_rows; client.truncated then says rows were left
+unread, so callers don't treat the result as complete.
+
+Set SOCRATA_APP_TOKEN to send an app token for higher rate limits.
+"""
+import os
+import json
+import http_client
+from json_stream import iter_json_array
+
+PAGE_SIZE = 1000
+
+# Hard stop per query in case a filter is far broader than intended
+MAX_ROWS = 50_000
+
+APP_TOKEN = os.getenv('SOCRATA_APP_TOKEN', '')
+
+
+class _CountingResponse:
+    """Passes a streamed response through to iter_json_array, counting bytes"""
+
+    def __init__(self, response, counter):
+        self.response = response
+        self.encoding = response.encoding
+        self.counter = counter
+
+    def iter_content(self, chunk_size=1):
+        for chunk in self.response.iter_content(chunk_size=chunk_size):
+            self.counter['bytes'] += len(chunk)
+            yield chunk
+
+
+def quote(value: str) -> str:
+    """SoQL string literal"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+class SocrataClient:
+    """Paged, projected queries against one Socrata resource endpoint"""
+
+    def __init__(self, url: str, label: str = None, headers: dict = None,
+                 page_size: int = PAGE_SIZE, max_rows: int = MAX_ROWS, timeout: int = 30):
+        self.url = url
+        self.label = label or url
+        self.headers = dict(headers or {})
+        if APP_TOKEN:
+            self.headers['X-App-Token'] = APP_TOKEN
+        self.page_size = page_size
+        self.max_rows = max_rows
+        self.timeout = timeout
+        self._columns = None
+        self.stats = {'rows': 0, 'pages': 0, 'bytes': 0}
+        self.truncated = False
+
+    def _get(self, params):
+        response = http_client.get(self.url, params=params, headers=self.headers,
+                                   timeout=self.timeout, stream=True)
+        if response.status_code != 200:
+            body = response.text[:200]
+            response.close()
+            raise RuntimeError(f"Socrata {self.label}: HTTP {response.status_code}: {body}")
+        return response
+
+    def columns(self) -> list:
+        """Field names of the dataset, from the X-SODA2-Fields header of a one-row query"""
+        if self._columns is None:
+            response = self._get({'$limit': 1})
+            try:
+                self._columns = json.loads(response.headers.get('X-SODA2-Fields', '[]'))
+                self.stats['bytes'] += len(response.content)
+            finally:
+                response.close()
+        return self._columns
+
+    def pick(self, *candidates) -> str:
+        """First candidate column the dataset actually has, or None"""
+        available = set(self.columns())
+        return next((c for c in candidates if c and c in available), None)
+
+    def query(self, select: list = None, where: str = None):
+        """Yield rows for the query, one page of page_size at a time"""
+        fields = list(dict.fromkeys(select or []))
+        last_id = None
+        fetched = 0
+        self.truncated = False
+
+        while fetched < self.max_rows:
+            clauses = [f"({where})"] if where else []
+            if last_id is not None:
+                clauses.append(f":id > {quote(last_id)}")
+
+            params = {
+                '$order': ':id',
+                '$limit': min(self.page_size, self.max_rows - fetched),
+            }
+            if fields:
+                params['$select'] = ', '.join([':id'] + fields)
+            if clauses:
+                params['$where'] = ' AND '.join(clauses)
+
+            response = self._get(params)
+            rows = 0
+            try:
+                for row in iter_json_array(_CountingResponse(response, self.stats)):
+                    rows += 1
+                    last_id = row.pop(':id', last_id)
+                    yield row
+            finally:
+                response.close()
+
+            self.stats['pages'] += 1
+            self.stats['rows'] += rows
+            fetched += rows
+            if rows < params['$limit'] or last_id is None:
+                break
+        else:
+            # Stopped at max_rows with the last page full
+            self.truncated = True
+
+    def summary(self) -> str:
+        s = self.stats
+        cut = f", truncated at {self.max_rows:,}" if self.truncated else ''
+        return f"{self.label}: {s['rows']} rows in {s['pages']} pages, {s['bytes'] / 1024:.0f} KB{cut}"
@@ -0,0 +1,197 @@
+"""
+Declarative table extraction
+
+Results pages from OSHA and the SOS portals are all "find the table, skip
+the header, read cells by position". Each source declares that once as a
+TableSpec: where the rows are, how many cells a data row has, and which
+column feeds which field through which converter. The spec is compiled on
+first use into XPath expressions over lxml's tree and applied to every row
+of a page in one call, so cells are never wrapped in BeautifulSoup objects.
+
+    OSHA_RESULTS = TableSpec(
+        table_class='table',
+        min_cells=5,
+        limit=50,
+        columns=[
+            Column('company_name', 0),
+            Column('inspection_nr', 0, href=r'InspNr=(\\d+)'),
+            Column('penalty', 4, convert=parse_penalty),
+        ],
+    )
+    records = OSHA_RESULTS.extract(response)   # [{'company_name': ..., ...}]
+
+Without lxml installed the same spec runs over BeautifulSoup.
+"""
+import re
+from parsing import make_soup, response_encoding, SoupStrainer
+
+try:
+    import lxml.html
+    from lxml import etree
+    HAVE_LXML = True
+except ImportError:
+    HAVE_LXML = False
+
+
+class Column:
+    """
+    One output field. index is the cell position, or None for the whole
+    row. href reads the first link's href instead of the text. pattern
+    (or href, when given as a regex) keeps group 1 of the first match.
+    convert runs last on the string.
+    """
+    __slots__ = ('name', 'index', 'convert', 'pattern', 'link', 'default')
+
+    def __init__(self, name: str, index: int = None, convert=None, pattern: str = None,
+                 href=None, default=''):
+        self.name = name
+        self.index = index
+        self.convert = convert
+        self.link = href is not None
+        if isinstance(href, str):
+            pattern = href
+        self.pattern = re.compile(pattern) if pattern else None
+        self.default = default
+
+
+def _fold(text: str) -> str:
+    return ' '.join(text.split())
+
+
+def _class_test(classes) -> str:
+    return ' or '.join(
+        f"contains(concat(' ', normalize-space(@class), ' '), ' {c} ')" for c in classes
+    )
+
+
+class TableSpec:
+    """Where a source's result rows are and how their cells map to fields"""
+
+    def __init__(self, columns: list, row_class=None, table_class: str = None,
+                 table_text: str = None, skip_header: bool = True, min_cells: int = 1,
+                 limit: int = None):
+        # row_class: rows are <tr> elements with one of these classes, anywhere
+        # table_class / table_text: rows are the <tr>s of that one table; the
+        #   first table with the class, else the first containing the text
+        #   (or, with no table_text, the first table on the page)
+        # neither: every <tr> on the page
+        self.columns = columns
+        self.row_classes = (row_class,) if isinstance(row_class, str) else tuple(row_class or ())
+        self.table_class = table_class
+        self.table_text = table_text
+        self.skip_header = skip_header and not self.row_classes
+        self.min_cells = min_cells
+        self.limit = limit
+        self._compiled = None
+
+    def __getstate__(self):
+        # Compiled XPath objects don't pickle; workers recompile on first use
+        state = self.__dict__.copy()
+        state['_compiled'] = None
+        return state
+
+    @property
+    def strainer(self) -> SoupStrainer:
+        """Only the elements this spec reads, for make_soup(parse_only=...)"""
+        if self.row_classes:
+            return SoupStrainer('tr', class_=list(self.row_classes))
+        return SoupStrainer('table')
+
+    def _compile(self):
+        # Table lookups in order of preference; None means rows are found page-wide
+        tables = None
+        if self.row_classes:
+            rows = etree.XPath(f"//tr[{_class_test(self.row_classes)}]")
+        elif self.table_class or self.table_text:
+            tables = []
+            if self.table_class:
+                tables.append(etree.XPath(f"//table[{_class_test([self.table_class])}]"))
+            if self.table_text:
+                by_text = etree.XPath('//table[contains(string(.), $text)]')
+                tables.append(lambda root: by_text(root, text=self.table_text))
+            else:
+                tables.append(etree.XPath('//table'))
+            # Rows of the table itself, not of tables nested inside it
+            rows = etree.XPath('./tr | ./thead/tr | ./tbody/tr | ./tfoot/tr')
+        else:
+            rows = etree.XPath('//tr')
+        self._compiled = (tables, rows, etree.XPath('./td'))
+        return self._compiled
+
+    def _lxml_rows(self, page):
+        tables, rows, _ = self._compiled or self._compile()
+        if not page.content.strip():
+            return []
+        parser = lxml.html.HTMLParser(encoding=response_encoding(page))
+        root = lxml.html.document_fromstring(page.content, parser=parser)
+        if tables is None:
+            return rows(root)
+        for find in tables:
+            found = find(root)
+            if found:
+                return rows(found[0])
+        return []
+
+    def _soup_rows(self, page):
+        soup = make_soup(page, parse_only=self.strainer)
+        if self.row_classes:
+            return soup.find_all('tr', class_=list(self.row_classes))
+        if not (self.table_class or self.table_text):
+            return soup.find_all('tr')
+        table = soup.find('table', class_=self.table_class) if self.table_class else None
+        if table is None and self.table_text:
+            table = next((t for t in soup.find_all('table') if self.table_text in t.get_text()), None)
+        if table is None and not self.table_text:
+            table = soup.find('table')
+        return table.find_all('tr', recursive=False) + [
+            tr for part in table.find_all(['thead', 'tbody', 'tfoot'], recursive=False)
+            for tr in part.find_all('tr', recursive=False)
+        ] if table else []
+
+    def extract(self, page) -> list:
+        """Field dicts for every data row of a response or Page"""
+        if HAVE_LXML:
+            rows = self._lxml_rows(page)
+            cells_of = self._compiled[2]
+            text_of = lambda el: el.text_content()
+            href_of = lambda el: next(iter(el.xpath('.//a/@href')), '')
+        else:
+            rows = self._soup_rows(page)
+            cells_of = lambda row: row.find_all('td', recursive=False)
+            text_of = lambda el: el.get_text(' ')
+            href_of = lambda el: (el.find('a', href=True) or {}).get('href', '')
+
+        if self.skip_header:
+            rows = rows[1:]
+
+        records = []
+        columns = self.columns
+        for row in rows:
+            cells = cells_of(row)
+            if len(cells) < self.min_cells:
+                continue
+
+            record = {}
+            for column in columns:
+                if column.index is None:
+                    element = row
+                elif column.index < len(cells):
+                    element = cells[column.index]
+                else:
+                    record[column.name] = column.default
+                    continue
+
+                value = href_of(element) if column.link else _fold(text_of(element))
+                if column.pattern is not None:
+                    match = column.pattern.search(value)
+                    if not match:
+                        record[column.name] = column.default
+                        continue
+                    value = match.group(1)
+                record[column.name] = column.convert(value) if column.convert else value
+
+            records.append(record)
+            if self.limit and len(records) >= self.limit:
+                break
+
+        return records
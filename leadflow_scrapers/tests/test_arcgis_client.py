@@ -0,0 +1,107 @@
+import pytest
+
+import arcgis_client
+from arcgis_client import ArcGISError, find_layer
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, data):
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+class Portal(dict):
+    """Canned ArcGIS JSON by URL, recording the URLs asked for"""
+
+    def __init__(self):
+        super().__init__()
+        self.requested = []
+
+    def get(self, url, params=None, **kwargs):
+        self.requested.append(url)
+        if url not in self:
+            return FakeResponse({'error': {'code': 404, 'message': 'Not found'}})
+        return FakeResponse(self[url])
+
+
+@pytest.fixture
+def portal(monkeypatch):
+    portal = Portal()
+    monkeypatch.setattr(arcgis_client.http_client, 'get', portal.get)
+    monkeypatch.setattr(arcgis_client, '_layers', {})
+    return portal
+
+
+def test_layer_url_is_returned_without_requests(portal):
+    url = 'https://gis.example.gov/arcgis/rest/services/Permits/FeatureServer/3'
+    assert find_layer(url) == url
+    assert portal.requested == []
+
+
+def test_services_directory_is_searched_through_folders(portal):
+    root = 'https://gis.example.gov/portal/rest/services'
+    portal[root] = {'folders': ['Basemaps', 'Planning'], 'services': [
+        {'name': 'Parcels', 'type': 'MapServer'},
+    ]}
+    portal[f'{root}/Basemaps'] = {'services': []}
+    portal[f'{root}/Planning'] = {'services': [
+        {'name': 'Planning/Zoning', 'type': 'FeatureServer'},
+        {'name': 'Planning/Building_Permits', 'type': 'FeatureServer'},
+    ]}
+    portal[f'{root}/Planning/Building_Permits/FeatureServer'] = {'layers': [
+        {'id': 0, 'name': 'Inspections'},
+        {'id': 2, 'name': 'Building Permits'},
+    ]}
+
+    assert find_layer(root) == f'{root}/Planning/Building_Permits/FeatureServer/2'
+    # Resolved once per process
+    calls = len(portal.requested)
+    find_layer(root)
+    assert len(portal.requested) == calls
+
+
+def test_hub_dataset_follows_its_service(portal):
+    service = 'https://services.arcgis.com/abc/arcgis/rest/services/Permits/FeatureServer'
+    portal['https://city.hub.example.com/api/v3/datasets/building-permits'] = {
+        'data': {'attributes': {'url': service}}}
+    portal[service] = {'layers': [{'id': 0, 'name': 'COH_PERMITS'}]}
+
+    assert find_layer('https://city.hub.example.com/datasets/building-permits') == f'{service}/0'
+
+
+def test_unresolvable_urls_raise(portal):
+    root = 'https://gis.example.gov/arcgis/rest/services'
+    portal[root] = {'services': [{'name': 'Parcels', 'type': 'MapServer'}]}
+    with pytest.raises(ArcGISError):
+        find_layer(root)
+    with pytest.raises(ArcGISError):
+        find_layer('https://example.gov/open-data/permits')
+
+
+class LayerResponse(FakeResponse):
+    content = b'{}'
+
+
+def test_query_past_max_rows_is_flagged_truncated(monkeypatch):
+    layer = 'https://gis.example.gov/arcgis/rest/services/Permits/FeatureServer/0'
+
+    def get(url, params=None, **kwargs):
+        if url == layer:
+            return LayerResponse({'maxRecordCount': 10, 'objectIdField': 'OBJECTID'})
+        if params.get('returnCountOnly'):
+            return LayerResponse({'count': 35})
+        offset, size = params['resultOffset'], params['resultRecordCount']
+        return LayerResponse({'features': [{'attributes': {'OBJECTID': i}} for i in range(offset, offset + size)]})
+
+    monkeypatch.setattr(arcgis_client.http_client, 'get', get)
+    client = arcgis_client.ArcGISClient(layer, max_rows=20)
+    assert len(list(client.query())) == 20
+    assert client.truncated
+
+    client = arcgis_client.ArcGISClient(layer, max_rows=50)
+    assert len(list(client.query())) == 35
+    assert not client.truncated
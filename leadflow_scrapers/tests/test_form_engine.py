@@ -0,0 +1,92 @@
+import os
+from urllib.parse import urljoin
+
+import pytest
+import requests
+
+from form_engine import FormEngine, FormError, find_form
+from license_scraper import LICENSE_BOARDS, scrape_board
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'ga_license')
+SEARCH_URL = 'https://verify.sos.ga.gov/verification/Search.aspx'
+
+
+def page(name, url=SEARCH_URL):
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response.headers['Content-Type'] = 'text/html; charset=utf-8'
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        response._content = f.read()
+    return response
+
+
+class RecordedPortal:
+    """Session replaying the saved GA search pages and recording every POST"""
+
+    def __init__(self):
+        self.posts = []
+
+    def get(self, url, params=None, timeout=None):
+        return page('search.html', url)
+
+    def post(self, url, data=None, timeout=None):
+        self.posts.append(data)
+        if data.get('__EVENTARGUMENT') == 'Page$2':
+            return page('results_2.html', url)
+        return page('results_1.html', url)
+
+
+@pytest.fixture
+def engine():
+    config = {**LICENSE_BOARDS['GA']['form'], 'delay': 0}
+    return FormEngine(config, session=RecordedPortal())
+
+
+def test_search_posts_the_landing_viewstate(engine):
+    list(engine.pages({'ddLicenseType': 'Electrical', 'txtIssueDateFrom': '10/01/2026'}))
+    search = engine.session.posts[0]
+
+    landing = find_form(page('search.html'), 'aspnetForm')
+    for hidden in ('__VIEWSTATE', '__VIEWSTATEGENERATOR', '__EVENTVALIDATION'):
+        assert search[hidden] == landing.fields[hidden]
+    assert urljoin(SEARCH_URL, './Search.aspx') == landing.action
+    assert search['ctl00$MainContent$ddLicenseType'] == 'EN'
+    assert search['ctl00$MainContent$txtIssueDateFrom'] == '10/01/2026'
+    assert search['ctl00$MainContent$btnSearch'] == 'Search'
+    assert 'ctl00$MainContent$btnClear' not in search
+
+
+def test_postback_paging_echoes_the_results_viewstate(engine):
+    rows = engine.search({'ddLicenseType': 'Electrical', 'txtIssueDateFrom': '10/01/2026'})
+
+    assert [row['license_number'] for row in rows] == ['EN215501', 'EN215502', 'EN215503']
+    assert len(engine.session.posts) == 2
+    postback = engine.session.posts[1]
+    results = find_form(page('results_1.html'), 'aspnetForm')
+    assert postback['__EVENTTARGET'] == 'ctl00$MainContent$gvResults'
+    assert postback['__EVENTARGUMENT'] == 'Page$2'
+    assert postback['__VIEWSTATE'] == results.fields['__VIEWSTATE'] != find_form(page('search.html')).fields['__VIEWSTATE']
+    assert postback['__EVENTVALIDATION'] == results.fields['__EVENTVALIDATION']
+    # A postback fires the pager, not the search button
+    assert 'ctl00$MainContent$btnSearch' not in postback
+
+
+def test_configured_field_missing_from_form_raises(engine):
+    with pytest.raises(FormError, match='txtIssueDateTo'):
+        list(engine.pages({'txtIssueDateTo': '10/31/2026'}))
+    assert engine.session.posts == []
+
+
+def test_ga_board_config_matches_the_form(monkeypatch, engine):
+    import watermarks
+    from datetime import datetime
+    monkeypatch.setattr(watermarks, 'advance', lambda *args, **kwargs: None)
+
+    leads = scrape_board('GA', engine=engine, since=datetime(2026, 10, 1), until=datetime(2026, 10, 15))
+
+    assert {lead['source_id'] for lead in leads} == {'LICENSE-GA-EN215501', 'LICENSE-GA-EN215502',
+                                                     'LICENSE-GA-EN215503'}
+    # One search per license type; each found its option by label
+    searches = [post for post in engine.session.posts if post.get('__EVENTTARGET') == '']
+    assert [post['ctl00$MainContent$ddLicenseType'] for post in searches] == ['CN', 'EN', 'PL']
@@ -0,0 +1,54 @@
+import pytest
+import requests
+
+httpx = pytest.importorskip('httpx')
+pytest.importorskip('h2')
+
+import http_client
+
+
+def cookie_session(handler):
+    """
+    HTTP/2 session whose httpx client answers from handler instead of the
+    network. Handlers stream their bodies (content=iter(...)) as a server does.
+    """
+    session = requests.Session()
+    # A CA bundle or proxy from the environment sends requests to the HTTP/1.1 fallback
+    session.trust_env = False
+    session.mount('https://', http_client.HTTP2Adapter(transport=httpx.MockTransport(handler)))
+    return session
+
+
+def test_http2_set_cookie_reaches_response_and_session_jar():
+    def handler(request):
+        return httpx.Response(200, headers=[
+            ('Set-Cookie', 'ASP.NET_SessionId=abc123; Path=/'),
+            ('Set-Cookie', 'token=xyz; Path=/'),
+        ], content=iter([b'ok']))
+
+    session = cookie_session(handler)
+    response = session.get('https://portal.example.gov/search')
+
+    assert response.cookies.get_dict() == {'ASP.NET_SessionId': 'abc123', 'token': 'xyz'}
+    assert session.cookies.get_dict() == {'ASP.NET_SessionId': 'abc123', 'token': 'xyz'}
+    assert 'abc123' in response.headers['Set-Cookie'] and 'xyz' in response.headers['Set-Cookie']
+
+
+def test_http2_cookies_come_only_from_the_session_jar():
+    """Cookies live in the requests jar (saved and cleared by PortalSession), never in httpx's client"""
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get('cookie', ''))
+        if request.url.path == '/':
+            return httpx.Response(200, headers=[('Set-Cookie', 'sid=1; Path=/')], content=iter([b'ok']))
+        return httpx.Response(200, content=iter([b'ok']))
+
+    session = cookie_session(handler)
+    session.get('https://portal.example.gov/')
+    session.get('https://portal.example.gov/results')
+    session.cookies.clear()
+    session.get('https://portal.example.gov/results')
+
+    assert seen == ['', 'sid=1', '']
+    assert not session.get_adapter('https://portal.example.gov/').client.cookies.jar
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('supabase')
+from osha_scraper import OSHAScraper, results_leads  # noqa: E402
+from osha_detail import apply_details  # noqa: E402
+
+
+def days_ago(days):
+    return (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+
+
+def lead(signal_date, **raw):
+    return {'company_name': 'Acme Fabrication', 'industry': 'Restaurant', 'employees_estimated': '10-25',
+            'signal_type': 'osha_violation', 'signal_date': signal_date,
+            'raw_data': {'inspection_nr': '1234567', **raw}}
+
+
+def test_penalty_and_violation_type_raise_the_score():
+    small = OSHAScraper.score_lead(lead(days_ago(40), penalty=0.0, violation_type='Other', violations=1),
+                                   'osha_scraper')
+    large = OSHAScraper.score_lead(lead(days_ago(40), penalty=45000.0, violation_type='Willful', violations=2),
+                                   'osha_scraper')
+
+    assert (small['score'], small['priority']) == (55, 'LOW')
+    assert (large['score'], large['priority']) == (85, 'HIGH')
+    assert large['lead_type'] == 'coverage_gap' and large['source'] == 'osha_scraper'
+
+
+def test_recency_comes_from_the_inspection_open_date():
+    recent = OSHAScraper.calculate_score(lead(days_ago(3), penalty=5000.0, violation_type='Serious', violations=1))
+    old = OSHAScraper.calculate_score(lead(days_ago(300), penalty=5000.0, violation_type='Serious', violations=1))
+    assert recent - old == 15
+
+
+def test_leads_without_details_get_no_recency():
+    # signal_date is the scrape date until osha_detail fills in the open date
+    assert OSHAScraper.calculate_score(lead(days_ago(0))) == 55
+
+
+def test_search_results_score_before_and_after_details():
+    records = [{'company_name': 'GULF COAST FABRICATORS LLC', 'inspection_nr': '1700001',
+                'city': 'HOUSTON', 'sic_code': '3441', 'penalty': 12000.0}]
+    listed = results_leads(records, 'TX')[0]
+    assert 'violation_type' not in listed['raw_data']
+
+    # Manufacturing +20, 10-25 employees +5, $10,000+ penalty +10; no recency or type
+    before = OSHAScraper.score_lead(listed, 'osha')
+    assert (before['score'], before['priority']) == (85, 'HIGH')
+
+    apply_details(listed, {'opened': days_ago(200), 'case_status': 'OPEN', 'violations': 2,
+                           'violation_counts': {'Other': 2}, 'violation_type': 'Other',
+                           'penalty': 2500.0, 'initial_penalty': 4000.0})
+    after = OSHAScraper.score_lead(listed, 'osha')
+    assert after['signal_date'] == days_ago(200)
+    assert (after['score'], after['priority']) == (80, 'HIGH')
+
+    apply_details(listed, {'opened': days_ago(10), 'violations': 1, 'violation_type': 'Serious',
+                           'penalty': 12000.0})
+    assert OSHAScraper.score_lead(listed, 'osha')['score'] == 100
+
+
+def test_inspection_ids_match_across_osha_sources():
+    from osha_real import inspection_leads
+
+    records = [{'company_name': 'GULF COAST FABRICATORS LLC', 'inspection_nr': '1700001', 'city': 'Houston',
+                'sic': '34'},
+               {'company_name': 'GULF COAST FABRICATORS LLC', 'inspection_nr': '1700002', 'city': 'Houston',
+                'sic': '34'}]
+    listed = results_leads([{**records[0], 'sic_code': '3441', 'penalty': 5000.0}], 'TX')[0]
+
+    first, second = inspection_leads(records, 'TX')
+    # A company's second inspection is its own lead
+    assert first['source_id'] != second['source_id']
+    assert first['source_id'] == listed['source_id'] == OSHAScraper.generate_source_id('osha', '1700001')
@@ -0,0 +1,31 @@
+import pytest
+
+from pagination import Paginator, OFFSET
+
+
+def pages(*sizes):
+    """fetch/extract over canned page sizes; None raises like a non-200 does"""
+    def fetch(offset):
+        return sizes[offset // 2]
+
+    def extract(size):
+        if size is None:
+            raise ConnectionError('HTTP 503')
+        return list(range(size)), size >= 2
+    return fetch, extract
+
+
+def test_walk_to_the_last_page_is_exhausted():
+    paginator = Paginator('test_exhausted', style=OFFSET, page_size=2, workers=1)
+    assert len(list(paginator.walk(*pages(2, 2, 1)))) == 5
+    assert paginator.stats['stopped'] == 'exhausted'
+
+
+def test_failed_page_stops_the_walk_as_an_error():
+    paginator = Paginator('test_error', style=OFFSET, page_size=2, workers=1)
+    items = []
+    with pytest.raises(ConnectionError):
+        for item in paginator.walk(*pages(2, None, 1)):
+            items.append(item)
+    assert items == [0, 1]
+    assert paginator.stats['stopped'] == 'error'
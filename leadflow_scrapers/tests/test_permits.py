@@ -0,0 +1,22 @@
+import pytest
+
+pytest.importorskip('supabase')
+from permits_scraper import CITY_PORTALS, issue_date, permit_lead  # noqa: E402
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2026-03-14T00:00:00.000', '2026-03-14'),    # Socrata floating timestamp
+    (1773446400000, '2026-03-14'),                # ArcGIS date, epoch ms UTC
+    ('03/14/2026', '2026-03-14'),
+    ('', None),
+    (None, None),
+    ('pending', None),
+])
+def test_issue_date(value, expected):
+    assert issue_date(value) == expected
+
+
+def test_permit_lead_is_dated_by_its_issue_date():
+    lead = permit_lead('Dallas', CITY_PORTALS['Dallas'], 'LONE STAR BUILDERS LLC', 'B26-0001', '75201', '',
+                       '2026-03-14T00:00:00.000')
+    assert lead['signal_date'] == '2026-03-14'
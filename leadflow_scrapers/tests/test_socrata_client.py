@@ -0,0 +1,44 @@
+import json
+
+import socrata_client
+from socrata_client import SocrataClient
+
+
+class FakeResponse:
+    status_code = 200
+    encoding = 'utf-8'
+    headers = {}
+
+    def __init__(self, rows):
+        self.body = json.dumps(rows).encode()
+
+    def iter_content(self, chunk_size=1):
+        yield self.body
+
+    def close(self):
+        pass
+
+
+def dataset(monkeypatch, total):
+    """A dataset of total rows with :id 0..total-1, answering keyset pages"""
+    def get(url, params=None, **kwargs):
+        where = params.get('$where', '')
+        start = int(where.rsplit("'", 2)[1]) + 1 if ':id >' in where else 0
+        ids = range(start, min(start + params['$limit'], total))
+        return FakeResponse([{':id': str(i), 'permit_number': f'P{i}'} for i in ids])
+    monkeypatch.setattr(socrata_client.http_client, 'get', get)
+
+
+def test_query_reads_every_row_under_max_rows(monkeypatch):
+    dataset(monkeypatch, 25)
+    client = SocrataClient('https://data.example.gov/resource/abcd-1234.json', page_size=10, max_rows=50)
+    assert len(list(client.query(select=['permit_number']))) == 25
+    assert not client.truncated
+
+
+def test_query_past_max_rows_is_flagged_truncated(monkeypatch):
+    dataset(monkeypatch, 75)
+    client = SocrataClient('https://data.example.gov/resource/abcd-1234.json', page_size=10, max_rows=50)
+    assert len(list(client.query(select=['permit_number']))) == 50
+    assert client.truncated
+    assert 'truncated at 50' in client.summary()
@@ -2,12 +2,15 @@
 Texas Secretary of State - New Business Formations Scraper
 Source: https://mycpa.cpa.state.tx.us/coa/
 """
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
-import re
-import time
+from table_spec import TableSpec, Column
+from datetime import datetime
 from base_scraper import BaseScraper
+import industry_classifier
+import name_normalizer
+import gazetteer
+from session_store import PortalSession
+from search_planner import SearchPlanner, CONTAINS
+import watermarks
 
 class TexasSOSScraper(BaseScraper):
     """Scrape new business formations from Texas Secretary of State"""
@@ -15,62 +18,39 @@ class TexasSOSScraper(BaseScraper):
     BASE_URL = "https://mycpa.cpa.state.tx.us/coa/"
     SEARCH_URL = "https://mycpa.cpa.state.tx.us/coa/coaSearch.do"
     
-    # Industry keywords for classification
-    INDUSTRY_KEYWORDS = {
-        'Construction': ['construction', 'builder', 'roofing', 'concrete', 'framing', 'drywall', 'excavation', 'grading', 'paving'],
-        'Trucking': ['trucking', 'freight', 'transport', 'hauling', 'logistics', 'carrier', 'moving'],
-        'Oilfield': ['oilfield', 'drilling', 'petroleum', 'energy', 'wellhead', 'pipeline', 'frac'],
-        'Electrical': ['electric', 'electrical', 'wiring', 'power'],
-        'Plumbing': ['plumbing', 'plumber', 'hvac', 'heating', 'cooling', 'air conditioning'],
-        'Restaurant': ['restaurant', 'cafe', 'grill', 'kitchen', 'food', 'catering', 'bar', 'tavern'],
-        'Medical': ['medical', 'health', 'clinic', 'dental', 'therapy', 'chiropractic', 'physician'],
-        'Landscaping': ['landscaping', 'lawn', 'garden', 'tree service', 'irrigation'],
-        'Manufacturing': ['manufacturing', 'fabrication', 'machine', 'welding', 'metal'],
-        'Cleaning': ['cleaning', 'janitorial', 'maid', 'sanitation'],
-        'Auto Services': ['auto', 'automotive', 'mechanic', 'body shop', 'tire', 'collision'],
-        'Staffing': ['staffing', 'employment', 'recruiting', 'temp', 'personnel'],
-        'Warehouse': ['warehouse', 'storage', 'distribution', 'fulfillment'],
-        'Retail': ['retail', 'store', 'shop', 'boutique', 'sales'],
-        'Wholesale': ['wholesale', 'distributor', 'supply'],
-        'Real Estate': ['real estate', 'realty', 'property', 'investment'],
-        'Technology': ['technology', 'software', 'tech', 'digital', 'it services', 'computer'],
-        'Consulting': ['consulting', 'consultant', 'advisory', 'management']
-    }
+    # Be nice to the server: seconds between search requests
+    SEARCH_INTERVAL = 2
     
-    # Texas cities for validation
-    TX_CITIES = {
-        'houston', 'dallas', 'san antonio', 'austin', 'fort worth', 'el paso', 'arlington',
-        'corpus christi', 'plano', 'laredo', 'lubbock', 'irving', 'garland', 'amarillo',
-        'grand prairie', 'brownsville', 'mckinney', 'frisco', 'pasadena', 'mesquite',
-        'killeen', 'mcallen', 'waco', 'midland', 'odessa', 'beaumont', 'denton', 'carrollton',
-        'round rock', 'lewisville', 'tyler', 'college station', 'abilene', 'pearland',
-        'san angelo', 'league city', 'allen', 'longview', 'sugar land', 'edinburg',
-        'mission', 'bryan', 'pharr', 'baytown', 'temple', 'missouri city', 'flower mound',
-        'north richland hills', 'harlingen', 'conroe', 'new braunfels', 'victoria', 'cedar park'
-    }
+    # Formation window when there is no watermark yet
+    DAYS_BACK = 7
+    
+    # Name, file number, formation date, address
+    RESULTS_TABLE = TableSpec(
+        row_class='resultsRow',
+        min_cells=4,
+        columns=[
+            Column('company_name', 0),
+            Column('file_number', 1),
+            Column('formation_date', 2),
+            Column('address', 3),
+        ],
+    )
     
     def get_source_name(self) -> str:
         return 'tx_sos'
     
     def classify_industry(self, company_name: str) -> str:
         """Classify company industry based on name keywords"""
-        name_lower = company_name.lower()
-        for industry, keywords in self.INDUSTRY_KEYWORDS.items():
-            for keyword in keywords:
-                if keyword in name_lower:
-                    return industry
-        return 'Other'
+        return industry_classifier.classify(company_name)
     
     def extract_city(self, address: str) -> str:
         """Extract city from address string"""
         if not address:
             return 'Unknown'
         
-        # Common patterns
-        address_lower = address.lower()
-        for city in self.TX_CITIES:
-            if city in address_lower:
-                return city.title()
+        city = gazetteer.find_city(address, 'TX')
+        if city:
+            return city
         
         # Try to extract from comma-separated
         parts = address.split(',')
@@ -83,9 +63,9 @@ class TexasSOSScraper(BaseScraper):
         """Scrape new business formations from TX SOS"""
         leads = []
         
-        # Get formations from last 7 days
+        # Get formations since the last complete run (or the last 7 days)
         end_date = datetime.now()
-        start_date = end_date - timedelta(days=7)
+        start_date = watermarks.since('tx_sos', 'TX', self.DAYS_BACK)
         
         self.logger.info(f"Scraping TX SOS formations from {start_date.date()} to {end_date.date()}")
         
@@ -94,85 +74,71 @@ class TexasSOSScraper(BaseScraper):
             # This is a simplified version - real implementation would need
             # to handle their specific form submission and pagination
             
-            session = requests.Session()
-            
             # Set headers to mimic browser
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
                 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             }
             
+            # Cookies from the landing page are reused across keywords and runs
+            session = self.get_portal_session(self.BASE_URL, headers)
+            
             # Search parameters for new formations
             # Target industries we care about
             target_keywords = ['construction', 'trucking', 'transport', 'oilfield', 'electric', 'plumbing']
             
-            for keyword in target_keywords:
-                self.logger.info(f"Searching for: {keyword}")
-                
+            def search(keyword):
                 params = {
                     'searchType': 'name',
                     'searchString': keyword,
                     'filingStartDate': start_date.strftime('%m/%d/%Y'),
                     'filingEndDate': end_date.strftime('%m/%d/%Y'),
                 }
+                response = session.get(self.SEARCH_URL, params=params, timeout=30)
+                if response.status_code != 200:
+                    # A failed search, so the planner holds the watermark
+                    raise ConnectionError(f"HTTP {response.status_code} from TX SOS search")
+                return self.RESULTS_TABLE.extract(response)
+            
+            # Name searches overlap; each entity is handled once however many keywords hit it
+            planner = SearchPlanner('tx_sos', match=CONTAINS, interval=self.SEARCH_INTERVAL)
+            records = planner.run(target_keywords, search, key=lambda r: r['file_number'])
+            self.logger.info(f"Searches: {planner.summary()}")
+            
+            for record in records:
+                company_name = record['company_name']
+                address = record['address']
                 
-                try:
-                    response = session.get(self.SEARCH_URL, params=params, headers=headers, timeout=30)
-                    
-                    if response.status_code == 200:
-                        soup = BeautifulSoup(response.text, 'html.parser')
-                        
-                        # Parse results table
-                        results = soup.find_all('tr', class_='resultsRow')
-                        
-                        for row in results:
-                            try:
-                                cols = row.find_all('td')
-                                if len(cols) >= 4:
-                                    company_name = cols[0].get_text(strip=True)
-                                    file_number = cols[1].get_text(strip=True)
-                                    formation_date = cols[2].get_text(strip=True)
-                                    address = cols[3].get_text(strip=True) if len(cols) > 3 else ''
-                                    
-                                    # Skip if not a real business name
-                                    if not company_name or len(company_name) < 3:
-                                        continue
-                                    
-                                    city = self.extract_city(address)
-                                    industry = self.classify_industry(company_name)
-                                    
-                                    lead = {
-                                        'company_name': company_name.upper(),
-                                        'industry': industry,
-                                        'city': city,
-                                        'state': 'TX',
-                                        'source_id': self.generate_source_id('tx_sos', file_number),
-                                        'signal_type': 'new_formation',
-                                        'signal_date': datetime.now().isoformat()[:10],
-                                        'employees_estimated': '1-5',  # New businesses typically small
-                                        'raw_data': {
-                                            'file_number': file_number,
-                                            'formation_date': formation_date,
-                                            'address': address
-                                        }
-                                    }
-                                    
-                                    leads.append(lead)
-                                    
-                            except Exception as e:
-                                self.logger.debug(f"Error parsing row: {e}")
-                                continue
-                    
-                    # Be nice to the server
-                    time.sleep(2)
-                    
-                except requests.RequestException as e:
-                    self.logger.warning(f"Request failed for {keyword}: {e}")
+                # Skip if not a real business name
+                if not company_name or len(company_name) < 3:
                     continue
+                
+                lead = {
+                    'company_name': name_normalizer.display_name(company_name),
+                    'industry': self.classify_industry(company_name),
+                    'city': self.extract_city(address),
+                    'state': 'TX',
+                    'source_id': self.generate_source_id('tx_sos', record['file_number']),
+                    'signal_type': 'new_formation',
+                    'signal_date': datetime.now().isoformat()[:10],
+                    'employees_estimated': '1-5',  # New businesses typically small
+                    'raw_data': {
+                        'file_number': record['file_number'],
+                        'formation_date': record['formation_date'],
+                        'address': address
+                    }
+                }
+                
+                leads.append(lead)
+            
+            # A failed keyword may have missed filings in this window
+            if not planner.stats['failed']:
+                watermarks.advance('tx_sos', 'TX', covered=end_date)
             
         except Exception as e:
             self.logger.error(f"Scraping error: {e}")
         
+        self.logger.info(f"Session: {PortalSession.summary(self.get_source_name())}")
         self.logger.info(f"Found {len(leads)} potential leads from TX SOS")
         return leads
 
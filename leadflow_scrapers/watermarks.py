@@ -0,0 +1,234 @@
+"""
+Per-source incremental watermarks
+
+Every run used to request a fixed lookback (7 days of SOS formations, 30
+days of OSHA inspections, 90 days of MCS-150 dates), so most of each run
+re-fetched records the previous run had already seen. A watermark records,
+per (source, state), how far a source has been read:
+
+- covered: the date through which the source was read completely, taken
+  from the records seen (filing, issue or MCS-150 date) or, where records
+  carry no date, the end of the window that was searched
+- key: the highest sequential id seen (DOT number, file number), for
+  sources that can't be searched by date
+
+since() starts the next window at the watermark minus a safety overlap,
+for records posted late. A window older than the default lookback is used
+as is, so a missed day is caught up. Without a watermark, or in full mode
+(--full on the runners, or LEADFLOW_FULL=1), the default lookback applies.
+
+Scrapers call advance() once a window has been read completely; that only
+stages the move. commit() saves it after the leads have been written, so
+a run that dies or fails to insert re-reads the same window next time.
+Watermarks are kept in .cache/watermarks.sqlite.
+
+    since = watermarks.since('osha', 'TX', days_back=30)
+    ...fetch and parse everything since then...
+    watermarks.advance('osha', 'TX', covered=date.today())
+    ...write the leads...
+    watermarks.commit()
+"""
+import os
+import time
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+
+CACHE_DIR = os.getenv(
+    'LEADFLOW_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+)
+
+# Days re-read before the watermark. OSHA inspections and permits are often
+# entered days after they happen; SOS filings usually show up next day.
+OVERLAP_DAYS = {
+    'osha': 7,
+    'permits': 3,
+    'fmcsa': 3,
+}
+
+DEFAULT_OVERLAP_DAYS = int(os.getenv('LEADFLOW_WATERMARK_OVERLAP_DAYS', 2))
+
+FULL = os.getenv('LEADFLOW_FULL', '').lower() in ('1', 'true', 'yes')
+
+_store = None
+_store_lock = threading.Lock()
+_stats = {}
+_pending = {}
+
+
+class WatermarkStore:
+    """(source, state) -> covered date and highest key, in SQLite"""
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(CACHE_DIR, 'watermarks.sqlite')
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS watermarks '
+            '(source TEXT, state TEXT, covered TEXT, key TEXT, updated_at REAL, PRIMARY KEY (source, state))'
+        )
+        self._db.commit()
+
+    def get(self, source: str, state: str) -> tuple:
+        """(covered date or None, key or None)"""
+        with self._lock:
+            row = self._db.execute('SELECT covered, key FROM watermarks WHERE source = ? AND state = ?',
+                                   (source, state)).fetchone()
+        if row is None:
+            return None, None
+        return (date.fromisoformat(row[0]) if row[0] else None), row[1]
+
+    def advance(self, source: str, state: str, covered: date = None, key=None):
+        """Move the watermark forward; it never moves back"""
+        old_covered, old_key = self.get(source, state)
+        covered = max(filter(None, (covered, old_covered)), default=None)
+        if key is None or (old_key is not None and _key_order(str(key)) <= _key_order(old_key)):
+            key = old_key
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?, ?, ?)',
+                (source, state, covered.isoformat() if covered else None,
+                 str(key) if key is not None else None, time.time()),
+            )
+            self._db.commit()
+
+    def all(self) -> list:
+        with self._lock:
+            return self._db.execute('SELECT source, state, covered, key FROM watermarks ORDER BY 1, 2').fetchall()
+
+    def close(self):
+        self._db.close()
+
+
+def _key_order(key: str):
+    """Numeric ids compare as numbers, anything else as text"""
+    digits = key.strip()
+    return (0, int(digits), '') if digits.isdigit() else (1, 0, digits)
+
+
+def get_store() -> WatermarkStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = WatermarkStore()
+        return _store
+
+
+def set_full(full: bool = True):
+    """Ignore watermarks for this process and use the default lookbacks"""
+    global FULL
+    FULL = full
+
+
+def overlap(source: str) -> timedelta:
+    return timedelta(days=OVERLAP_DAYS.get(source, DEFAULT_OVERLAP_DAYS))
+
+
+def since(source: str, state: str, days_back: int) -> datetime:
+    """Start of the window to request for a source and state"""
+    now = datetime.now()
+    default = now - timedelta(days=days_back)
+    covered, _ = (None, None) if FULL else get_store().get(source, state)
+    start = datetime.combine(covered, datetime.min.time()) - overlap(source) if covered else default
+    start = min(start, now)
+    _stats[(source, state)] = {'since': start.date(), 'mode': 'full' if FULL else
+                               ('incremental' if covered else 'default'), 'default_days': days_back}
+    return start
+
+
+def days_back(source: str, state: str, default: int) -> int:
+    """since() as a whole number of days back from now, for sources that take days"""
+    return max(1, (datetime.now() - since(source, state, default)).days + 1)
+
+
+def last_key(source: str, state: str):
+    """Highest key seen, or None (always None in full mode)"""
+    return None if FULL else get_store().get(source, state)[1]
+
+
+def newer(source: str, state: str, key) -> bool:
+    """Whether a key is past the watermark"""
+    last = last_key(source, state)
+    return last is None or _key_order(str(key)) > _key_order(last)
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def advance(source: str, state: str, covered=None, key=None):
+    """
+    Stage a completed read until commit(). covered is a date, datetime or
+    ISO string, clamped to today so a bad future date can't skip records.
+    """
+    covered = _as_date(covered) if covered is not None else None
+    if covered:
+        covered = min(covered, date.today())
+    with _store_lock:
+        old_covered, old_key = _pending.get((source, state), (None, None))
+        if old_covered and (covered is None or old_covered > covered):
+            covered = old_covered
+        if key is None or (old_key is not None and _key_order(str(key)) <= _key_order(str(old_key))):
+            key = old_key
+        _pending[(source, state)] = (covered, key)
+
+
+def commit() -> int:
+    """Save every staged watermark; returns how many moved"""
+    with _store_lock:
+        staged = list(_pending.items())
+        _pending.clear()
+    store = get_store()
+    for (source, state), (covered, key) in staged:
+        store.advance(source, state, covered, key)
+    return len(staged)
+
+
+def discard() -> int:
+    """Drop staged watermarks (test runs, failed writes)"""
+    with _store_lock:
+        dropped = len(_pending)
+        _pending.clear()
+    return dropped
+
+
+def advance_from(source: str, records, date_field: str = None, key_field: str = None, state: str = None):
+    """
+    Advance each state's watermark to the latest date / highest key in a
+    batch of lead or record dicts (grouped by their 'state' unless given)
+    """
+    latest = {}
+    for record in records:
+        where = state or record.get('state')
+        if not where:
+            continue
+        entry = latest.setdefault(where, [None, None])
+        if date_field:
+            seen = _as_date(record.get(date_field) or '')
+            if seen and (entry[0] is None or seen > entry[0]):
+                entry[0] = seen
+        if key_field and record.get(key_field):
+            key = str(record[key_field])
+            if entry[1] is None or _key_order(key) > _key_order(entry[1]):
+                entry[1] = key
+    for where, (covered, key) in latest.items():
+        if covered or key:
+            advance(source, where, covered, key)
+
+
+def report() -> list:
+    """One line per (source, state) windowed this run"""
+    lines = []
+    for (source, state), s in sorted(_stats.items()):
+        extra = f" (default {s['default_days']}d)" if s['mode'] == 'incremental' else ''
+        lines.append(f"{source}/{state}: {s['mode']} since {s['since']}{extra}")
+    return lines
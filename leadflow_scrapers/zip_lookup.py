@@ -0,0 +1,209 @@
+"""
+Offline ZIP -> (city, county, state) lookup
+
+The reference table is a sorted, fixed-width numpy record array saved as
+data/zip_codes.npy. It is opened with mmap_mode='r', so loading is just a
+header read, and every worker process on the machine shares the same pages
+through the OS page cache instead of holding its own copy. Lookups are
+vectorized: a whole batch of ZIPs is resolved with one np.searchsorted.
+
+The committed table was built from the zips.json.bz2 shipped in the
+MIT-licensed zipcodes 1.2.0 package (42,724 ZIPs, PO box and unique ZIPs
+included), written out as a zip,city,county,state CSV. Rebuild it from that
+or any other ZIP CSV (Census ZCTA relationship file, USPS export,
+unitedstateszipcodes.org database, ...):
+
+    python zip_lookup.py build zip_code_database.csv
+    python zip_lookup.py 72201 30301 75001
+
+If the data file is missing, enrichment is skipped.
+"""
+import os
+import re
+import csv
+import sys
+import numpy as np
+
+DATA_PATH = os.getenv(
+    'LEADFLOW_ZIP_DATA',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'zip_codes.npy'),
+)
+
+RECORD_DTYPE = np.dtype([
+    ('zip', '<u4'),
+    ('city', 'S32'),
+    ('county', 'S32'),
+    ('state', 'S2'),
+])
+
+# Accepted CSV header names for each field, checked in order
+COLUMN_ALIASES = {
+    'zip': ['zip', 'zipcode', 'zip_code', 'zcta5', 'postal_code'],
+    'city': ['primary_city', 'city', 'po_name', 'place_name'],
+    'county': ['county', 'county_name', 'countyname'],
+    'state': ['state', 'state_abbr', 'state_code', 'stusps'],
+}
+
+ZIP5_RE = re.compile(r'(\d{5})(?:-\d{4})?')
+
+# 00000 is not a real ZIP, so 0 marks "no ZIP"
+NO_ZIP = 0
+
+
+def parse_zip(value) -> int:
+    """'72201', '72201-1234' or 72201 -> 72201; anything else -> NO_ZIP"""
+    if isinstance(value, (int, np.integer)):
+        return int(value) if 0 < value < 100000 else NO_ZIP
+    match = ZIP5_RE.search(str(value or ''))
+    return int(match.group(1)) if match else NO_ZIP
+
+
+def _column(header, field):
+    lowered = [h.strip().lower() for h in header]
+    for alias in COLUMN_ALIASES[field]:
+        if alias in lowered:
+            return lowered.index(alias)
+    raise ValueError(f"No {field} column in CSV header (tried {', '.join(COLUMN_ALIASES[field])})")
+
+
+def _fixed(text: str, width: int) -> bytes:
+    return text.strip().encode('ascii', 'ignore')[:width]
+
+
+def build(csv_path: str, out_path: str = DATA_PATH) -> int:
+    """Convert a ZIP CSV into the sorted fixed-width table. Returns row count."""
+    rows = {}
+    with open(csv_path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        cols = {field: _column(header, field) for field in COLUMN_ALIASES}
+        for row in reader:
+            code = parse_zip(row[cols['zip']])
+            if code == NO_ZIP or code in rows:
+                continue
+            county = row[cols['county']].strip()
+            if county.lower().endswith(' county'):
+                county = county[:-7]
+            rows[code] = (
+                code,
+                _fixed(row[cols['city']].title(), 32),
+                _fixed(county, 32),
+                _fixed(row[cols['state']].upper(), 2),
+            )
+
+    table = np.array([rows[code] for code in sorted(rows)], dtype=RECORD_DTYPE)
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, table)
+    os.replace(tmp_path, out_path)
+    return len(table)
+
+
+class ZipLookup:
+    """Memory-mapped ZIP table with scalar and vectorized lookups"""
+
+    def __init__(self, path: str = DATA_PATH):
+        self.path = path
+        self.table = np.load(path, mmap_mode='r')
+        if self.table.dtype != RECORD_DTYPE:
+            raise ValueError(f"{path} has dtype {self.table.dtype}, expected {RECORD_DTYPE}")
+        # Contiguous copy of the key column: 4 bytes per ZIP, ~170 KB in total
+        self.zips = np.ascontiguousarray(self.table['zip'])
+
+    def __len__(self):
+        return len(self.zips)
+
+    def indices(self, zips) -> np.ndarray:
+        """Row index for each ZIP, or -1 where it isn't in the table"""
+        keys = np.fromiter((parse_zip(z) for z in zips), dtype=np.uint32)
+        if not len(self.zips):
+            return np.full(len(keys), -1, dtype=np.int64)
+        idx = np.searchsorted(self.zips, keys)
+        idx[idx >= len(self.zips)] = 0
+        found = (self.zips[idx] == keys) & (keys != NO_ZIP)
+        return np.where(found, idx, -1)
+
+    def lookup_many(self, zips) -> list:
+        """[(city, county, state) or None] for a batch of ZIPs"""
+        idx = self.indices(zips)
+        hits = idx[idx >= 0]
+        records = self.table[hits]
+        resolved = iter(zip(
+            np.char.decode(records['city'], 'ascii').tolist(),
+            np.char.decode(records['county'], 'ascii').tolist(),
+            np.char.decode(records['state'], 'ascii').tolist(),
+        ))
+        return [next(resolved) if i >= 0 else None for i in idx]
+
+    def lookup(self, zip_code):
+        return self.lookup_many([zip_code])[0]
+
+    def enrich_leads(self, leads: list) -> int:
+        """
+        Fill city and state where they are missing and record the county in
+        raw_data, for every lead whose ZIP is in the table. A city the scraper
+        already found is kept. Returns the number of leads that matched.
+        """
+        pending = [lead for lead in leads if lead.get('zip')]
+        matched = 0
+        for lead, place in zip(pending, self.lookup_many([lead['zip'] for lead in pending])):
+            if place is None:
+                continue
+            city, county, state = place
+            if state and lead.get('state') and lead['state'] != state:
+                # ZIP disagrees with the state the lead was scraped for
+                continue
+            if not lead.get('city') or lead['city'] == 'Unknown':
+                lead['city'] = city
+            if not lead.get('state'):
+                lead['state'] = state
+            if county:
+                raw = lead.get('raw_data')
+                if raw is None:
+                    raw = lead['raw_data'] = {}
+                if isinstance(raw, dict):
+                    raw.setdefault('county', county)
+            matched += 1
+        return matched
+
+
+# Opened once per process; the pages themselves are shared between processes
+_default = None
+
+
+def get_lookup():
+    """Shared ZipLookup, or None when no data file has been built"""
+    global _default
+    if _default is None and os.path.exists(DATA_PATH):
+        _default = ZipLookup(DATA_PATH)
+    return _default
+
+
+def lookup(zip_code):
+    table = get_lookup()
+    return table.lookup(zip_code) if table else None
+
+
+def lookup_many(zips) -> list:
+    table = get_lookup()
+    return table.lookup_many(zips) if table else [None] * len(zips)
+
+
+def enrich_leads(leads: list) -> int:
+    """Enrichment stage run before writes; a no-op without the data file"""
+    table = get_lookup()
+    return table.enrich_leads(leads) if table else 0
+
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 3 and sys.argv[1] == 'build':
+        count = build(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else DATA_PATH)
+        print(f"Wrote {count} ZIPs to {sys.argv[3] if len(sys.argv) > 3 else DATA_PATH}")
+    elif len(sys.argv) >= 2:
+        if get_lookup() is None:
+            sys.exit(f"No ZIP table at {DATA_PATH}; run: python zip_lookup.py build <csv>")
+        for code, place in zip(sys.argv[1:], lookup_many(sys.argv[1:])):
+            print(f"{code}: {', '.join(place) if place else 'not found'}")
+    else:
+        print(__doc__)